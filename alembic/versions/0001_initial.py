@@ -0,0 +1,72 @@
+"""Initial schema: flood events, users and alert subscriptions
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-16
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "flood_events",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("location_name", sa.String(), nullable=False),
+        sa.Column("latitude", sa.Float(), nullable=False),
+        sa.Column("longitude", sa.Float(), nullable=False),
+        sa.Column(
+            "severity",
+            sa.Enum("LOW", "MEDIUM", "HIGH", "CRITICAL", name="severitylevel"),
+            nullable=False,
+        ),
+        sa.Column("risk_score", sa.Float(), nullable=False),
+        sa.Column("timestamp", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("rainfall_mm", sa.Float(), nullable=True),
+        sa.Column("elevation_m", sa.Float(), nullable=True),
+        sa.Column("description", sa.String(), nullable=True),
+    )
+    op.create_index("ix_flood_events_id", "flood_events", ["id"])
+    op.create_index("ix_flood_events_location_name", "flood_events", ["location_name"])
+
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("username", sa.String(), nullable=False),
+        sa.Column("hashed_password", sa.String(), nullable=False),
+        sa.Column("is_active", sa.Integer(), nullable=True),
+        sa.Column("is_admin", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+    op.create_index("ix_users_username", "users", ["username"], unique=True)
+
+    op.create_table(
+        "alert_subscriptions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String(), nullable=True),
+        sa.Column("phone", sa.String(), nullable=True),
+        sa.Column("latitude", sa.Float(), nullable=False),
+        sa.Column("longitude", sa.Float(), nullable=False),
+        sa.Column("radius_km", sa.Float(), nullable=True),
+        sa.Column("min_severity", sa.String(), nullable=True),
+        sa.Column("is_active", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    )
+    op.create_index("ix_alert_subscriptions_id", "alert_subscriptions", ["id"])
+    op.create_index("ix_alert_subscriptions_email", "alert_subscriptions", ["email"])
+
+
+def downgrade() -> None:
+    op.drop_table("alert_subscriptions")
+    op.drop_table("users")
+    op.drop_table("flood_events")
+    sa.Enum(name="severitylevel").drop(op.get_bind(), checkfirst=True)
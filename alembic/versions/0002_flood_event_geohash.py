@@ -0,0 +1,55 @@
+"""Add indexed geohash column to flood events for radius queries
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-16
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.geo import geohash_encode
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 5000
+
+
+def upgrade() -> None:
+    op.add_column("flood_events", sa.Column("geohash", sa.String(length=12), nullable=True))
+    op.create_index("ix_flood_events_geohash", "flood_events", ["geohash"])
+
+    # Backfill existing rows in batches
+    bind = op.get_bind()
+    flood_events = sa.table(
+        "flood_events",
+        sa.column("id", sa.Integer),
+        sa.column("latitude", sa.Float),
+        sa.column("longitude", sa.Float),
+        sa.column("geohash", sa.String),
+    )
+    while True:
+        rows = bind.execute(
+            sa.select(flood_events.c.id, flood_events.c.latitude, flood_events.c.longitude)
+            .where(flood_events.c.geohash.is_(None))
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        bind.execute(
+            flood_events.update()
+            .where(flood_events.c.id == sa.bindparam("row_id"))
+            .values(geohash=sa.bindparam("row_geohash")),
+            [
+                {"row_id": row.id, "row_geohash": geohash_encode(row.latitude, row.longitude)}
+                for row in rows
+            ],
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_flood_events_geohash", table_name="flood_events")
+    op.drop_column("flood_events", "geohash")
@@ -0,0 +1,25 @@
+"""Add (timestamp, id) and (severity, timestamp, id) indexes for keyset pagination
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-16
+"""
+
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_flood_events_timestamp_id", "flood_events", ["timestamp", "id"])
+    op.create_index(
+        "ix_flood_events_severity_timestamp_id", "flood_events", ["severity", "timestamp", "id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_flood_events_severity_timestamp_id", table_name="flood_events")
+    op.drop_index("ix_flood_events_timestamp_id", table_name="flood_events")
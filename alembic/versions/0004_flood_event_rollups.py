@@ -0,0 +1,107 @@
+"""Add hourly/daily severity rollups and per-location counts for dashboard metrics
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-16
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 10000
+
+
+def upgrade() -> None:
+    for table_name in ("flood_event_hourly_rollups", "flood_event_daily_rollups"):
+        op.create_table(
+            table_name,
+            sa.Column("bucket_start", sa.DateTime(timezone=True), primary_key=True),
+            sa.Column("severity", sa.String(length=10), primary_key=True),
+            sa.Column("event_count", sa.Integer(), nullable=False),
+            sa.Column("risk_score_sum", sa.Float(), nullable=False),
+        )
+    op.create_table(
+        "flood_location_rollups",
+        sa.Column("location_name", sa.String(), primary_key=True),
+        sa.Column("event_count", sa.Integer(), nullable=False),
+    )
+    op.create_index(
+        "ix_flood_location_rollups_event_count", "flood_location_rollups", ["event_count"]
+    )
+
+    _backfill(op.get_bind())
+
+
+def _backfill(bind) -> None:
+    """Aggregate existing events in Python (portable across SQLite and PostgreSQL)."""
+    flood_events = sa.table(
+        "flood_events",
+        sa.column("id", sa.Integer),
+        sa.column("timestamp", sa.DateTime),
+        sa.column("severity", sa.String),
+        sa.column("risk_score", sa.Float),
+        sa.column("location_name", sa.String),
+    )
+
+    hourly = {}
+    daily = {}
+    locations = {}
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(flood_events)
+            .where(flood_events.c.id > last_id)
+            .order_by(flood_events.c.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        for row in rows:
+            # flood_events.severity stores enum names (e.g. "HIGH"); rollups store values
+            severity = row.severity.capitalize()
+            hour = row.timestamp.replace(minute=0, second=0, microsecond=0)
+            for buckets, bucket_start in ((hourly, hour), (daily, hour.replace(hour=0))):
+                totals = buckets.setdefault((bucket_start, severity), [0, 0.0])
+                totals[0] += 1
+                totals[1] += row.risk_score
+            locations[row.location_name] = locations.get(row.location_name, 0) + 1
+        last_id = rows[-1].id
+
+    for table_name, buckets in (
+        ("flood_event_hourly_rollups", hourly),
+        ("flood_event_daily_rollups", daily),
+    ):
+        if buckets:
+            op.bulk_insert(
+                sa.table(
+                    table_name,
+                    sa.column("bucket_start", sa.DateTime),
+                    sa.column("severity", sa.String),
+                    sa.column("event_count", sa.Integer),
+                    sa.column("risk_score_sum", sa.Float),
+                ),
+                [
+                    {"bucket_start": start, "severity": severity, "event_count": count, "risk_score_sum": total}
+                    for (start, severity), (count, total) in buckets.items()
+                ],
+            )
+    if locations:
+        op.bulk_insert(
+            sa.table(
+                "flood_location_rollups",
+                sa.column("location_name", sa.String),
+                sa.column("event_count", sa.Integer),
+            ),
+            [{"location_name": name, "event_count": count} for name, count in locations.items()],
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("flood_location_rollups")
+    op.drop_table("flood_event_daily_rollups")
+    op.drop_table("flood_event_hourly_rollups")
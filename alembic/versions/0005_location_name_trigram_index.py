@@ -0,0 +1,33 @@
+"""Add a pg_trgm GIN index on location names for /map/search
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-16
+"""
+
+from alembic import op
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # SQLite has no trigram indexes; the app searches an in-memory index there
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        "ix_flood_location_rollups_location_name_trgm",
+        "flood_location_rollups",
+        ["location_name"],
+        postgresql_using="gin",
+        postgresql_ops={"location_name": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.drop_index("ix_flood_location_rollups_location_name_trgm", table_name="flood_location_rollups")
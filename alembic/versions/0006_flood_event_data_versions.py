@@ -0,0 +1,46 @@
+"""Add a flood event data version, per-event versions and delete tombstones for delta sync
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-16
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing events predate versioning: version 0, included in every full payload
+    op.add_column(
+        "flood_events",
+        sa.Column("version", sa.BigInteger(), nullable=False, server_default="0"),
+    )
+    op.create_index("ix_flood_events_version", "flood_events", ["version"])
+
+    op.create_table(
+        "data_versions",
+        sa.Column("name", sa.String(length=32), primary_key=True),
+        sa.Column("version", sa.BigInteger(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_table(
+        "flood_event_tombstones",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("flood_event_id", sa.Integer(), nullable=False),
+        sa.Column("version", sa.BigInteger(), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("ix_flood_event_tombstones_version", "flood_event_tombstones", ["version"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_flood_event_tombstones_version", table_name="flood_event_tombstones")
+    op.drop_table("flood_event_tombstones")
+    op.drop_table("data_versions")
+    op.drop_index("ix_flood_events_version", table_name="flood_events")
+    op.drop_column("flood_events", "version")
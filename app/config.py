@@ -16,6 +16,9 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str
+    DATABASE_REPLICA_URLS: str = ""  # Comma-separated read replicas for GET endpoints
+    REPLICA_FAILURE_RATE_THRESHOLD: float = 0.5
+    REPLICA_OPEN_SECONDS: float = 15.0  # How long a failing replica is skipped
     
     # API Keys
     OPENWEATHERMAP_API_KEY: str
@@ -32,7 +35,88 @@ class Settings(BaseSettings):
     APP_NAME: str = "Hyperlocal Urban Flood Forecaster"
     DEBUG: bool = False
     ALLOWED_ORIGINS: str = "http://localhost:3000,http://localhost:5173"
+
+    # Upstream HTTP clients (shared, keep-alive pooled per provider)
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    HTTP_CONNECT_TIMEOUT_SECONDS: float = 3.0
+    OPENWEATHERMAP_TIMEOUT_SECONDS: float = 5.0
+    GOOGLE_ELEVATION_TIMEOUT_SECONDS: float = 5.0
+    RISK_REQUEST_DEADLINE_SECONDS: float = 4.0  # Overall budget for one risk calculation
+    RISK_BATCH_MAX_CONCURRENCY: int = 8  # Parallel weather lookups per batch (and bulk ingest)
+    RISK_BATCH_MAX_WEATHER_FETCHES: int = 200  # Uncached cells fetched per batch; the rest are degraded
+    
+    # Upstream circuit breakers (per provider)
+    CIRCUIT_FAILURE_RATE_THRESHOLD: float = 0.5
+    CIRCUIT_WINDOW_SIZE: int = 20
+    CIRCUIT_MIN_CALLS: int = 5
+    CIRCUIT_OPEN_SECONDS: float = 30.0
+    
+    # Background weather prefetch for hot cells (subscriptions, recent events)
+    PREFETCH_ENABLED: bool = True
+    PREFETCH_INTERVAL_SECONDS: float = 300.0  # keep below WEATHER_CACHE_TTL_SECONDS
+    PREFETCH_MAX_REQUESTS_PER_MINUTE: int = 30  # Per host: only the lock holder prefetches
+    PREFETCH_EVENT_LOOKBACK_HOURS: int = 48
+    PREFETCH_LEADER_LOCK_PATH: Optional[str] = str(PROJECT_ROOT / "data" / "prefetch.lock")  # empty = every worker prefetches
+    
+    # Bulk flood event ingestion (POST /floods/bulk)
+    BULK_INGEST_MAX_EVENTS: int = 50000
+    BULK_INGEST_MAX_EVENT_BYTES: int = 2048  # Average size allowed per event; caps the request body
+    
+    # In-memory subscription index for alert matching
+    SUBSCRIPTION_GRID_DEGREES: float = 0.25  # ~28 km cells
+    SUBSCRIPTION_INDEX_REFRESH_SECONDS: float = 60.0  # picks up changes made by other workers
+    
+    # In-memory location name index (/map/search on SQLite, completion everywhere)
+    LOCATION_INDEX_REFRESH_SECONDS: float = 60.0
+    
+    # Server-side heatmap binning (/map/heatmap-data?zoom=)
+    HEATMAP_CELL_PIXELS: int = 16  # On-screen cell size; bounds cells per viewport
+    HEATMAP_STORE_REFRESH_SECONDS: float = 120.0  # picks up writes made by other workers
+    HEATMAP_CACHE_TTL_SECONDS: float = 60.0  # how far a time window may lag before re-binning
+    HEATMAP_CACHE_MAX_ENTRIES: int = 256
+    
+    # Vector tiles (/map/tiles/{z}/{x}/{y}.mvt), rendered from the heatmap store
+    MVT_EXTENT: int = 4096
+    MVT_BUFFER: int = 64  # Tile units kept beyond each edge
+    MVT_EVENT_MIN_ZOOM: int = 12  # Below this, nearby events are merged into one point
+    MVT_CLUSTER_UNITS: int = 128  # Merge square size in tile units (8 px on a 256 px tile)
+    MVT_MAX_TILE_EVENTS: int = 4096  # Denser tiles are merged even at high zoom
+    MVT_CACHE_TTL_SECONDS: float = 300.0
+    MVT_CACHE_MAX_TILES: int = 5000
+    MVT_HTTP_MAX_AGE_SECONDS: int = 30  # Browser/CDN Cache-Control max-age
     
+    # Live map marker clusters (/map/clusters) over active events
+    CLUSTER_CELL_PIXELS: int = 64  # Cluster size on screen; power of two dividing 256
+    CLUSTER_MAX_ZOOM: int = 16  # Above this, events are returned individually
+    CLUSTER_ACTIVE_HOURS: float = 24.0  # Same window as /map/active-alerts
+    CLUSTER_MIN_SEVERITY: str = "High"
+    CLUSTER_INDEX_REFRESH_SECONDS: float = 120.0  # picks up writes made by other workers
+    
+    # Live alert push channel (/map/stream, server-sent events)
+    STREAM_QUEUE_SIZE: int = 256  # Pending changes per viewer before it is told to resync
+    STREAM_TICK_SECONDS: float = 5.0  # Expiry check interval
+    STREAM_RECONCILE_SECONDS: float = 15.0  # picks up writes made by other workers
+    STREAM_KEEPALIVE_SECONDS: float = 20.0  # Comment line sent on idle connections
+    STREAM_RETRY_MS: int = 3000  # Client reconnect delay
+    
+    # Weather cache (rainfall shared per quantized grid cell)
+    WEATHER_GRID_DEGREES: float = 0.005  # ~550 m cells
+    WEATHER_CACHE_TTL_SECONDS: float = 600.0
+    WEATHER_CACHE_MAX_ENTRIES: int = 10000
+    WEATHER_SPECULATIVE_FORECAST: bool = False  # Fetch the forecast alongside current weather, not after it
+    WEATHER_STORE_PATH: Optional[str] = str(PROJECT_ROOT / "data" / "weather_cache.sqlite3")  # shared by all workers; empty disables
+    
+    # Offline DEM raster (.npy + .json sidecar, or GeoTIFF); primary elevation source
+    DEM_PATH: Optional[str] = None
+    
+    # Persistent elevation store (SQLite, shared by all workers; empty disables)
+    ELEVATION_STORE_PATH: Optional[str] = str(PROJECT_ROOT / "data" / "elevation_cache.sqlite3")
+    ELEVATION_GRID_DEGREES: float = 0.0005  # ~55 m cells
+    ELEVATION_BATCH_WINDOW_MS: float = 10.0
+    ELEVATION_BATCH_MAX_SIZE: int = 256  # keeps request URLs well under Google's limit
+
     # Optional: Notification Services
     TWILIO_ACCOUNT_SID: Optional[str] = None
     TWILIO_AUTH_TOKEN: Optional[str] = None
@@ -55,6 +139,11 @@ class Settings(BaseSettings):
     def cors_origins(self) -> list[str]:
         """Parse CORS origins from comma-separated string."""
         return [origin.strip() for origin in self.ALLOWED_ORIGINS.split(",")]
+    
+    @property
+    def replica_urls(self) -> list[str]:
+        """Parse read-replica database URLs from comma-separated string."""
+        return [url.strip() for url in self.DATABASE_REPLICA_URLS.split(",") if url.strip()]
 
 
 # Global settings instance
@@ -1,19 +1,34 @@
 """
 CRUD operations for database models.
 Provides functions for Create, Read, Update, Delete operations.
+All functions are coroutines that run on an AsyncSession.
 """
 
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
-from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Row, and_, desc, func, insert, or_, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 from . import models, schemas
+from .database import AsyncSessionLocal
+from .services.alert_stream import alert_hub
+from .services.cache import rebuild_if_stale
+from .services.cluster_index import Cluster, cluster_index
+from .services.heatmap import HeatmapBins, heatmap_store
+from .services.location_search import location_search_index
+from .services.vector_tiles import vector_tile_renderer
+from .services.subscription_index import IndexedSubscription, subscription_index
+from .utils.geo import bounding_box, geohash_cover, geohash_encode, haversine_km
 from datetime import datetime
 
+# Dialect-specific INSERT constructs that support ON CONFLICT DO UPDATE
+_UPSERT_INSERTS = {"postgresql": postgresql_insert, "sqlite": sqlite_insert}
+
 
 # Flood Event CRUD Operations
 
-def create_flood_event(
-    db: Session,
+async def create_flood_event(
+    db: AsyncSession,
     flood_event: schemas.FloodEventCreate,
     risk_score: float,
     severity: str,
@@ -34,6 +49,8 @@ def create_flood_event(
     Returns:
         Created FloodEvent model instance
     """
+    timestamp = datetime.utcnow()
+    version = await _advance_data_version(db, timestamp)
     db_flood_event = models.FloodEvent(
         location_name=flood_event.location_name,
         latitude=flood_event.latitude,
@@ -43,15 +60,83 @@ def create_flood_event(
         rainfall_mm=rainfall_mm,
         elevation_m=elevation_m,
         description=flood_event.description,
-        timestamp=datetime.utcnow()
+        timestamp=timestamp,
+        geohash=geohash_encode(flood_event.latitude, flood_event.longitude),
+        version=version
     )
     db.add(db_flood_event)
-    db.commit()
-    db.refresh(db_flood_event)
+    locations = await _apply_rollups(db, [db_flood_event])
+    await db.commit()
+    location_search_index.apply_counts(locations)
+    await db.refresh(db_flood_event)
+    heatmap_store.add([db_flood_event])
+    cluster_index.add([db_flood_event])
+    alert_hub.publish_created([db_flood_event])
     return db_flood_event
 
 
-def get_flood_event(db: Session, flood_id: int) -> Optional[models.FloodEvent]:
+async def create_flood_events_bulk(
+    db: AsyncSession,
+    flood_events: Sequence[schemas.FloodEventCreate],
+    risk_scores: Sequence[float],
+    severities: Sequence[str],
+    rainfall_mm: Sequence[float],
+    elevation_m: Sequence[float]
+) -> List[models.FloodEvent]:
+    """
+    Insert many flood events with multi-row INSERT ... RETURNING statements.
+    
+    Rows are sent in large batches and the generated columns come back in
+    the same round trip, so there is no per-row flush or refresh.
+    
+    Args:
+        db: Database session
+        flood_events: Flood event data from the request
+        risk_scores: Calculated risk score per event
+        severities: Calculated severity level per event
+        rainfall_mm: Rainfall per event
+        elevation_m: Elevation per event
+    
+    Returns:
+        Created FloodEvent model instances, in input order
+    """
+    timestamp = datetime.utcnow()
+    version = await _advance_data_version(db, timestamp)
+    rows = [
+        {
+            "location_name": event.location_name,
+            "latitude": event.latitude,
+            "longitude": event.longitude,
+            "severity": severity,
+            "risk_score": risk_score,
+            "rainfall_mm": rainfall,
+            "elevation_m": elevation,
+            "description": event.description,
+            "timestamp": timestamp,
+            "geohash": geohash_encode(event.latitude, event.longitude),
+            "version": version
+        }
+        for event, risk_score, severity, rainfall, elevation in zip(
+            flood_events, risk_scores, severities, rainfall_mm, elevation_m
+        )
+    ]
+    
+    # RETURNING order is not guaranteed by the database; SQLAlchemy correlates rows to parameters
+    result = await db.scalars(
+        insert(models.FloodEvent).returning(models.FloodEvent, sort_by_parameter_order=True),
+        rows
+    )
+    created = result.all()
+    locations = await _apply_rollups(db, created)
+    await db.commit()
+    location_search_index.apply_counts(locations)
+    heatmap_store.add(created)
+    cluster_index.add(created)
+    alert_hub.publish_created(created)
+    return created
+
+
+async def get_flood_event(db: AsyncSession, flood_id: int) -> Optional[models.FloodEvent]:
     """
     Get a single flood event by ID.
     
@@ -62,70 +147,554 @@ def get_flood_event(db: Session, flood_id: int) -> Optional[models.FloodEvent]:
     Returns:
         FloodEvent model instance or None if not found
     """
-    return db.query(models.FloodEvent).filter(models.FloodEvent.id == flood_id).first()
+    return await db.get(models.FloodEvent, flood_id)
 
 
-def get_flood_events(
-    db: Session,
+async def get_flood_events(
+    db: AsyncSession,
     skip: int = 0,
     limit: int = 100,
-    severity: Optional[str] = None
+    severity: Optional[str] = None,
+    after: Optional[Tuple[datetime, int]] = None,
+    since: Optional[datetime] = None
 ) -> List[models.FloodEvent]:
     """
     Get a list of flood events with optional filtering.
     
+    Events are ordered newest first by (timestamp, id). Passing `after`
+    (the sort key of the last event of the previous page) seeks directly
+    to the next page through the (timestamp, id) indexes; `skip` is then
+    ignored.
+    
     Args:
         db: Database session
-        skip: Number of records to skip (for pagination)
+        skip: Number of records to skip (offset pagination)
         limit: Maximum number of records to return
         severity: Optional filter by severity level
+        after: Optional (timestamp, id) keyset cursor
+        since: Optional lower bound on the event timestamp
     
     Returns:
         List of FloodEvent model instances
     """
-    query = db.query(models.FloodEvent)
+    query = select(models.FloodEvent)
     
     # Filter by severity if provided
     if severity:
-        query = query.filter(models.FloodEvent.severity == severity)
+        query = query.where(models.FloodEvent.severity == severity)
+    
+    if since is not None:
+        query = query.where(models.FloodEvent.timestamp >= since)
+    
+    if after is not None:
+        query = query.where(
+            tuple_(models.FloodEvent.timestamp, models.FloodEvent.id) < tuple_(*after)
+        )
+    else:
+        query = query.offset(skip)
+    
+    # Order by most recent first (id breaks timestamp ties)
+    query = query.order_by(desc(models.FloodEvent.timestamp), desc(models.FloodEvent.id))
+    
+    result = await db.execute(query.limit(limit))
+    return list(result.scalars())
+
+
+# Columns needed by alert and map listings (no ORM entity hydration)
+FLOOD_EVENT_SUMMARY_COLUMNS = (
+    models.FloodEvent.id,
+    models.FloodEvent.location_name,
+    models.FloodEvent.latitude,
+    models.FloodEvent.longitude,
+    models.FloodEvent.severity,
+    models.FloodEvent.risk_score,
+    models.FloodEvent.timestamp,
+    models.FloodEvent.rainfall_mm,
+    models.FloodEvent.elevation_m,
+    models.FloodEvent.description
+)
+
+FLOOD_EVENT_POINT_COLUMNS = (
+    models.FloodEvent.id,
+    models.FloodEvent.latitude,
+    models.FloodEvent.longitude,
+    models.FloodEvent.risk_score,
+    models.FloodEvent.severity,
+    models.FloodEvent.location_name
+)
+
+
+async def get_flood_event_summaries(
+    db: AsyncSession,
+    limit: int = 100,
+    since: Optional[datetime] = None,
+    severities: Optional[Sequence[str]] = None,
+    order_by_risk: bool = False,
+    since_version: Optional[int] = None
+) -> List[Row]:
+    """
+    Get lightweight flood event rows for alert and map listings.
+    
+    Selects only FLOOD_EVENT_SUMMARY_COLUMNS and returns plain rows
+    (attribute access like `row.latitude`), skipping ORM hydration and
+    identity-map bookkeeping.
+    
+    Args:
+        db: Database session
+        limit: Maximum number of rows to return
+        since: Optional lower bound on the event timestamp
+        severities: Optional severity levels to include
+        order_by_risk: Order by risk score (highest first) instead of newest first
+        since_version: Only events written after this data version (delta sync)
+    
+    Returns:
+        List of rows
+    """
+    query = _flood_event_rows(FLOOD_EVENT_SUMMARY_COLUMNS, since, severities, since_version)
+    if order_by_risk:
+        query = query.order_by(desc(models.FloodEvent.risk_score), desc(models.FloodEvent.timestamp))
+    else:
+        query = query.order_by(desc(models.FloodEvent.timestamp), desc(models.FloodEvent.id))
+    
+    return list((await db.execute(query.limit(limit))).all())
+
+
+async def get_flood_event_points(
+    db: AsyncSession,
+    limit: int = 1000,
+    since: Optional[datetime] = None,
+    since_version: Optional[int] = None
+) -> List[Row]:
+    """
+    Get the newest flood events as (id, latitude, longitude, risk_score,
+    severity, location_name) rows for map overlays.
+    
+    Args:
+        db: Database session
+        limit: Maximum number of rows to return
+        since: Optional lower bound on the event timestamp
+        since_version: Only events written after this data version (delta sync)
+    
+    Returns:
+        List of rows, newest first
+    """
+    query = _flood_event_rows(FLOOD_EVENT_POINT_COLUMNS, since, None, since_version).order_by(
+        desc(models.FloodEvent.timestamp), desc(models.FloodEvent.id)
+    )
+    return list((await db.execute(query.limit(limit))).all())
+
+
+async def get_heatmap_bins(db: AsyncSession, zoom: int, hours: Optional[int] = None) -> HeatmapBins:
+    """
+    Get flood events aggregated into grid cells for a map zoom level.
     
-    # Order by most recent first
-    query = query.order_by(desc(models.FloodEvent.timestamp))
+    Served from the in-memory heatmap store, which is reloaded from the
+    database when stale; binned results are cached per zoom and window.
     
-    return query.offset(skip).limit(limit).all()
+    Args:
+        db: Database session (used only to reload a stale store)
+        zoom: Web map zoom level
+        hours: Only include events from the last N hours (None = all)
+    
+    Returns:
+        HeatmapBins covering the whole map
+    """
+    await rebuild_if_stale(heatmap_store, db, AsyncSessionLocal)
+    return heatmap_store.bins(zoom, hours)
+
+
+async def get_flood_event_tile(db: AsyncSession, z: int, x: int, y: int) -> bytes:
+    """
+    Get a Mapbox Vector Tile of flood events and the risk grid.
+    
+    Rendered from the in-memory heatmap store (reloaded from the database
+    when stale) and cached until the store's data changes.
+    
+    Returns:
+        MVT protobuf bytes (empty when the tile has no features)
+    """
+    await rebuild_if_stale(heatmap_store, db, AsyncSessionLocal)
+    return vector_tile_renderer.render(z, x, y)
+
+
+async def get_active_event_clusters(
+    db: AsyncSession,
+    zoom: int,
+    bbox: Optional[Tuple[float, float, float, float]] = None
+) -> List[Cluster]:
+    """
+    Get marker clusters of active (recent, high-severity) flood events.
+    
+    Served from the in-memory cluster index, which is refreshed from the
+    database in the background when stale.
+    
+    Args:
+        db: Database session (used only for the first load of the index)
+        zoom: Map zoom level
+        bbox: Optional (south, west, north, east) viewport
+    
+    Returns:
+        Clusters overlapping the viewport, most events first
+    """
+    await rebuild_if_stale(cluster_index, db, AsyncSessionLocal)
+    return cluster_index.clusters(zoom, bbox)
+
 
+async def expand_event_cluster(db: AsyncSession, cluster_id: str) -> Optional[Tuple[Cluster, int, List[Cluster]]]:
+    """
+    Expand one marker cluster into the markers it splits into.
+    
+    Returns:
+        (cluster, expansion_zoom, children), or None if the cluster does not exist
+    """
+    await rebuild_if_stale(cluster_index, db, AsyncSessionLocal)
+    return cluster_index.expand(cluster_id)
+
+
+def _flood_event_rows(
+    columns,
+    since: Optional[datetime],
+    severities: Optional[Sequence[str]],
+    since_version: Optional[int] = None
+):
+    query = select(*columns)
+    if since is not None:
+        query = query.where(models.FloodEvent.timestamp >= since)
+    if since_version is not None:
+        query = query.where(models.FloodEvent.version > since_version)
+    if severities:
+        levels = [level for level in models.SeverityLevel if level.value in severities]
+        query = query.where(models.FloodEvent.severity.in_(levels))
+    return query
+
+
+async def get_data_version(db: AsyncSession) -> Tuple[int, Optional[datetime]]:
+    """
+    Get the current flood event data version.
+    
+    Returns:
+        Tuple of (version, time of the last write); (0, None) before the first write
+    """
+    row = (await db.execute(
+        select(models.DataVersion.version, models.DataVersion.updated_at)
+        .where(models.DataVersion.name == models.FLOOD_EVENTS_DATA_SET)
+    )).first()
+    if row is None:
+        return 0, None
+    return row.version, row.updated_at
+
+
+async def get_deleted_flood_event_ids(db: AsyncSession, since_version: int) -> List[int]:
+    """Get IDs of flood events deleted after a data version (delta sync)."""
+    tombstone = models.FloodEventTombstone
+    result = await db.execute(
+        select(tombstone.flood_event_id)
+        .where(tombstone.version > since_version)
+        .order_by(tombstone.version)
+    )
+    return list(result.scalars())
 
-def get_flood_events_by_location(
-    db: Session,
+
+async def _advance_data_version(db: AsyncSession, timestamp: datetime) -> int:
+    """
+    Increment the flood event data version in the caller's transaction.
+    
+    The upsert locks the counter row until the transaction ends, so
+    concurrent writers commit in version order and a reader never sees
+    version N before every write up to N is visible.
+    
+    Returns:
+        The new version, to stamp on the rows this transaction writes
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect not in _UPSERT_INSERTS:
+        raise ValueError(f"Data version upserts are not supported on {dialect}")
+    table = models.DataVersion.__table__
+    stmt = _UPSERT_INSERTS[dialect](table).values(
+        name=models.FLOOD_EVENTS_DATA_SET, version=1, updated_at=timestamp
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.name],
+        set_={"version": table.c.version + 1, "updated_at": stmt.excluded.updated_at}
+    ).returning(table.c.version)
+    return (await db.execute(stmt)).scalar_one()
+
+
+async def get_flood_event_statistics(
+    db: AsyncSession,
+    since: Optional[datetime] = None,
+    recent_since: Optional[datetime] = None
+) -> dict:
+    """
+    Aggregate flood events by severity from the rollup tables.
+    
+    Windowed figures are read from the hourly rollups (bounds are rounded
+    down to the start of the hour); all-time figures from the daily ones.
+    The cost depends on the window length, not on the number of events.
+    
+    Args:
+        db: Database session
+        since: Optional lower bound on the event timestamp
+        recent_since: Optional cutoff for the additional `recent` count
+    
+    Returns:
+        Dictionary with total, recent, average_risk_score and
+        severity_counts (every severity level, zero if absent)
+    """
+    if since is not None:
+        rollup = models.FloodEventHourlyRollup
+        query = select(
+            rollup.severity, func.sum(rollup.event_count), func.sum(rollup.risk_score_sum)
+        ).where(rollup.bucket_start >= _hour_start(since))
+    else:
+        rollup = models.FloodEventDailyRollup
+        query = select(
+            rollup.severity, func.sum(rollup.event_count), func.sum(rollup.risk_score_sum)
+        )
+    
+    severity_counts = {level.value: 0 for level in reversed(models.SeverityLevel)}
+    total = 0
+    risk_sum = 0.0
+    for severity, count, score_sum in (await db.execute(query.group_by(rollup.severity))).all():
+        severity_counts[severity] = count or 0
+        total += count or 0
+        risk_sum += score_sum or 0.0
+    
+    recent = 0
+    if recent_since is not None:
+        recent = await db.scalar(
+            select(func.coalesce(func.sum(models.FloodEventHourlyRollup.event_count), 0)).where(
+                models.FloodEventHourlyRollup.bucket_start >= _hour_start(recent_since)
+            )
+        )
+    
+    return {
+        "total": total,
+        "recent": recent,
+        "average_risk_score": risk_sum / total if total else 0.0,
+        "severity_counts": severity_counts
+    }
+
+
+async def get_top_flood_locations(db: AsyncSession, limit: int = 5) -> List[Tuple[str, int]]:
+    """
+    Get the locations with the most flood events (from the location rollup).
+    
+    Args:
+        db: Database session
+        limit: Number of locations to return
+    
+    Returns:
+        List of (location_name, event_count), most events first
+    """
+    rollup = models.FloodLocationRollup
+    query = select(rollup.location_name, rollup.event_count).where(
+        rollup.event_count > 0
+    ).order_by(desc(rollup.event_count), rollup.location_name).limit(limit)
+    
+    return [(row[0], row[1]) for row in (await db.execute(query)).all()]
+
+
+def _hour_start(timestamp: datetime) -> datetime:
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+
+async def _apply_rollups(
+    db: AsyncSession,
+    flood_events: Iterable[models.FloodEvent],
+    sign: int = 1
+) -> Dict[str, int]:
+    """
+    Add (sign=1) or subtract (sign=-1) events from the rollup tables.
+    
+    Runs as upserts in the caller's transaction, so rollups commit or roll
+    back together with the event rows.
+    
+    Returns:
+        Event count change per location name, for in-memory indexes to
+        apply once the transaction has committed
+    """
+    hourly: Dict[Tuple[datetime, str], List[float]] = {}
+    daily: Dict[Tuple[datetime, str], List[float]] = {}
+    locations: Dict[str, int] = {}
+    for event in flood_events:
+        severity = getattr(event.severity, "value", event.severity)
+        hour = _hour_start(event.timestamp)
+        for buckets, bucket_start in ((hourly, hour), (daily, hour.replace(hour=0))):
+            totals = buckets.setdefault((bucket_start, severity), [0, 0.0])
+            totals[0] += sign
+            totals[1] += sign * event.risk_score
+        locations[event.location_name] = locations.get(event.location_name, 0) + sign
+    
+    if not locations:
+        return locations
+    
+    dialect = db.get_bind().dialect.name
+    if dialect not in _UPSERT_INSERTS:
+        raise ValueError(f"Rollup upserts are not supported on {dialect}")
+    upsert = _UPSERT_INSERTS[dialect]
+    
+    for table, buckets in (
+        (models.FloodEventHourlyRollup.__table__, hourly),
+        (models.FloodEventDailyRollup.__table__, daily)
+    ):
+        stmt = upsert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.bucket_start, table.c.severity],
+            set_={
+                "event_count": table.c.event_count + stmt.excluded.event_count,
+                "risk_score_sum": table.c.risk_score_sum + stmt.excluded.risk_score_sum
+            }
+        )
+        await db.execute(stmt, [
+            {"bucket_start": bucket_start, "severity": severity, "event_count": count, "risk_score_sum": score_sum}
+            for (bucket_start, severity), (count, score_sum) in buckets.items()
+        ])
+    
+    table = models.FloodLocationRollup.__table__
+    stmt = upsert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.location_name],
+        set_={"event_count": table.c.event_count + stmt.excluded.event_count}
+    )
+    await db.execute(stmt, [
+        {"location_name": name, "event_count": count} for name, count in locations.items()
+    ])
+    return locations
+
+
+async def search_locations(db: AsyncSession, query: str, limit: int = 10) -> List[Tuple[str, int]]:
+    """
+    Find distinct flood event locations matching a free-text query.
+    
+    On PostgreSQL this runs against the pg_trgm GIN index on the location
+    rollup (substring ILIKE or trigram similarity). Other databases use the
+    in-memory trigram index. Either way, names starting with the query rank
+    first, then other substring matches, then fuzzy matches by similarity,
+    with ties broken by event count.
+    
+    Args:
+        db: Database session
+        query: Search text
+        limit: Maximum number of locations to return
+    
+    Returns:
+        List of (location_name, event_count), best match first
+    """
+    query = " ".join(query.split())
+    if not query:
+        return []
+    
+    if db.get_bind().dialect.name != "postgresql":
+        await rebuild_if_stale(location_search_index, db, AsyncSessionLocal)
+        return location_search_index.search(query, limit)
+    
+    rollup = models.FloodLocationRollup
+    escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    stmt = select(rollup.location_name, rollup.event_count).where(
+        rollup.event_count > 0,
+        or_(
+            rollup.location_name.ilike(f"%{escaped}%", escape="\\"),
+            rollup.location_name.op("%")(query)  # pg_trgm similarity above threshold
+        )
+    ).order_by(
+        desc(rollup.location_name.ilike(f"{escaped}%", escape="\\")),
+        desc(rollup.location_name.ilike(f"%{escaped}%", escape="\\")),
+        desc(func.similarity(rollup.location_name, query)),
+        desc(rollup.event_count),
+        rollup.location_name
+    ).limit(limit)
+    
+    return [(row[0], row[1]) for row in (await db.execute(stmt)).all()]
+
+
+async def suggest_locations(db: AsyncSession, prefix: str, limit: int = 8) -> List[Tuple[str, int]]:
+    """
+    Complete a partially typed location name from the in-memory index.
+    
+    Args:
+        db: Database session (used only for the first load of the index)
+        prefix: Text typed so far
+        limit: Maximum number of suggestions
+    
+    Returns:
+        List of (location_name, event_count), most events first
+    """
+    await rebuild_if_stale(location_search_index, db, AsyncSessionLocal)
+    return location_search_index.complete(prefix, limit)
+
+
+async def get_latest_flood_event_at(db: AsyncSession, location_name: str) -> Optional[Row]:
+    """
+    Get the newest flood event recorded under an exact location name.
+    
+    Returns:
+        Row with FLOOD_EVENT_SUMMARY_COLUMNS, or None
+    """
+    query = select(*FLOOD_EVENT_SUMMARY_COLUMNS).where(
+        models.FloodEvent.location_name == location_name
+    ).order_by(desc(models.FloodEvent.timestamp), desc(models.FloodEvent.id)).limit(1)
+    return (await db.execute(query)).first()
+
+
+async def get_flood_events_by_location(
+    db: AsyncSession,
     latitude: float,
     longitude: float,
-    radius_km: float = 5.0
-) -> List[models.FloodEvent]:
+    radius_km: float = 5.0,
+    limit: int = 100
+) -> List[Row]:
     """
-    Get flood events near a specific location (simplified version).
-    For production, use PostGIS for proper geographic queries.
+    Get flood events within a radius of a location, nearest first.
+    
+    Candidates are found through the indexed geohash column: the circle is
+    covered by a few geohash cells and each cell becomes a B-tree range
+    scan, narrowed by the circle's latitude/longitude bounding box.
+    Candidates are then filtered and ordered by haversine distance.
+    
+    Selects only FLOOD_EVENT_SUMMARY_COLUMNS, so rows are returned without
+    ORM hydration (attribute access like `row.latitude`).
     
     Args:
         db: Database session
         latitude: Center latitude
         longitude: Center longitude
         radius_km: Radius in kilometers
+        limit: Maximum number of events to return
     
     Returns:
-        List of FloodEvent model instances
+        List of rows ordered by distance
     """
-    # Simplified bounding box calculation (not accurate for large areas)
-    # For production, use PostGIS ST_Distance_Sphere or similar
-    lat_delta = radius_km / 111.0  # Approximate km per degree latitude
-    lon_delta = radius_km / (111.0 * abs(float(latitude)))  # Adjust for latitude
+    event = models.FloodEvent
+    # "~" sorts after every geohash character, so [prefix, prefix~) is the cell
+    cell_ranges = [
+        and_(event.geohash >= prefix, event.geohash < prefix + "~")
+        for prefix in geohash_cover(latitude, longitude, radius_km)
+    ]
+    south, west, north, east = bounding_box(latitude, longitude, radius_km)
+    query = select(*FLOOD_EVENT_SUMMARY_COLUMNS).where(
+        or_(*cell_ranges), event.latitude.between(south, north)
+    )
+    # The box may extend past +/-180 degrees near the antimeridian
+    if east - west < 360.0:
+        if west < -180.0:
+            query = query.where(or_(event.longitude >= west + 360.0, event.longitude <= east))
+        elif east > 180.0:
+            query = query.where(or_(event.longitude >= west, event.longitude <= east - 360.0))
+        else:
+            query = query.where(event.longitude.between(west, east))
+    
+    in_radius = []
+    for row in (await db.execute(query)).all():
+        distance = haversine_km(latitude, longitude, row.latitude, row.longitude)
+        if distance <= radius_km:
+            in_radius.append((distance, row))
     
-    return db.query(models.FloodEvent).filter(
-        models.FloodEvent.latitude.between(latitude - lat_delta, latitude + lat_delta),
-        models.FloodEvent.longitude.between(longitude - lon_delta, longitude + lon_delta)
-    ).order_by(desc(models.FloodEvent.timestamp)).all()
+    in_radius.sort(key=lambda item: item[0])
+    return [row for _, row in in_radius[:limit]]
 
 
-def delete_flood_event(db: Session, flood_id: int) -> bool:
+async def delete_flood_event(db: AsyncSession, flood_id: int) -> bool:
     """
     Delete a flood event by ID.
     
@@ -136,27 +705,37 @@ def delete_flood_event(db: Session, flood_id: int) -> bool:
     Returns:
         True if deleted, False if not found
     """
-    flood_event = get_flood_event(db, flood_id)
+    flood_event = await get_flood_event(db, flood_id)
     if flood_event:
-        db.delete(flood_event)
-        db.commit()
+        deleted_at = datetime.utcnow()
+        version = await _advance_data_version(db, deleted_at)
+        db.add(models.FloodEventTombstone(flood_event_id=flood_id, version=version, deleted_at=deleted_at))
+        await db.delete(flood_event)
+        locations = await _apply_rollups(db, [flood_event], sign=-1)
+        await db.commit()
+        location_search_index.apply_counts(locations)
+        heatmap_store.remove([flood_id])
+        cluster_index.remove([flood_id])
+        alert_hub.publish_deleted([flood_id])
         return True
     return False
 
 
 # User CRUD Operations (Optional, for authentication)
 
-def get_user_by_username(db: Session, username: str) -> Optional[models.User]:
+async def get_user_by_username(db: AsyncSession, username: str) -> Optional[models.User]:
     """Get user by username."""
-    return db.query(models.User).filter(models.User.username == username).first()
+    result = await db.execute(select(models.User).where(models.User.username == username))
+    return result.scalars().first()
 
 
-def get_user_by_email(db: Session, email: str) -> Optional[models.User]:
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[models.User]:
     """Get user by email."""
-    return db.query(models.User).filter(models.User.email == email).first()
+    result = await db.execute(select(models.User).where(models.User.email == email))
+    return result.scalars().first()
 
 
-def create_user(db: Session, user: schemas.UserCreate, hashed_password: str) -> models.User:
+async def create_user(db: AsyncSession, user: schemas.UserCreate, hashed_password: str) -> models.User:
     """
     Create a new user account.
     
@@ -176,20 +755,21 @@ def create_user(db: Session, user: schemas.UserCreate, hashed_password: str) ->
         is_admin=0
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
 
-def get_users(db: Session, skip: int = 0, limit: int = 100) -> List[models.User]:
+async def get_users(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[models.User]:
     """Get list of users."""
-    return db.query(models.User).offset(skip).limit(limit).all()
+    result = await db.execute(select(models.User).offset(skip).limit(limit))
+    return list(result.scalars())
 
 
 # Alert Subscription CRUD Operations
 
-def create_subscription(
-    db: Session,
+async def create_subscription(
+    db: AsyncSession,
     subscription: schemas.AlertSubscriptionCreate
 ) -> models.AlertSubscription:
     """
@@ -212,42 +792,46 @@ def create_subscription(
         is_active=1
     )
     db.add(db_subscription)
-    db.commit()
-    db.refresh(db_subscription)
+    await db.commit()
+    await db.refresh(db_subscription)
+    subscription_index.upsert(db_subscription)
     return db_subscription
 
 
-def get_subscription(db: Session, subscription_id: int) -> Optional[models.AlertSubscription]:
+async def get_subscription(db: AsyncSession, subscription_id: int) -> Optional[models.AlertSubscription]:
     """Get subscription by ID."""
-    return db.query(models.AlertSubscription).filter(
-        models.AlertSubscription.id == subscription_id
-    ).first()
+    return await db.get(models.AlertSubscription, subscription_id)
 
 
-def get_subscriptions(
-    db: Session,
+async def get_subscriptions(
+    db: AsyncSession,
     skip: int = 0,
     limit: int = 100,
     active_only: bool = True
 ) -> List[models.AlertSubscription]:
     """Get list of subscriptions."""
-    query = db.query(models.AlertSubscription)
+    query = select(models.AlertSubscription)
     
     if active_only:
-        query = query.filter(models.AlertSubscription.is_active == 1)
+        query = query.where(models.AlertSubscription.is_active == 1)
     
-    return query.offset(skip).limit(limit).all()
+    result = await db.execute(query.offset(skip).limit(limit))
+    return list(result.scalars())
 
 
-def get_subscriptions_near_location(
-    db: Session,
+async def get_subscriptions_near_location(
+    db: AsyncSession,
     latitude: float,
     longitude: float,
     min_severity: str = "Low"
-) -> List[models.AlertSubscription]:
+) -> List[IndexedSubscription]:
     """
     Get subscriptions that should be notified for a location.
     
+    Matches against the in-memory subscription index using haversine
+    distance; a stale index is refreshed from the database in the
+    background, so the write request never waits for a reload.
+    
     Args:
         db: Database session
         latitude: Event latitude
@@ -255,39 +839,50 @@ def get_subscriptions_near_location(
         min_severity: Event severity level
     
     Returns:
-        List of subscriptions within radius
-    """
-    # Severity order: Low < Medium < High < Critical
-    severity_order = {"Low": 0, "Medium": 1, "High": 2, "Critical": 3}
-    event_severity_level = severity_order.get(min_severity, 0)
-    
-    subscriptions = db.query(models.AlertSubscription).filter(
-        models.AlertSubscription.is_active == 1
-    ).all()
-    
-    # Filter subscriptions within radius and matching severity
-    matching_subs = []
-    for sub in subscriptions:
-        # Calculate approximate distance (simplified)
-        lat_diff = abs(sub.latitude - latitude)
-        lon_diff = abs(sub.longitude - longitude)
-        approx_dist_km = ((lat_diff ** 2 + lon_diff ** 2) ** 0.5) * 111  # Rough km conversion
-        
-        sub_severity_level = severity_order.get(sub.min_severity, 0)
-        
-        if approx_dist_km <= sub.radius_km and event_severity_level >= sub_severity_level:
-            matching_subs.append(sub)
-    
-    return matching_subs
-
-
-def update_subscription(
-    db: Session,
+        List of subscriptions within radius, nearest first
+    """
+    await rebuild_if_stale(subscription_index, db, AsyncSessionLocal)
+    
+    return subscription_index.match(latitude, longitude, min_severity)
+
+
+async def get_subscriptions_for_events(
+    db: AsyncSession,
+    flood_events: Sequence[models.FloodEvent]
+) -> List[Tuple[models.FloodEvent, List[IndexedSubscription]]]:
+    """
+    Match subscriptions for a batch of events in one pass over the index.
+    
+    Each subscription is assigned to the highest-risk event it matches, so
+    a subscriber is notified at most once per batch.
+    
+    Args:
+        db: Database session
+        flood_events: Events to match
+    
+    Returns:
+        List of (event, subscriptions) pairs for events with subscribers
+    """
+    await rebuild_if_stale(subscription_index, db, AsyncSessionLocal)
+    
+    assigned: Dict[int, models.FloodEvent] = {}
+    matches: Dict[int, List[IndexedSubscription]] = {}
+    for event in sorted(flood_events, key=lambda e: e.risk_score, reverse=True):
+        for sub in subscription_index.match(event.latitude, event.longitude, event.severity):
+            if sub.id not in assigned:
+                assigned[sub.id] = event
+                matches.setdefault(event.id, []).append(sub)
+    
+    return [(event, matches[event.id]) for event in flood_events if event.id in matches]
+
+
+async def update_subscription(
+    db: AsyncSession,
     subscription_id: int,
     subscription_update: schemas.AlertSubscriptionUpdate
 ) -> Optional[models.AlertSubscription]:
     """Update subscription."""
-    db_subscription = get_subscription(db, subscription_id)
+    db_subscription = await get_subscription(db, subscription_id)
     if not db_subscription:
         return None
     
@@ -295,16 +890,18 @@ def update_subscription(
     for field, value in update_data.items():
         setattr(db_subscription, field, value)
     
-    db.commit()
-    db.refresh(db_subscription)
+    await db.commit()
+    await db.refresh(db_subscription)
+    subscription_index.upsert(db_subscription)
     return db_subscription
 
 
-def delete_subscription(db: Session, subscription_id: int) -> bool:
+async def delete_subscription(db: AsyncSession, subscription_id: int) -> bool:
     """Delete subscription."""
-    subscription = get_subscription(db, subscription_id)
+    subscription = await get_subscription(db, subscription_id)
     if subscription:
-        db.delete(subscription)
-        db.commit()
+        await db.delete(subscription)
+        await db.commit()
+        subscription_index.remove(subscription_id)
         return True
     return False
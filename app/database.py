@@ -1,12 +1,57 @@
 """
 Database configuration and session management.
-Sets up SQLAlchemy engine, session, and base class for models.
+Sets up SQLAlchemy engines, sessions, and base class for models.
+
+Request handlers use the async engine (asyncpg / aiosqlite) so queries never
+block the event loop. The sync engine is kept for table creation, migrations
+and background work that runs in a thread.
+
+Read-only GET endpoints can be served from read replicas (get_read_db);
+writes always go to the primary (get_db).
 """
 
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from typing import Dict, List
 from .config import settings
+from .services.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+# Async drivers for each sync database backend
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def get_async_database_url(database_url: str) -> str:
+    """
+    Convert a sync database URL to the matching async driver URL.
+    
+    asyncpg does not understand libpq's `sslmode` query parameter, so it
+    is passed on as `ssl` instead.
+    
+    Args:
+        database_url: SQLAlchemy URL (e.g. postgresql://..., sqlite:///...)
+    
+    Returns:
+        URL string using an async driver
+    """
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend in ASYNC_DRIVERS:
+        url = url.set(drivername=ASYNC_DRIVERS[backend])
+    
+    if backend == "postgresql" and "sslmode" in url.query:
+        query = dict(url.query)
+        query["ssl"] = query.pop("sslmode")
+        url = url.set(query=query)
+    
+    return url.render_as_string(hide_password=False)
+
 
 # Create database engine
 engine = create_engine(
@@ -18,25 +63,127 @@ engine = create_engine(
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine and session factory for request handlers
+async_engine = create_async_engine(
+    get_async_database_url(settings.DATABASE_URL),
+    pool_pre_ping=True,
+    echo=settings.DEBUG,
+)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    autoflush=False,
+    expire_on_commit=False,  # Objects stay readable after commit without lazy loads
+)
+
+
+class ReadReplica:
+    """Async engine and session factory for one read replica, guarded by a circuit breaker."""
+    
+    def __init__(self, index: int, database_url: str):
+        self.name = f"replica-{index}"
+        self.engine = create_async_engine(
+            get_async_database_url(database_url),
+            pool_pre_ping=True,
+            echo=settings.DEBUG,
+        )
+        self.session_factory = async_sessionmaker(
+            self.engine,
+            autoflush=False,
+            expire_on_commit=False,
+        )
+        self.breaker = CircuitBreaker(
+            f"Database {self.name}",
+            failure_rate_threshold=settings.REPLICA_FAILURE_RATE_THRESHOLD,
+            min_calls=1,  # One failed connect is enough to stop routing reads there
+            open_seconds=settings.REPLICA_OPEN_SECONDS
+        )
+
+
+class ReadReplicaPool:
+    """
+    Round-robin selection over read replicas.
+    
+    A replica whose connection attempt fails has its circuit opened and is
+    skipped until the cool-down ends; a single probe request then decides
+    whether it rejoins the rotation.
+    """
+    
+    def __init__(self, database_urls: List[str]):
+        self.replicas = [ReadReplica(i, url) for i, url in enumerate(database_urls)]
+        self._next = 0
+    
+    def rotation(self) -> List[ReadReplica]:
+        """Return the replicas in the order the next request should try them."""
+        if not self.replicas:
+            return []
+        start = self._next % len(self.replicas)
+        self._next += 1
+        return self.replicas[start:] + self.replicas[:start]
+    
+    def status(self) -> Dict[str, str]:
+        """Return the circuit state of each replica."""
+        return {replica.name: replica.breaker.state for replica in self.replicas}
+    
+    async def dispose(self) -> None:
+        """Close all replica connection pools."""
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+
+read_replicas = ReadReplicaPool(settings.replica_urls)
+
+
+def is_replica_session(db: AsyncSession) -> bool:
+    """True if a session reads from a read replica rather than the primary."""
+    return db.bind is not async_engine
+
 # Base class for ORM models
 Base = declarative_base()
 
 
-def get_db():
+async def get_db():
     """
-    Dependency function to get database session.
+    Dependency function to get an async database session.
     Yields a database session and ensures it's closed after use.
     
     Usage in FastAPI routes:
         @app.get("/endpoint")
-        def endpoint(db: Session = Depends(get_db)):
+        async def endpoint(db: AsyncSession = Depends(get_db)):
             ...
     """
-    db = SessionLocal()
-    try:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_read_db():
+    """
+    Dependency function to get an async session for read-only endpoints.
+    
+    Uses the next healthy read replica, or the primary when no replicas are
+    configured or none can be reached. Replicas may lag the primary slightly,
+    so endpoints that must read their own writes should use get_db instead.
+    """
+    for replica in read_replicas.rotation():
+        db = replica.session_factory()
+        try:
+            # Check out a connection up front so an unreachable replica falls back
+            await replica.breaker.call(db.connection)
+        except (CircuitOpenError, DBAPIError, OSError):
+            await db.close()
+            continue
+        
+        try:
+            yield db
+        except DBAPIError as e:
+            if e.connection_invalidated:
+                replica.breaker.record_failure()
+            raise
+        finally:
+            await db.close()
+        return
+    
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
 def init_db():
@@ -3,7 +3,7 @@ SQLAlchemy ORM models for the Flood Forecaster application.
 Defines the database schema for flood events and future user management.
 """
 
-from sqlalchemy import Column, Integer, String, Float, DateTime, Enum as SQLEnum
+from sqlalchemy import BigInteger, Column, Integer, String, Float, DateTime, Index, Enum as SQLEnum
 from sqlalchemy.sql import func
 from datetime import datetime
 import enum
@@ -33,6 +33,8 @@ class FloodEvent(Base):
         rainfall_mm: Rainfall amount in millimeters
         elevation_m: Elevation above sea level in meters
         description: Optional additional details
+        geohash: Geohash of the location, indexed for radius queries
+        version: Data version of the write that created the event (delta sync)
     """
     __tablename__ = "flood_events"
     
@@ -49,10 +51,113 @@ class FloodEvent(Base):
     elevation_m = Column(Float, nullable=True)  # Elevation in meters
     description = Column(String, nullable=True)
     
+    # Spatial index: B-tree over geohash, queried with prefix ranges
+    geohash = Column(String(12), nullable=True, index=True)
+    
+    # Delta sync: events added after a client's version are version > since
+    version = Column(BigInteger, nullable=False, default=0, server_default="0", index=True)
+    
+    # Keyset pagination: newest-first listings seek on (timestamp, id)
+    __table_args__ = (
+        Index("ix_flood_events_timestamp_id", "timestamp", "id"),
+        Index("ix_flood_events_severity_timestamp_id", "severity", "timestamp", "id"),
+    )
+    
     def __repr__(self):
         return f"<FloodEvent(id={self.id}, location='{self.location_name}', severity={self.severity}, score={self.risk_score})>"
 
 
+class FloodEventHourlyRollup(Base):
+    """
+    Flood event counts per hour and severity, maintained on every write.
+    
+    Attributes:
+        bucket_start: Start of the hour (UTC)
+        severity: Severity level value (Low, Medium, High, Critical)
+        event_count: Number of events in the bucket
+        risk_score_sum: Sum of the events' risk scores
+    """
+    __tablename__ = "flood_event_hourly_rollups"
+    
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)
+    severity = Column(String(10), primary_key=True)
+    event_count = Column(Integer, nullable=False, default=0)
+    risk_score_sum = Column(Float, nullable=False, default=0.0)
+
+
+class FloodEventDailyRollup(Base):
+    """
+    Flood event counts per day and severity, maintained on every write.
+    
+    Attributes:
+        bucket_start: Start of the day (UTC)
+        severity: Severity level value (Low, Medium, High, Critical)
+        event_count: Number of events in the bucket
+        risk_score_sum: Sum of the events' risk scores
+    """
+    __tablename__ = "flood_event_daily_rollups"
+    
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)
+    severity = Column(String(10), primary_key=True)
+    event_count = Column(Integer, nullable=False, default=0)
+    risk_score_sum = Column(Float, nullable=False, default=0.0)
+
+
+class FloodLocationRollup(Base):
+    """
+    All-time flood event count per location, maintained on every write.
+    
+    Attributes:
+        location_name: Location name as stored on the events
+        event_count: Number of events at the location
+    """
+    __tablename__ = "flood_location_rollups"
+    
+    location_name = Column(String, primary_key=True)
+    event_count = Column(Integer, nullable=False, default=0, index=True)
+
+
+class DataVersion(Base):
+    """
+    Monotonic change counter of a data set, advanced on every write.
+    
+    Writers increment the row inside their transaction, which holds its
+    row lock until commit, so versions become visible in increasing order.
+    
+    Attributes:
+        name: Data set name (e.g. "flood_events")
+        version: Version of the last committed write
+        updated_at: When the last write happened (UTC)
+    """
+    __tablename__ = "data_versions"
+    
+    name = Column(String(32), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), nullable=True)
+
+
+# DataVersion row advanced by every flood event write
+FLOOD_EVENTS_DATA_SET = "flood_events"
+
+
+class FloodEventTombstone(Base):
+    """
+    A deleted flood event, kept so delta syncs can report the removal.
+    
+    Attributes:
+        id: Primary key
+        flood_event_id: ID of the deleted event
+        version: Data version of the delete
+        deleted_at: When the event was deleted (UTC)
+    """
+    __tablename__ = "flood_event_tombstones"
+    
+    id = Column(Integer, primary_key=True)
+    flood_event_id = Column(Integer, nullable=False)
+    version = Column(BigInteger, nullable=False, index=True)
+    deleted_at = Column(DateTime(timezone=True), nullable=False)
+
+
 # Future: User model for authentication
 class User(Base):
     """
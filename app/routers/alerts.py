@@ -3,12 +3,13 @@ Alerts API router.
 Provides endpoints for alert management and active alerts.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime, timedelta
 from .. import crud, schemas
-from ..database import get_db
+from ..database import get_read_db, is_replica_session
+from ..utils.sync import check_since, delta_payload, versioned_response
 
 router = APIRouter(
     prefix="/alerts",
@@ -18,9 +19,11 @@ router = APIRouter(
 
 @router.get("/active")
 async def get_active_alerts(
+    request: Request,
     severity: Optional[str] = Query(None, description="Filter by severity"),
     limit: int = Query(50, ge=1, le=100),
-    db: Session = Depends(get_db)
+    since: Optional[int] = Query(None, ge=0, description="Data version held by the client; returns only changes"),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get active flood alerts.
@@ -29,51 +32,70 @@ async def get_active_alerts(
     **Query Parameters:**
     - severity: Filter by severity level (optional)
     - limit: Maximum number of alerts (default: 50)
+    - since: Data version from `/map/last-update` or X-Data-Version (optional)
     
     **Returns:**
-    List of active alerts with location and risk information.
+    List of active alerts with location and risk information, with an ETag
+    (a matching If-None-Match returns 304). With `since`: the alerts added
+    and the IDs removed after that version, and `expired_before`; keep the
+    `limit` highest-risk alerts not older than it.
     """
-    # Get recent flood events (last 48 hours)
-    cutoff_time = datetime.now() - timedelta(hours=48)
-    
-    # Get all recent events
-    all_events = crud.get_flood_events(db, skip=0, limit=500, severity=severity)
+    # Get recent flood events (last 48 hours); timestamps are stored in UTC
+    now = datetime.utcnow()
+    cutoff_time = now - timedelta(hours=48)
+    version, _ = await crud.get_data_version(db)
+    if since is not None:
+        lagging = check_since(since, version, is_replica_session(db))
+        if lagging is not None:
+            return lagging
+    
+    # Highest-risk recent events, projected to the columns shown below
+    recent_events = await crud.get_flood_event_summaries(
+        db,
+        limit=limit + 1 if since is not None else limit,
+        since=cutoff_time,
+        severities=[severity] if severity else None,
+        order_by_risk=True,
+        since_version=since
+    )
     
-    # Filter for recent events
     active_alerts = []
-    for event in all_events:
-        if event.timestamp >= cutoff_time:
-            # Calculate estimated time window
-            time_ago = datetime.now() - event.timestamp
-            hours_ago = int(time_ago.total_seconds() / 3600)
-            
-            # Forecast window (estimated time until peak flooding)
-            forecast_hours = max(1, 8 - hours_ago)
-            
-            active_alerts.append({
-                "id": event.id,
-                "location": event.location_name,
-                "risk": event.severity,
-                "risk_score": event.risk_score,
-                "latitude": event.latitude,
-                "longitude": event.longitude,
-                "time": f"{forecast_hours} hours" if forecast_hours > 1 else f"{forecast_hours * 60} minutes",
-                "rainfall_mm": event.rainfall_mm,
-                "elevation_m": event.elevation_m,
-                "description": event.description or f"{event.severity} risk flooding expected",
-                "timestamp": event.timestamp.isoformat() if event.timestamp else None
-            })
-    
-    # Sort by risk score (highest first)
-    active_alerts.sort(key=lambda x: x["risk_score"], reverse=True)
-    
-    return active_alerts[:limit]
+    for event in recent_events:
+        # Calculate estimated time window
+        time_ago = now - event.timestamp
+        hours_ago = int(time_ago.total_seconds() / 3600)
+        
+        # Forecast window (estimated time until peak flooding)
+        forecast_hours = max(1, 8 - hours_ago)
+        
+        active_alerts.append({
+            "id": event.id,
+            "location": event.location_name,
+            "risk": event.severity,
+            "risk_score": event.risk_score,
+            "latitude": event.latitude,
+            "longitude": event.longitude,
+            "time": f"{forecast_hours} hours" if forecast_hours > 1 else f"{forecast_hours * 60} minutes",
+            "rainfall_mm": event.rainfall_mm,
+            "elevation_m": event.elevation_m,
+            "description": event.description or f"{event.severity} risk flooding expected",
+            "timestamp": event.timestamp.isoformat() if event.timestamp else None
+        })
+    
+    if since is not None:
+        removed = await crud.get_deleted_flood_event_ids(db, since)
+        return delta_payload(
+            version, since, active_alerts[:limit], removed,
+            truncated=len(active_alerts) > limit, expired_before=cutoff_time
+        )
+    
+    return versioned_response(request, active_alerts, version, [event.id for event in recent_events])
 
 
 @router.get("/history")
 async def get_alert_history(
     days: int = Query(7, ge=1, le=30, description="Number of days of history"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get historical alerts for analysis and reporting.
@@ -84,30 +106,18 @@ async def get_alert_history(
     **Returns:**
     Historical alert data with statistics.
     """
-    cutoff_time = datetime.now() - timedelta(days=days)
-    
-    all_events = crud.get_flood_events(db, skip=0, limit=1000)
-    historical_events = [
-        event for event in all_events
-        if event.timestamp >= cutoff_time
-    ]
-    
-    # Calculate statistics
-    total_alerts = len(historical_events)
-    severity_counts = {
-        "Critical": sum(1 for e in historical_events if e.severity == "Critical"),
-        "High": sum(1 for e in historical_events if e.severity == "High"),
-        "Medium": sum(1 for e in historical_events if e.severity == "Medium"),
-        "Low": sum(1 for e in historical_events if e.severity == "Low")
-    }
+    # Event timestamps are stored in UTC
+    cutoff_time = datetime.utcnow() - timedelta(days=days)
     
-    avg_risk_score = sum(e.risk_score for e in historical_events) / total_alerts if total_alerts > 0 else 0
+    # Severity breakdown and average are aggregated in SQL over the whole period
+    stats = await crud.get_flood_event_statistics(db, since=cutoff_time)
+    recent_events = await crud.get_flood_events(db, limit=50, since=cutoff_time)
     
     return {
         "period_days": days,
-        "total_alerts": total_alerts,
-        "severity_breakdown": severity_counts,
-        "average_risk_score": round(avg_risk_score, 2),
+        "total_alerts": stats["total"],
+        "severity_breakdown": stats["severity_counts"],
+        "average_risk_score": round(stats["average_risk_score"], 2),
         "alerts": [
             {
                 "id": event.id,
@@ -116,14 +126,14 @@ async def get_alert_history(
                 "risk_score": event.risk_score,
                 "timestamp": event.timestamp.isoformat() if event.timestamp else None
             }
-            for event in historical_events[:50]  # Limit to 50 most recent
+            for event in recent_events  # 50 most recent
         ]
     }
 
 
 @router.get("/statistics")
 async def get_alert_statistics(
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get overall alert system statistics.
@@ -131,39 +141,18 @@ async def get_alert_statistics(
     **Returns:**
     System-wide statistics for dashboard display.
     """
-    # Get all flood events
-    all_events = crud.get_flood_events(db, skip=0, limit=10000)
-    
-    # Calculate various statistics
-    total_events = len(all_events)
-    
-    # Recent activity (last 24 hours)
-    cutoff_24h = datetime.now() - timedelta(hours=24)
-    recent_events = [e for e in all_events if e.timestamp >= cutoff_24h]
-    
-    # Severity distribution
-    severity_distribution = {
-        "Critical": sum(1 for e in all_events if e.severity == "Critical"),
-        "High": sum(1 for e in all_events if e.severity == "High"),
-        "Medium": sum(1 for e in all_events if e.severity == "Medium"),
-        "Low": sum(1 for e in all_events if e.severity == "Low")
-    }
-    
-    # Average risk score
-    avg_risk = sum(e.risk_score for e in all_events) / total_events if total_events > 0 else 0
-    
-    # Most affected locations
-    location_counts = {}
-    for event in all_events:
-        location_counts[event.location_name] = location_counts.get(event.location_name, 0) + 1
+    # Recent activity (last 24 hours); event timestamps are stored in UTC
+    cutoff_24h = datetime.utcnow() - timedelta(hours=24)
     
-    top_locations = sorted(location_counts.items(), key=lambda x: x[1], reverse=True)[:5]
+    # Counts, averages and top locations are aggregated in SQL
+    stats = await crud.get_flood_event_statistics(db, recent_since=cutoff_24h)
+    top_locations = await crud.get_top_flood_locations(db, limit=5)
     
     return {
-        "total_events": total_events,
-        "events_last_24h": len(recent_events),
-        "average_risk_score": round(avg_risk, 2),
-        "severity_distribution": severity_distribution,
+        "total_events": stats["total"],
+        "events_last_24h": stats["recent"],
+        "average_risk_score": round(stats["average_risk_score"], 2),
+        "severity_distribution": stats["severity_counts"],
         "most_affected_locations": [
             {"location": loc, "count": count}
             for loc, count in top_locations
@@ -178,7 +167,7 @@ async def get_nearby_alerts(
     latitude: float = Query(..., description="User latitude"),
     longitude: float = Query(..., description="User longitude"),
     radius_km: float = Query(10.0, ge=0.1, le=50, description="Search radius in km"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get active alerts near a specific location.
@@ -193,20 +182,21 @@ async def get_nearby_alerts(
     Nearby active alerts within the specified radius.
     """
     # Get nearby flood events
-    nearby_events = crud.get_flood_events_by_location(
+    nearby_events = await crud.get_flood_events_by_location(
         db=db,
         latitude=latitude,
         longitude=longitude,
         radius_km=radius_km
     )
     
-    # Filter for recent events (last 48 hours)
-    cutoff_time = datetime.now() - timedelta(hours=48)
+    # Filter for recent events (last 48 hours); timestamps are stored in UTC
+    now = datetime.utcnow()
+    cutoff_time = now - timedelta(hours=48)
     
     nearby_alerts = []
     for event in nearby_events:
         if event.timestamp >= cutoff_time and event.severity in ["High", "Critical"]:
-            time_ago = datetime.now() - event.timestamp
+            time_ago = now - event.timestamp
             hours_ago = int(time_ago.total_seconds() / 3600)
             forecast_hours = max(1, 8 - hours_ago)
             
@@ -5,7 +5,7 @@ Provides endpoints for user registration, login, and JWT token management.
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 from .. import crud, schemas
 from ..database import get_db
@@ -28,7 +28,7 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Dependency to get the current authenticated user from JWT token.
@@ -53,7 +53,7 @@ async def get_current_user(
     if username is None:
         raise credentials_exception
     
-    user = crud.get_user_by_username(db, username=username)
+    user = await crud.get_user_by_username(db, username=username)
     if user is None:
         raise credentials_exception
     
@@ -63,7 +63,7 @@ async def get_current_user(
 @router.post("/register", response_model=schemas.UserResponse, status_code=201)
 async def register_user(
     user: schemas.UserCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Register a new user account.
@@ -84,7 +84,7 @@ async def register_user(
     - 400: Email or username already registered
     """
     # Check if email already exists
-    db_user = crud.get_user_by_email(db, email=user.email)
+    db_user = await crud.get_user_by_email(db, email=user.email)
     if db_user:
         raise HTTPException(
             status_code=400,
@@ -92,7 +92,7 @@ async def register_user(
         )
     
     # Check if username already exists
-    db_user = crud.get_user_by_username(db, username=user.username)
+    db_user = await crud.get_user_by_username(db, username=user.username)
     if db_user:
         raise HTTPException(
             status_code=400,
@@ -101,7 +101,7 @@ async def register_user(
     
     # Hash password and create user
     hashed_password = get_password_hash(user.password)
-    created_user = crud.create_user(db, user=user, hashed_password=hashed_password)
+    created_user = await crud.create_user(db, user=user, hashed_password=hashed_password)
     
     return created_user
 
@@ -109,7 +109,7 @@ async def register_user(
 @router.post("/login", response_model=schemas.Token)
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Login with username and password to get JWT token.
@@ -136,7 +136,7 @@ async def login(
     - 401: Invalid username or password
     """
     # Authenticate user
-    user = crud.get_user_by_username(db, username=form_data.username)
+    user = await crud.get_user_by_username(db, username=form_data.username)
     if not user or not verify_password(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -187,7 +187,7 @@ async def list_users(
     skip: int = 0,
     limit: int = 100,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     List all users (admin only feature - can be extended).
@@ -201,5 +201,5 @@ async def list_users(
     
     **Note:** In production, restrict this to admin users only.
     """
-    users = crud.get_users(db, skip=skip, limit=limit)
+    users = await crud.get_users(db, skip=skip, limit=limit)
     return users
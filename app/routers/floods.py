@@ -3,34 +3,50 @@ Flood events API router.
 Provides endpoints for creating and retrieving flood predictions.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from pydantic import TypeAdapter, ValidationError
+from pydantic_core import from_json
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from .. import crud, schemas
-from ..database import get_db
+from ..config import settings
+from ..database import get_db, get_read_db
 from ..services.flood_risk import flood_risk_service
 from ..services.notification import notification_service
+from ..utils.pagination import decode_cursor, encode_cursor
 
 router = APIRouter(
     prefix="/floods",
     tags=["floods"]
 )
 
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+_flood_event_list = TypeAdapter(List[schemas.FloodEventCreate])
+
 
 @router.get("/", response_model=List[schemas.FloodEventResponse])
 async def get_flood_events(
+    response: Response,
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(100, ge=1, le=500, description="Maximum number of records to return"),
     severity: Optional[str] = Query(None, description="Filter by severity (Low, Medium, High, Critical)"),
-    db: Session = Depends(get_db)
+    after: Optional[str] = Query(None, description="Cursor from X-Next-Cursor of the previous page"),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get a list of flood events with optional filtering.
     
     **Query Parameters:**
-    - skip: Pagination offset (default: 0)
+    - skip: Pagination offset (default: 0; ignored when `after` is given)
     - limit: Maximum results (default: 100, max: 500)
     - severity: Filter by severity level (optional)
+    - after: Opaque cursor for the next page (optional)
+    
+    **Pagination:**
+    When a full page is returned, the `X-Next-Cursor` response header holds
+    the cursor for the following page. Cursor paging stays fast at any
+    depth; offset paging is kept for backward compatibility.
     
     **Returns:**
     List of flood events ordered by most recent first.
@@ -53,14 +69,28 @@ async def get_flood_events(
     ]
     ```
     """
-    flood_events = crud.get_flood_events(db, skip=skip, limit=limit, severity=severity)
+    cursor = None
+    if after:
+        try:
+            cursor = decode_cursor(after)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+    
+    flood_events = await crud.get_flood_events(
+        db, skip=skip, limit=limit, severity=severity, after=cursor
+    )
+    
+    if len(flood_events) == limit:
+        last = flood_events[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(last.timestamp, last.id)
+    
     return flood_events
 
 
 @router.get("/{flood_id}", response_model=schemas.FloodEventResponse)
 async def get_flood_event(
     flood_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get a specific flood event by ID.
@@ -74,7 +104,7 @@ async def get_flood_event(
     **Errors:**
     - 404: Flood event not found
     """
-    flood_event = crud.get_flood_event(db, flood_id)
+    flood_event = await crud.get_flood_event(db, flood_id)
     if flood_event is None:
         raise HTTPException(status_code=404, detail="Flood event not found")
     return flood_event
@@ -83,7 +113,7 @@ async def get_flood_event(
 @router.post("/", response_model=schemas.FloodEventResponse, status_code=201)
 async def create_flood_event(
     flood_event: schemas.FloodEventCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Create a new flood event with automatic risk calculation.
@@ -135,7 +165,7 @@ async def create_flood_event(
     )
     
     # Create flood event in database
-    db_flood_event = crud.create_flood_event(
+    db_flood_event = await crud.create_flood_event(
         db=db,
         flood_event=flood_event,
         risk_score=risk_data["risk_score"],
@@ -146,7 +176,7 @@ async def create_flood_event(
     
     # Auto-send notifications if severity is High or Critical
     if risk_data["severity"] in ["High", "Critical"]:
-        subscriptions = crud.get_subscriptions_near_location(
+        subscriptions = await crud.get_subscriptions_near_location(
             db,
             latitude=flood_event.latitude,
             longitude=flood_event.longitude,
@@ -171,12 +201,170 @@ async def create_flood_event(
     return db_flood_event
 
 
+@router.post("/bulk", response_model=schemas.BulkFloodEventResponse, status_code=201)
+async def create_flood_events_bulk(
+    request: Request,
+    notify: bool = Query(True, description="Send alerts for High/Critical events"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Create many flood events in one request (sensor and partner feeds).
+    
+    **Request Body:**
+    Either a JSON array of flood events, or NDJSON (one event per line) with
+    `Content-Type: application/x-ndjson`. Each event has the same fields as
+    `POST /floods/`:
+    ```
+    {"location_name": "Gauge 12", "latitude": 19.07, "longitude": 72.87, "rainfall_mm": 41.5}
+    {"location_name": "Gauge 13", "latitude": 19.08, "longitude": 72.88}
+    ```
+    
+    **Process:**
+    1. Missing rainfall is fetched once per weather grid cell, missing
+       elevation in batched lookups
+    2. All events are scored in one vectorized pass
+    3. Rows are written with multi-row INSERT ... RETURNING
+    4. Subscriptions are matched once for the whole batch; each subscriber
+       is alerted at most once, for the highest-risk event they match
+    
+    **Query Parameters:**
+    - notify: Set to false for historical backfills (default: true)
+    
+    **Returns:**
+    Number of events created and their IDs, in input order.
+    
+    **Errors:**
+    - 413: More than BULK_INGEST_MAX_EVENTS events, or a body over
+      BULK_INGEST_MAX_EVENTS * BULK_INGEST_MAX_EVENT_BYTES bytes
+    - 422: Malformed or invalid event (NDJSON errors include the line number)
+    """
+    flood_events = await _read_bulk_events(request)
+    if not flood_events:
+        return schemas.BulkFloodEventResponse(count=0, ids=[])
+    
+    scored = await flood_risk_service.calculate_flood_risk_batch(
+        points=[(e.latitude, e.longitude) for e in flood_events],
+        rainfall_overrides=[e.rainfall_mm for e in flood_events],
+        elevation_overrides=[e.elevation_m for e in flood_events]
+    )
+    
+    severities = scored["severity"].tolist()
+    created = await crud.create_flood_events_bulk(
+        db=db,
+        flood_events=flood_events,
+        risk_scores=scored["risk_score"].tolist(),
+        severities=severities,
+        rainfall_mm=scored["rainfall_mm"].tolist(),
+        elevation_m=scored["elevation_m"].tolist()
+    )
+    
+    response = schemas.BulkFloodEventResponse(
+        count=len(created),
+        ids=[event.id for event in created]
+    )
+    
+    if notify:
+        severity_by_id = {event.id: severity for event, severity in zip(created, severities)}
+        alert_events = [e for e in created if severity_by_id[e.id] in ("High", "Critical")]
+        matched = await crud.get_subscriptions_for_events(db, alert_events) if alert_events else []
+        
+        await asyncio.gather(*[
+            notification_service.send_flood_alert(
+                location_name=event.location_name,
+                risk_level=severity_by_id[event.id],
+                risk_score=event.risk_score,
+                latitude=event.latitude,
+                longitude=event.longitude,
+                phone_numbers=[sub.phone for sub in subs if sub.phone] or None,
+                emails=[sub.email for sub in subs if sub.email] or None
+            )
+            for event, subs in matched
+        ])
+        response.notified_events = len(matched)
+        response.notified_subscriptions = sum(len(subs) for _, subs in matched)
+    
+    return response
+
+
+async def _read_bulk_events(request: Request) -> List[schemas.FloodEventCreate]:
+    """
+    Parse a JSON array or NDJSON request body into validated events.
+    
+    The body is capped at BULK_INGEST_MAX_EVENTS * BULK_INGEST_MAX_EVENT_BYTES
+    bytes (checked against Content-Length up front and while reading), and a
+    JSON array is counted before any event is validated, so an oversized
+    request is rejected without building its models.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    too_many = HTTPException(
+        status_code=413,
+        detail=f"At most {settings.BULK_INGEST_MAX_EVENTS} events per request"
+    )
+    max_bytes = settings.BULK_INGEST_MAX_EVENTS * settings.BULK_INGEST_MAX_EVENT_BYTES
+    too_large = HTTPException(status_code=413, detail=f"Request body exceeds {max_bytes} bytes")
+    
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > max_bytes:
+        raise too_large
+    
+    async def chunks():
+        received = 0
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > max_bytes:
+                raise too_large
+            yield chunk
+    
+    if content_type not in NDJSON_CONTENT_TYPES:
+        body = b"".join([chunk async for chunk in chunks()])
+        try:
+            raw = from_json(body)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=f"Invalid JSON: {e}")
+        if isinstance(raw, list) and len(raw) > settings.BULK_INGEST_MAX_EVENTS:
+            raise too_many
+        try:
+            return _flood_event_list.validate_python(raw)
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=e.errors(include_url=False))
+    
+    # NDJSON: validate line by line as the body streams in
+    events = []
+    line_number = 0
+    buffer = b""
+    async for chunk in chunks():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            _append_ndjson_event(events, line, line_number)
+            if len(events) > settings.BULK_INGEST_MAX_EVENTS:
+                raise too_many
+    _append_ndjson_event(events, buffer, line_number + 1)
+    if len(events) > settings.BULK_INGEST_MAX_EVENTS:
+        raise too_many
+    return events
+
+
+def _append_ndjson_event(events: List[schemas.FloodEventCreate], line: bytes, line_number: int) -> None:
+    if not line.strip():
+        return
+    try:
+        events.append(schemas.FloodEventCreate.model_validate_json(line))
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=422,
+            detail={"line": line_number, "errors": e.errors(include_url=False)}
+        )
+
+
 @router.get("/nearby/", response_model=List[schemas.FloodEventResponse])
 async def get_nearby_flood_events(
     latitude: float = Query(..., ge=-90, le=90, description="Center latitude"),
     longitude: float = Query(..., ge=-180, le=180, description="Center longitude"),
     radius_km: float = Query(5.0, ge=0.1, le=50, description="Search radius in kilometers"),
-    db: Session = Depends(get_db)
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of events"),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get flood events near a specific location.
@@ -185,18 +373,17 @@ async def get_nearby_flood_events(
     - latitude: Center point latitude
     - longitude: Center point longitude
     - radius_km: Search radius in kilometers (default: 5km, max: 50km)
+    - limit: Maximum number of events (default: 100, max: 1000)
     
     **Returns:**
-    List of flood events within the specified radius.
-    
-    **Note:** This uses a simplified bounding box search. For production,
-    consider using PostGIS for accurate geographic queries.
+    List of flood events within the specified radius, nearest first.
     """
-    flood_events = crud.get_flood_events_by_location(
+    flood_events = await crud.get_flood_events_by_location(
         db=db,
         latitude=latitude,
         longitude=longitude,
-        radius_km=radius_km
+        radius_km=radius_km,
+        limit=limit
     )
     return flood_events
 
@@ -234,7 +421,9 @@ async def calculate_flood_risk(
             "rainfall_contribution": "High",
             "elevation_contribution": "High risk",
             "explanation": "Risk is elevated due to heavy rainfall and low elevation."
-        }
+        },
+        "data_sources": {"rainfall": "live", "elevation": "google"},
+        "degraded_sources": []
     }
     ```
     """
@@ -252,14 +441,72 @@ async def calculate_flood_risk(
         severity=risk_data["severity"],
         rainfall_mm=risk_data["rainfall_mm"],
         elevation_m=risk_data["elevation_m"],
-        factors=risk_data["factors"]
+        factors=risk_data["factors"],
+        data_sources=risk_data["data_sources"],
+        degraded_sources=risk_data["degraded_sources"]
     )
 
 
+@router.post("/calculate-risk/batch", response_model=schemas.BatchRiskCalculationResponse)
+async def calculate_flood_risk_batch(
+    request: schemas.BatchRiskCalculationRequest
+):
+    """
+    Calculate flood risk for many locations at once without saving.
+    
+    Weather is fetched once per grid cell, elevation lookups are batched,
+    and all points are scored in a single vectorized pass. Scores match
+    the single-point endpoint exactly. Weather lookups per request are
+    capped (RISK_BATCH_MAX_WEATHER_FETCHES); points beyond the cap use
+    fallback rainfall and list "rainfall" in degraded_sources.
+    
+    **Request Body:**
+    ```json
+    {
+        "points": [
+            {"latitude": 19.0760, "longitude": 72.8777},
+            {"latitude": 19.0820, "longitude": 72.8810, "rainfall_mm": 42.0}
+        ]
+    }
+    ```
+    
+    **Returns:**
+    One result per point, in request order (max 50,000 points).
+    """
+    points = request.points
+    scored = await flood_risk_service.calculate_flood_risk_batch(
+        points=[(p.latitude, p.longitude) for p in points],
+        rainfall_overrides=[p.rainfall_mm for p in points],
+        elevation_overrides=[p.elevation_m for p in points]
+    )
+    
+    results = [
+        {
+            "latitude": point.latitude,
+            "longitude": point.longitude,
+            "risk_score": risk_score,
+            "severity": severity,
+            "rainfall_mm": rainfall,
+            "elevation_m": elevation,
+            "degraded_sources": ["rainfall"] if rainfall_degraded else []
+        }
+        for point, risk_score, severity, rainfall, elevation, rainfall_degraded in zip(
+            points,
+            scored["risk_score"].tolist(),
+            scored["severity"].tolist(),
+            scored["rainfall_mm"].tolist(),
+            scored["elevation_m"].tolist(),
+            scored["rainfall_degraded"].tolist()
+        )
+    ]
+    
+    return {"count": len(results), "results": results}
+
+
 @router.delete("/{flood_id}", response_model=schemas.MessageResponse)
 async def delete_flood_event(
     flood_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Delete a flood event by ID.
@@ -273,7 +520,7 @@ async def delete_flood_event(
     **Errors:**
     - 404: Flood event not found
     """
-    success = crud.delete_flood_event(db, flood_id)
+    success = await crud.delete_flood_event(db, flood_id)
     if not success:
         raise HTTPException(status_code=404, detail="Flood event not found")
     
@@ -3,13 +3,22 @@ Live Map API router.
 Provides endpoints for map features, location services, and real-time updates.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from datetime import datetime
+import asyncio
+import hashlib
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Tuple
+from datetime import datetime, timedelta
 from .. import crud, schemas
-from ..database import get_db
+from ..database import AsyncSessionLocal, get_db, get_read_db, is_replica_session
+from ..config import settings
+from ..services.alert_stream import alert_hub
 from ..services.flood_risk import flood_risk_service
+from ..services.heatmap import cell_degrees_for_zoom, clip_bins
+from ..utils.geo import haversine_km, parse_bbox
+from ..utils.sync import check_since, delta_payload, etag_matches, versioned_response
 from pydantic import BaseModel
 
 router = APIRouter(
@@ -33,14 +42,22 @@ class LocationSearchResponse(BaseModel):
 
 
 @router.get("/last-update")
-async def get_last_update():
+async def get_last_update(
+    db: AsyncSession = Depends(get_read_db)
+):
     """
-    Get the timestamp of the last map data update.
-    Used for displaying freshness of data on the frontend.
+    Get the flood event data version and the time of the last write.
+    
+    The version increases with every flood event write, so a client can
+    compare it with the version it holds and skip refetching when equal,
+    or pass it as `since` to fetch only the changes.
     """
+    version, updated_at = await crud.get_data_version(db)
+    changed_at = updated_at or datetime.utcnow()
     return {
-        "timestamp": datetime.now().strftime("%I:%M:%S %p"),
-        "last_updated": datetime.now().isoformat(),
+        "version": version,
+        "timestamp": changed_at.strftime("%I:%M:%S %p"),
+        "last_updated": changed_at.isoformat(),
         "status": "operational"
     }
 
@@ -48,7 +65,7 @@ async def get_last_update():
 @router.get("/search")
 async def search_location(
     location: str = Query(..., description="Location name or address to search"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Search for a location and get flood risk information.
@@ -57,29 +74,29 @@ async def search_location(
     - location: Location name or address
     
     **Returns:**
-    Location details with risk assessment and nearby flood events.
+    Location details of the best match (its latest event) with risk
+    assessment, plus the ranked list of matching locations.
     """
-    # For now, return mock geocoding results
-    # In production, integrate with Google Geocoding API or similar
-    
-    # Search for flood events with similar location names
-    flood_events = crud.get_flood_events(db, skip=0, limit=100)
-    matching_events = [
-        event for event in flood_events
-        if location.lower() in event.location_name.lower()
-    ]
+    # Ranked, deduplicated locations from the text index
+    matches = await crud.search_locations(db, location, limit=10)
     
-    if matching_events:
-        event = matching_events[0]
-        return {
-            "found": True,
-            "location_name": event.location_name,
-            "latitude": event.latitude,
-            "longitude": event.longitude,
-            "risk_score": event.risk_score,
-            "severity": event.severity,
-            "matching_events": len(matching_events)
-        }
+    if matches:
+        location_name, event_count = matches[0]
+        event = await crud.get_latest_flood_event_at(db, location_name)
+        if event is not None:
+            return {
+                "found": True,
+                "location_name": event.location_name,
+                "latitude": event.latitude,
+                "longitude": event.longitude,
+                "risk_score": event.risk_score,
+                "severity": event.severity,
+                "matching_events": event_count,
+                "matches": [
+                    {"location_name": name, "event_count": count}
+                    for name, count in matches
+                ]
+            }
     
     return {
         "found": False,
@@ -89,10 +106,31 @@ async def search_location(
     }
 
 
+@router.get("/search/suggest")
+async def suggest_locations(
+    q: str = Query(..., min_length=1, description="Partially typed location name"),
+    limit: int = Query(8, ge=1, le=20, description="Maximum number of suggestions"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Complete a partially typed location name for the search box.
+    
+    Served from the in-memory location index, so it is cheap enough to call
+    on every keystroke.
+    
+    **Returns:**
+    Matching location names with their event counts, most events first.
+    """
+    return [
+        {"location_name": name, "event_count": count}
+        for name, count in await crud.suggest_locations(db, q, limit=limit)
+    ]
+
+
 @router.post("/locate")
 async def locate_user(
     location: LocationRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Process user's current location and return flood risk info.
@@ -115,7 +153,7 @@ async def locate_user(
     )
     
     # Get nearby flood events
-    nearby_events = crud.get_flood_events_by_location(
+    nearby_events = await crud.get_flood_events_by_location(
         db=db,
         latitude=location.lat,
         longitude=location.lng,
@@ -129,6 +167,7 @@ async def locate_user(
         "severity": risk_data["severity"],
         "rainfall_mm": risk_data["rainfall_mm"],
         "elevation_m": risk_data["elevation_m"],
+        "degraded_sources": risk_data["degraded_sources"],
         "nearby_events": len(nearby_events),
         "nearest_events": [
             {
@@ -148,67 +187,285 @@ async def locate_user(
 
 @router.get("/active-alerts")
 async def get_active_map_alerts(
-    db: Session = Depends(get_db)
+    request: Request,
+    since: Optional[int] = Query(None, ge=0, description="Data version held by the client; returns only changes"),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get all active flood alerts for map display.
     Returns high and critical severity events from the last 24 hours.
+    
+    The full list carries an ETag and an X-Data-Version header; a matching
+    If-None-Match returns 304. With `since`, returns only the alerts added
+    and the IDs removed after that version, plus `expired_before`: drop
+    held alerts whose timestamp is older.
     """
-    from datetime import datetime, timedelta
+    # Recent high/critical events (timestamps are stored in UTC)
+    cutoff_time = datetime.utcnow() - timedelta(hours=24)
+    severities = ["High", "Critical"]
+    version, _ = await crud.get_data_version(db)
     
-    # Get recent high-severity events
-    all_events = crud.get_flood_events(db, skip=0, limit=500)
+    if since is not None:
+        lagging = check_since(since, version, is_replica_session(db))
+        if lagging is not None:
+            return lagging
+        added = await crud.get_flood_event_summaries(
+            db, limit=501, since=cutoff_time, severities=severities, since_version=since
+        )
+        removed = await crud.get_deleted_flood_event_ids(db, since)
+        return delta_payload(
+            version, since, [alert_to_dict(event) for event in added[:500]], removed,
+            truncated=len(added) > 500, expired_before=cutoff_time
+        )
     
-    # Filter for recent high/critical events
-    cutoff_time = datetime.now() - timedelta(hours=24)
-    active_alerts = [
-        {
-            "id": event.id,
-            "location": event.location_name,
-            "risk": event.severity,
-            "risk_score": event.risk_score,
-            "latitude": event.latitude,
-            "longitude": event.longitude,
-            "time": calculate_time_ago(event.timestamp),
-            "rainfall_mm": event.rainfall_mm,
-            "elevation_m": event.elevation_m
-        }
-        for event in all_events
-        if event.severity in ["High", "Critical"]
-        and event.timestamp >= cutoff_time
-    ]
+    recent_events = await crud.get_flood_event_summaries(
+        db, limit=500, since=cutoff_time, severities=severities
+    )
+    alerts = [alert_to_dict(event) for event in recent_events]
+    return versioned_response(request, alerts, version, [event.id for event in recent_events])
+
+
+@router.get("/stream")
+async def stream_active_alerts(
+    request: Request,
+    bbox: Optional[str] = Query(None, description="Viewport as south,west,north,east")
+):
+    """
+    Live alert push channel (server-sent events).
+    
+    Sends a `snapshot` event with the active alerts (High/Critical, last
+    24 hours) in the viewport, then a `new` or `expired` event with one
+    alert whenever an alert appears or leaves the active window. A
+    `resync` event means the viewer fell behind; reconnect to get a fresh
+    snapshot (EventSource does this on its own when the stream ends).
+    Reconnect with a new `bbox` when the map viewport changes.
+    """
+    viewport = viewport_bounds(bbox)
+    # Subscribe before reading the snapshot so no change in between is lost
+    subscriber = alert_hub.subscribe(viewport)
+    try:
+        # Short-lived session: a request-scoped one would hold a pooled
+        # connection for as long as the stream stays open
+        async with AsyncSessionLocal() as db:
+            rows = await crud.get_flood_event_summaries(
+                db, limit=500, since=alert_hub.cutoff, severities=alert_hub.severities
+            )
+    except Exception:
+        alert_hub.unsubscribe(subscriber)
+        raise
+    alert_hub.track(rows)
+    snapshot = [row for row in rows if subscriber.wants(row)]
+    sent_ids = {row.id for row in snapshot}
+    
+    async def events():
+        try:
+            yield f"retry: {settings.STREAM_RETRY_MS}\n\n"
+            yield sse_message("snapshot", [alert_to_dict(row) for row in snapshot], alert_hub.sequence)
+            while True:
+                try:
+                    change = await asyncio.wait_for(
+                        subscriber.queue.get(), timeout=settings.STREAM_KEEPALIVE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+                if change.kind == "resync":
+                    yield sse_message("resync", {}, change.sequence)
+                    break
+                if change.kind == "new" and change.alert.id in sent_ids:
+                    continue
+                yield sse_message(change.kind, alert_to_dict(change.alert), change.sequence)
+        finally:
+            alert_hub.unsubscribe(subscriber)
     
-    return active_alerts
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @router.get("/heatmap-data")
 async def get_heatmap_data(
-    db: Session = Depends(get_db)
+    request: Request,
+    zoom: Optional[int] = Query(None, ge=0, le=22, description="Map zoom level; enables server-side binning"),
+    bbox: Optional[str] = Query(None, description="Viewport as south,west,north,east (binned mode)"),
+    hours: Optional[int] = Query(None, ge=1, le=24 * 365, description="Only events from the last N hours (binned mode)"),
+    since: Optional[int] = Query(None, ge=0, description="Data version held by the client; returns only changes (points mode)"),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get data points for heatmap visualization on the map.
-    Returns all flood events with their risk scores for overlay.
+    
+    Without `zoom`, returns the newest 1000 flood events as raw points.
+    
+    With `zoom`, every event (optionally limited to the last `hours`) is
+    aggregated into grid cells that cover HEATMAP_CELL_PIXELS on screen at
+    that zoom, and only the cells inside `bbox` are returned. Each cell
+    has its centre, event count, and max and mean intensity (0-1), so the
+    payload size depends on the viewport rather than on the number of events.
+    
+    Both modes carry an ETag and the data `version`; a matching
+    If-None-Match returns 304. In points mode, `since` returns only the
+    points added and the event IDs removed after that version.
     """
-    flood_events = crud.get_flood_events(db, skip=0, limit=1000)
+    version, _ = await crud.get_data_version(db)
     
-    heatmap_points = [
+    if zoom is None:
+        if since is not None:
+            lagging = check_since(since, version, is_replica_session(db))
+            if lagging is not None:
+                return lagging
+        # One extra row tells a delta it was truncated
+        limit = 1000 if since is None else 1001
+        flood_events = await crud.get_flood_event_points(db, limit=limit, since_version=since)
+        
+        heatmap_points = [
+            {
+                "id": event.id,
+                "lat": event.latitude,
+                "lng": event.longitude,
+                "intensity": event.risk_score / 100,  # Normalize to 0-1
+                "severity": event.severity,
+                "location": event.location_name
+            }
+            for event in flood_events[:1000]
+        ]
+        
+        if since is not None:
+            removed = await crud.get_deleted_flood_event_ids(db, since)
+            return delta_payload(version, since, heatmap_points, removed, truncated=len(flood_events) > 1000)
+        
+        return versioned_response(request, {
+            "version": version,
+            "points": heatmap_points,
+            "total_points": len(heatmap_points),
+            "last_updated": datetime.now().isoformat()
+        }, version)
+    
+    if since is not None:
+        raise HTTPException(status_code=400, detail="since is only supported without zoom; binned cells use ETags")
+    
+    viewport = viewport_bounds(bbox)
+    bins = clip_bins(await crud.get_heatmap_bins(db, zoom, hours), viewport)
+    
+    cells = [
         {
-            "lat": event.latitude,
-            "lng": event.longitude,
-            "intensity": event.risk_score / 100,  # Normalize to 0-1
-            "severity": event.severity,
-            "location": event.location_name
+            "lat": round(lat, 6),
+            "lng": round(lng, 6),
+            "count": count,
+            "intensity": round(peak, 4),
+            "mean_intensity": round(mean, 4)
         }
-        for event in flood_events
+        for lat, lng, count, peak, mean in zip(
+            bins.latitude.tolist(),
+            bins.longitude.tolist(),
+            bins.count.tolist(),
+            bins.max_intensity.tolist(),
+            bins.mean_intensity.tolist()
+        )
     ]
     
-    return {
-        "points": heatmap_points,
-        "total_points": len(heatmap_points),
+    return versioned_response(request, {
+        "version": version,
+        "zoom": zoom,
+        "cell_degrees": cell_degrees_for_zoom(zoom, settings.HEATMAP_CELL_PIXELS),
+        "cells": cells,
+        "total_cells": len(cells),
+        "total_events": int(bins.count.sum()),
         "last_updated": datetime.now().isoformat()
+    }, version, cells)
+
+
+@router.get("/clusters")
+async def get_alert_clusters(
+    zoom: int = Query(..., ge=0, le=22, description="Map zoom level"),
+    bbox: Optional[str] = Query(None, description="Viewport as south,west,north,east"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Get marker clusters of active alerts (High/Critical, last 24 hours).
+    
+    One marker per cluster overlapping the viewport, with its centroid,
+    event count and highest severity. A cluster with count 1 is a single
+    event and carries its `event_id`. Use `/map/clusters/{cluster_id}` to
+    find the zoom at which a cluster splits and its child markers.
+    """
+    clusters = await crud.get_active_event_clusters(db, zoom, viewport_bounds(bbox))
+    return {
+        "zoom": zoom,
+        "clusters": [cluster_to_dict(cluster) for cluster in clusters],
+        "total_clusters": len(clusters),
+        "total_events": sum(cluster.count for cluster in clusters)
+    }
+
+
+@router.get("/clusters/{cluster_id}")
+async def expand_alert_cluster(
+    cluster_id: str,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Expand one cluster from `/map/clusters`.
+    
+    **Returns:**
+    The cluster, `expansion_zoom` (the first zoom where it splits into
+    several markers, to zoom the map to on click) and those `children`.
+    """
+    expanded = await crud.expand_event_cluster(db, cluster_id)
+    if expanded is None:
+        raise HTTPException(status_code=404, detail=f"Cluster {cluster_id} not found")
+    
+    cluster, expansion_zoom, children = expanded
+    return {
+        "cluster": cluster_to_dict(cluster),
+        "expansion_zoom": expansion_zoom,
+        "children": [cluster_to_dict(child) for child in children]
     }
 
 
+@router.get(
+    "/tiles/{z}/{x}/{y}.mvt",
+    response_class=Response,
+    responses={200: {"content": {"application/vnd.mapbox-vector-tile": {}}}}
+)
+async def get_vector_tile(
+    z: int,
+    x: int,
+    y: int,
+    request: Request,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Get a Mapbox Vector Tile (XYZ scheme) of flood events.
+    
+    **Layers:**
+    - flood_events: points with risk_score and severity; from zoom
+      MVT_EVENT_MIN_ZOOM each event is a feature (feature id = event id),
+      below it nearby events are merged into one point with a count
+    - risk_grid: heatmap cells as squares with count, intensity (max) and
+      mean_intensity
+    
+    Tiles carry an ETag and a short Cache-Control max-age, so browsers and
+    CDNs can reuse them; a matching If-None-Match returns 304.
+    """
+    if not (0 <= z <= 22 and 0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        raise HTTPException(status_code=404, detail="Tile out of range")
+    
+    tile = await crud.get_flood_event_tile(db, z, x, y)
+    etag = f'"{hashlib.sha1(tile).hexdigest()}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.MVT_HTTP_MAX_AGE_SECONDS}"
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    
+    return Response(content=tile, media_type="application/vnd.mapbox-vector-tile", headers=headers)
+
+
 @router.get("/forecast/{latitude}/{longitude}")
 async def get_location_forecast(
     latitude: float,
@@ -218,6 +475,9 @@ async def get_location_forecast(
     """
     Get hourly flood forecast for a specific location.
     
+    Uses the cached OpenWeatherMap 3-hour forecast series for the location's
+    grid cell; all hours are scored in one vectorized pass.
+    
     **Parameters:**
     - latitude: Location latitude
     - longitude: Location longitude
@@ -232,59 +492,99 @@ async def get_location_forecast(
         longitude=longitude
     )
     
-    # Generate hourly forecast (mock data for now)
-    # In production, this would use weather forecast API
-    from datetime import datetime, timedelta
+    hourly = await flood_risk_service.calculate_hourly_forecast(
+        latitude=latitude,
+        longitude=longitude,
+        hours=hours,
+        elevation_m=risk_data["elevation_m"],
+        fallback_rainfall_mm=risk_data["rainfall_mm"]
+    )
     
     forecast = []
-    base_time = datetime.now()
-    base_risk = risk_data["risk_score"]
-    
-    for i in range(hours):
-        # Simulate risk variation over time
-        time_offset = i + 1
-        risk_variation = (time_offset % 3) * 5  # Simple variation
-        hourly_risk = min(100, max(0, base_risk + risk_variation - 10))
-        
+    for i, (ts, rainfall, risk_score, severity) in enumerate(zip(
+        hourly["timestamps"].tolist(),
+        hourly["rainfall_mm"].tolist(),
+        hourly["risk_score"].tolist(),
+        hourly["severity"].tolist()
+    )):
+        hour_time = datetime.fromtimestamp(ts)
         forecast.append({
-            "hour": (base_time + timedelta(hours=time_offset)).strftime("%I %p"),
-            "timestamp": (base_time + timedelta(hours=time_offset)).isoformat(),
-            "risk_score": round(hourly_risk, 1),
-            "severity": flood_risk_service.calculate_severity(hourly_risk),
-            "rainfall_mm": risk_data["rainfall_mm"] * (0.8 + (i % 3) * 0.2),
+            "hour": hour_time.strftime("%I %p"),
+            "timestamp": hour_time.isoformat(),
+            "risk_score": risk_score,
+            "severity": severity,
+            "rainfall_mm": rainfall,
             "confidence": max(50, 95 - (i * 2))  # Confidence decreases over time
         })
     
     return {
         "latitude": latitude,
         "longitude": longitude,
-        "current_risk": base_risk,
+        "current_risk": risk_data["risk_score"],
         "current_severity": risk_data["severity"],
         "forecast": forecast,
+        "forecast_source": hourly["source"],
         "generated_at": datetime.now().isoformat()
     }
 
 
 def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """
-    Calculate approximate distance between two coordinates in km.
-    Uses simplified formula for small distances.
+    Calculate great-circle distance between two coordinates in km.
     """
-    from math import radians, cos, sqrt
-    
-    # Convert to radians
-    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-    
-    # Simplified distance calculation
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
-    
-    # Approximate distance using Pythagorean theorem
-    # (works well for small distances)
-    a = dlat ** 2 + (dlon * cos((lat1 + lat2) / 2)) ** 2
-    distance = sqrt(a) * 6371  # Earth radius in km
+    return round(haversine_km(lat1, lon1, lat2, lon2), 2)
+
+
+def viewport_bounds(bbox: Optional[str]) -> Optional[Tuple[float, float, float, float]]:
+    """
+    Parse an optional bbox query parameter.
     
-    return round(distance, 2)
+    Raises:
+        HTTPException: 400 if the bbox is malformed
+    """
+    if not bbox:
+        return None
+    try:
+        return parse_bbox(bbox)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid bbox: {e}")
+
+
+def alert_to_dict(event) -> dict:
+    """Serialize an active alert (summary row or stream alert) for the map."""
+    return {
+        "id": event.id,
+        "location": event.location_name,
+        "risk": event.severity,
+        "risk_score": event.risk_score,
+        "latitude": event.latitude,
+        "longitude": event.longitude,
+        "time": calculate_time_ago(event.timestamp),
+        "timestamp": event.timestamp.isoformat() if event.timestamp else None,
+        "rainfall_mm": event.rainfall_mm,
+        "elevation_m": event.elevation_m
+    }
+
+
+def sse_message(event: str, data, event_id: Optional[int] = None) -> str:
+    """Format one server-sent event."""
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def cluster_to_dict(cluster) -> dict:
+    """Serialize a marker cluster for the map."""
+    return {
+        "id": cluster.id,
+        "lat": round(cluster.latitude, 6),
+        "lng": round(cluster.longitude, 6),
+        "count": cluster.count,
+        "max_severity": cluster.max_severity,
+        "event_id": cluster.event_id
+    }
 
 
 def calculate_time_ago(timestamp: datetime) -> str:
@@ -296,7 +596,7 @@ def calculate_time_ago(timestamp: datetime) -> str:
     if not timestamp:
         return "Unknown"
     
-    now = datetime.now()
+    now = datetime.utcnow()  # Event timestamps are stored in UTC
     diff = now - timestamp
     
     hours = diff.total_seconds() / 3600
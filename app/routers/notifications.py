@@ -4,7 +4,7 @@ Provides endpoints for managing alert subscriptions and sending notifications.
 """
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from .. import crud, schemas
 from ..database import get_db
@@ -19,7 +19,7 @@ router = APIRouter(
 @router.post("/subscribe", response_model=schemas.AlertSubscriptionResponse, status_code=201)
 async def subscribe_to_alerts(
     subscription: schemas.AlertSubscriptionCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Subscribe to flood alerts for a specific location.
@@ -49,7 +49,7 @@ async def subscribe_to_alerts(
         )
     
     # Create subscription
-    db_subscription = crud.create_subscription(db, subscription)
+    db_subscription = await crud.create_subscription(db, subscription)
     
     # Send confirmation notification
     if subscription.email:
@@ -77,7 +77,7 @@ async def get_subscriptions(
     skip: int = 0,
     limit: int = 100,
     active_only: bool = True,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get list of alert subscriptions.
@@ -87,17 +87,17 @@ async def get_subscriptions(
     - limit: Maximum results
     - active_only: Show only active subscriptions
     """
-    subscriptions = crud.get_subscriptions(db, skip=skip, limit=limit, active_only=active_only)
+    subscriptions = await crud.get_subscriptions(db, skip=skip, limit=limit, active_only=active_only)
     return subscriptions
 
 
 @router.get("/subscriptions/{subscription_id}", response_model=schemas.AlertSubscriptionResponse)
 async def get_subscription(
     subscription_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get specific subscription by ID."""
-    subscription = crud.get_subscription(db, subscription_id)
+    subscription = await crud.get_subscription(db, subscription_id)
     if not subscription:
         raise HTTPException(status_code=404, detail="Subscription not found")
     return subscription
@@ -107,7 +107,7 @@ async def get_subscription(
 async def update_subscription(
     subscription_id: int,
     subscription_update: schemas.AlertSubscriptionUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Update subscription settings.
@@ -122,7 +122,7 @@ async def update_subscription(
     }
     ```
     """
-    updated = crud.update_subscription(db, subscription_id, subscription_update)
+    updated = await crud.update_subscription(db, subscription_id, subscription_update)
     if not updated:
         raise HTTPException(status_code=404, detail="Subscription not found")
     return updated
@@ -131,10 +131,10 @@ async def update_subscription(
 @router.delete("/subscriptions/{subscription_id}", response_model=schemas.MessageResponse)
 async def delete_subscription(
     subscription_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Unsubscribe from alerts."""
-    success = crud.delete_subscription(db, subscription_id)
+    success = await crud.delete_subscription(db, subscription_id)
     if not success:
         raise HTTPException(status_code=404, detail="Subscription not found")
     
@@ -180,7 +180,7 @@ async def test_notifications(test: schemas.NotificationTest):
 @router.post("/send-alert", response_model=schemas.NotificationResult)
 async def send_alert_notifications(
     flood_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Send notifications for a specific flood event to subscribed users.
@@ -192,12 +192,12 @@ async def send_alert_notifications(
     Notification results (emails and SMS sent/failed)
     """
     # Get flood event
-    flood_event = crud.get_flood_event(db, flood_id)
+    flood_event = await crud.get_flood_event(db, flood_id)
     if not flood_event:
         raise HTTPException(status_code=404, detail="Flood event not found")
     
     # Get subscriptions near this location
-    subscriptions = crud.get_subscriptions_near_location(
+    subscriptions = await crud.get_subscriptions_near_location(
         db,
         latitude=flood_event.latitude,
         longitude=flood_event.longitude,
@@ -5,7 +5,7 @@ Defines the data structures for API input and output.
 
 from pydantic import BaseModel, Field, validator
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from enum import Enum
 
 
@@ -53,6 +53,14 @@ class FloodEventResponse(FloodEventBase):
         from_attributes = True  # Enables ORM mode for SQLAlchemy models
 
 
+class BulkFloodEventResponse(BaseModel):
+    """Response schema for bulk flood event ingestion."""
+    count: int
+    ids: List[int]
+    notified_events: int = 0
+    notified_subscriptions: int = 0
+
+
 class FloodEventUpdate(BaseModel):
     """Schema for updating flood event (optional, for future use)."""
     location_name: Optional[str] = None
@@ -78,6 +86,38 @@ class RiskCalculationResponse(BaseModel):
     rainfall_mm: float
     elevation_m: float
     factors: dict = Field(default_factory=dict, description="Breakdown of risk factors")
+    data_sources: dict = Field(default_factory=dict, description="Where each input value came from")
+    degraded_sources: List[str] = Field(default_factory=list, description="Inputs served from fallback data")
+
+
+class BatchRiskPoint(BaseModel):
+    """Single location in a batch risk calculation."""
+    latitude: float = Field(..., ge=-90, le=90)
+    longitude: float = Field(..., ge=-180, le=180)
+    rainfall_mm: Optional[float] = Field(None, ge=0, description="Rainfall in mm (fetched if null)")
+    elevation_m: Optional[float] = Field(None, description="Elevation in meters (fetched if null)")
+
+
+class BatchRiskCalculationRequest(BaseModel):
+    """Request schema for scoring many locations at once."""
+    points: List[BatchRiskPoint] = Field(..., min_length=1, max_length=50000)
+
+
+class BatchRiskResult(BaseModel):
+    """Risk calculation result for one location in a batch."""
+    latitude: float
+    longitude: float
+    risk_score: float = Field(..., ge=0, le=100)
+    severity: SeverityLevel
+    rainfall_mm: float
+    elevation_m: float
+    degraded_sources: List[str] = Field(default_factory=list, description="Inputs served from fallback data")
+
+
+class BatchRiskCalculationResponse(BaseModel):
+    """Response schema for batch risk calculation."""
+    count: int
+    results: List[BatchRiskResult]
 
 
 # Authentication Schemas (Optional)
@@ -167,7 +207,7 @@ class AlertSubscriptionUpdate(BaseModel):
     """Schema for updating alert subscription."""
     email: Optional[str] = None
     phone: Optional[str] = None
-    radius_km: Optional[float] = None
+    radius_km: Optional[float] = Field(None, ge=0.1, le=50, description="Alert radius in km")
     min_severity: Optional[str] = None
     is_active: Optional[bool] = None
 
@@ -0,0 +1,256 @@
+"""
+Fan-out hub for the live alert stream (/map/stream).
+Pushes new and expired active alerts to connected map viewers, so clients
+hold one open connection instead of polling /map/active-alerts.
+"""
+
+import asyncio
+import heapq
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from .. import models
+from ..config import settings
+from ..database import AsyncSessionLocal
+from .heatmap import unix_seconds
+from .subscription_index import SEVERITY_ORDER, severity_rank
+
+
+class ActiveAlert(NamedTuple):
+    """An active alert (same attribute names as the crud summary rows)."""
+    id: int
+    location_name: str
+    latitude: float
+    longitude: float
+    severity: str
+    risk_score: float
+    timestamp: datetime
+    rainfall_mm: Optional[float]
+    elevation_m: Optional[float]
+
+
+class AlertChange(NamedTuple):
+    """One stream message: kind is "new", "expired" or "resync" (alert is None for resync)."""
+    kind: str
+    alert: Optional[ActiveAlert]
+    sequence: int
+
+
+class AlertSubscriber:
+    """A connected viewer: its viewport and a bounded queue of pending changes."""
+
+    def __init__(self, bbox: Optional[Tuple[float, float, float, float]], queue_size: int):
+        self.bbox = bbox
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    def wants(self, alert: ActiveAlert) -> bool:
+        """True if the alert lies in the subscriber's viewport."""
+        if self.bbox is None:
+            return True
+        south, west, north, east = self.bbox
+        if not south <= alert.latitude <= north:
+            return False
+        if west <= east:
+            return west <= alert.longitude <= east
+        return alert.longitude >= west or alert.longitude <= east
+
+
+class AlertHub:
+    """
+    Tracks the active alerts of this worker and broadcasts changes.
+
+    The write path publishes created and deleted events after each commit,
+    and alerts older than `active_hours` are expired by a background loop,
+    so one timer and one change feed serve every viewer. Each change is
+    filtered against a subscriber's viewport and put on its queue; a
+    subscriber that falls `queue_size` changes behind gets a single
+    "resync" instead and reloads the full list.
+
+    Because other workers write too, the loop also reconciles the tracked
+    alerts with the database every `reconcile_seconds` while anyone is
+    connected: one query per worker, however many viewers there are.
+    """
+
+    def __init__(
+        self,
+        active_hours: float,
+        min_severity: str,
+        queue_size: int,
+        tick_seconds: float,
+        reconcile_seconds: float,
+        session_factory: Callable[[], AsyncSession]
+    ):
+        self.active_seconds = active_hours * 3600.0
+        self.min_severity_rank = SEVERITY_ORDER[min_severity]
+        self.queue_size = queue_size
+        self.tick_seconds = tick_seconds
+        self.reconcile_seconds = reconcile_seconds
+        self.session_factory = session_factory
+        self.sequence = 0
+        self._subscribers: Set[AlertSubscriber] = set()
+        self._active: Dict[int, ActiveAlert] = {}
+        self._expiry: List[Tuple[float, int]] = []  # (timestamp, id) min-heap
+        self._deleted: Dict[int, float] = {}  # id -> timestamp, kept until the alert would have expired
+        self._reconciled_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._active)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    @property
+    def severities(self) -> List[str]:
+        """Severity levels that count as active alerts."""
+        return [name for name, rank in SEVERITY_ORDER.items() if rank >= self.min_severity_rank]
+
+    @property
+    def cutoff(self) -> datetime:
+        """Oldest timestamp (naive UTC) of an active alert."""
+        return datetime.utcnow() - timedelta(seconds=self.active_seconds)
+
+    def subscribe(self, bbox: Optional[Tuple[float, float, float, float]] = None) -> AlertSubscriber:
+        """Register a viewer for a (south, west, north, east) viewport (None = whole map)."""
+        subscriber = AlertSubscriber(bbox, self.queue_size)
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: AlertSubscriber) -> None:
+        self._subscribers.discard(subscriber)
+
+    def track(self, rows: Iterable) -> None:
+        """Start tracking alerts a viewer was sent from the database, without broadcasting them."""
+        for row in rows:
+            self._insert(row)
+
+    def publish_created(self, flood_events: Iterable[models.FloodEvent]) -> None:
+        """Broadcast committed flood events that are active alerts."""
+        for event in flood_events:
+            alert = self._insert(event)
+            if alert is not None:
+                self._broadcast("new", alert)
+
+    def publish_deleted(self, flood_ids: Iterable[int]) -> None:
+        """Broadcast the removal of deleted flood events (untracked ids are ignored)."""
+        for flood_id in flood_ids:
+            alert = self._active.pop(flood_id, None)
+            if alert is not None:
+                self._deleted[flood_id] = unix_seconds(alert.timestamp)
+                self._broadcast("expired", alert)
+
+    def expire(self, now: Optional[float] = None) -> None:
+        """Broadcast alerts that have left the active window."""
+        cutoff = (time.time() if now is None else now) - self.active_seconds
+        while self._expiry and self._expiry[0][0] < cutoff:
+            _, flood_id = heapq.heappop(self._expiry)
+            alert = self._active.pop(flood_id, None)
+            if alert is not None:
+                self._broadcast("expired", alert)
+        self._deleted = {flood_id: stamp for flood_id, stamp in self._deleted.items() if stamp >= cutoff}
+
+    async def reconcile(self, db: AsyncSession) -> None:
+        """Pick up alerts created or deleted by other workers."""
+        known = set(self._active)
+        event = models.FloodEvent
+        result = await db.execute(
+            select(
+                event.id, event.location_name, event.latitude, event.longitude, event.severity,
+                event.risk_score, event.timestamp, event.rainfall_mm, event.elevation_m
+            ).where(event.timestamp >= self.cutoff, event.severity.in_(self.severities))
+        )
+        current = {row.id: row for row in result.all()}
+
+        for flood_id in known - set(current):
+            alert = self._active.get(flood_id)
+            if alert is not None and unix_seconds(alert.timestamp) >= time.time() - self.active_seconds:
+                self.publish_deleted([flood_id])
+        for flood_id in set(current) - known:
+            if flood_id not in self._active:
+                alert = self._insert(current[flood_id])
+                if alert is not None:
+                    self._broadcast("new", alert)
+        self._reconciled_at = time.monotonic()
+
+    def start(self) -> None:
+        """Start the background expiry and reconcile loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background loop and disconnect every viewer."""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        for subscriber in list(self._subscribers):
+            self._push(subscriber, AlertChange("resync", None, self.sequence))
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.tick_seconds)
+            self.expire()
+            if self._subscribers and time.monotonic() - self._reconciled_at >= self.reconcile_seconds:
+                try:
+                    async with self.session_factory() as db:
+                        await self.reconcile(db)
+                except Exception as e:
+                    print(f"Alert stream reconcile failed: {e}")
+
+    def _insert(self, row) -> Optional[ActiveAlert]:
+        """Track an alert if it is active and new to this hub."""
+        if row.id in self._active or row.id in self._deleted:
+            return None
+        if severity_rank(row.severity) < self.min_severity_rank:
+            return None
+        stamp = unix_seconds(row.timestamp)
+        if stamp < time.time() - self.active_seconds:
+            return None
+        alert = ActiveAlert(
+            id=row.id,
+            location_name=row.location_name,
+            latitude=row.latitude,
+            longitude=row.longitude,
+            severity=getattr(row.severity, "value", row.severity),
+            risk_score=row.risk_score,
+            timestamp=row.timestamp,
+            rainfall_mm=row.rainfall_mm,
+            elevation_m=row.elevation_m
+        )
+        self._active[alert.id] = alert
+        heapq.heappush(self._expiry, (stamp, alert.id))
+        return alert
+
+    def _broadcast(self, kind: str, alert: ActiveAlert) -> None:
+        self.sequence += 1
+        change = AlertChange(kind, alert, self.sequence)
+        for subscriber in self._subscribers:
+            if subscriber.wants(alert):
+                self._push(subscriber, change)
+
+    @staticmethod
+    def _push(subscriber: AlertSubscriber, change: AlertChange) -> None:
+        try:
+            subscriber.queue.put_nowait(change)
+        except asyncio.QueueFull:
+            # Too far behind: drop the backlog and ask the viewer to reload
+            while not subscriber.queue.empty():
+                subscriber.queue.get_nowait()
+            subscriber.queue.put_nowait(AlertChange("resync", None, change.sequence))
+
+
+# Global alert hub (started from the app lifespan)
+alert_hub = AlertHub(
+    active_hours=settings.CLUSTER_ACTIVE_HOURS,
+    min_severity=settings.CLUSTER_MIN_SEVERITY,
+    queue_size=settings.STREAM_QUEUE_SIZE,
+    tick_seconds=settings.STREAM_TICK_SECONDS,
+    reconcile_seconds=settings.STREAM_RECONCILE_SECONDS,
+    session_factory=AsyncSessionLocal
+)
@@ -0,0 +1,76 @@
+"""
+Request micro-batching.
+Collects lookups that arrive within a short window and resolves them with a
+single upstream call.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Generic, Hashable, List, Optional, Tuple, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class MicroBatcher(Generic[K, V]):
+    """
+    Coalesce concurrent single-item lookups into batched handler calls.
+
+    Items submitted within `window_seconds` of the first pending item (or
+    until `max_batch_size` is reached) are deduplicated and passed to the
+    handler in one call. The handler must return one result per item, in
+    order; each caller receives the result for its own item. If the handler
+    raises, every caller in that batch receives the exception.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[List[K]], Awaitable[List[V]]],
+        window_seconds: float,
+        max_batch_size: int
+    ):
+        self.handler = handler
+        self.window_seconds = window_seconds
+        self.max_batch_size = max_batch_size
+        self._pending: List[Tuple[K, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def submit(self, item: K) -> V:
+        """Queue an item for the next batch and wait for its result."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # State left behind by a previous event loop can never flush
+            self._pending, self._timer, self._loop = [], None, loop
+
+        future = loop.create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_seconds, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        """Hand the pending items to the handler as one batch."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if batch:
+            asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch: List[Tuple[K, asyncio.Future]]) -> None:
+        items = list(dict.fromkeys(item for item, _ in batch))
+        try:
+            results = await self.handler(items)
+            by_item = dict(zip(items, results))
+            for item, future in batch:
+                if not future.done():
+                    future.set_result(by_item[item])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
@@ -0,0 +1,190 @@
+"""
+In-process caching primitives for upstream data.
+Provides a bounded LRU cache with per-entry TTL and single-flight loading.
+"""
+
+import asyncio
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Bounded LRU cache whose entries expire after a fixed TTL.
+
+    Concurrent misses for the same key are coalesced: only the first caller
+    runs the loader, the others await its result (single-flight). Expired
+    entries are kept until evicted so they can still be served as stale
+    values when the upstream is unavailable.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return a fresh cached value, or default if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            return default
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def get_stale(self, key: Hashable, default: Any = None) -> Any:
+        """Return the last cached value for a key, even if it has expired."""
+        entry = self._entries.get(key)
+        return default if entry is None else entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        """
+        Store a value and evict the least recently used entries over capacity.
+
+        ttl_seconds overrides the cache TTL for this entry (e.g. for a value
+        that was already cached elsewhere for a while).
+        """
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all cached entries."""
+        self._entries.clear()
+
+    def keys(self) -> List[Hashable]:
+        """Keys of all entries, fresh or expired."""
+        return list(self._entries)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove an entry and return its value (default if missing)."""
+        entry = self._entries.pop(key, None)
+        return default if entry is None else entry[1]
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the cached value for key, loading it once on a miss.
+
+        Args:
+            key: Cache key
+            loader: Zero-argument coroutine function that fetches the value
+
+        Returns:
+            Cached or freshly loaded value
+
+        Raises:
+            Whatever the loader raises; failures are not cached.
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        return await self._shared_load(key, loader)
+
+    async def refresh(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Reload a key even if its cached value is still fresh.
+
+        Joins a load that is already in flight for the key instead of
+        starting a second one.
+        """
+        return await self._shared_load(key, loader)
+
+    def ttl_remaining(self, key: Hashable) -> float:
+        """Seconds until the entry for key expires (0 if missing or expired)."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return 0.0
+        return max(0.0, entry[0] - time.monotonic())
+
+    async def _shared_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.ensure_future(self._load(key, loader))
+            task.add_done_callback(_consume_exception)
+            self._inflight[key] = task
+
+        # Shield so a cancelled waiter does not cancel the shared load
+        return await asyncio.shield(task)
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await loader()
+            self.set(key, value)
+            return value
+        finally:
+            if self._inflight.get(key) is asyncio.current_task():
+                del self._inflight[key]
+
+
+def _consume_exception(task: asyncio.Task) -> None:
+    """Mark a load failure as retrieved when every waiter has gone away."""
+    if not task.cancelled():
+        task.exception()
+
+
+# Rebuild lock per (index, event loop); module-level indexes outlive test loops
+_rebuild_locks: "weakref.WeakKeyDictionary[Any, Tuple[asyncio.AbstractEventLoop, asyncio.Lock]]" = weakref.WeakKeyDictionary()
+_background_rebuilds: "weakref.WeakKeyDictionary[Any, asyncio.Task]" = weakref.WeakKeyDictionary()
+
+
+def _rebuild_lock(index: Any) -> asyncio.Lock:
+    loop = asyncio.get_running_loop()
+    entry = _rebuild_locks.get(index)
+    if entry is None or entry[0] is not loop:
+        entry = (loop, asyncio.Lock())
+        _rebuild_locks[index] = entry
+    return entry[1]
+
+
+async def rebuild_if_stale(
+    index: Any,
+    db: Any,
+    session_factory: Optional[Callable[[], Any]] = None
+) -> None:
+    """
+    Rebuild a stale in-memory index (anything with `is_stale` and an async
+    `rebuild(db)`), one rebuild at a time per worker.
+
+    Requests that find the index stale while a rebuild is running wait for
+    it and then use its result instead of reloading again (single-flight).
+
+    With a session_factory, an index that has been loaded before (its
+    `is_loaded` is true) is refreshed in a background task with its own
+    session, and the caller carries on with the current contents, which
+    the write path of this worker keeps up to date. Only the first load
+    is awaited.
+    """
+    if not index.is_stale:
+        return
+    if session_factory is not None and index.is_loaded:
+        task = _background_rebuilds.get(index)
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            _background_rebuilds[index] = asyncio.create_task(_rebuild_in_background(index, session_factory))
+        return
+    async with _rebuild_lock(index):
+        if index.is_stale:
+            await index.rebuild(db)
+
+
+async def _rebuild_in_background(index: Any, session_factory: Callable[[], Any]) -> None:
+    try:
+        async with _rebuild_lock(index):
+            if index.is_stale:
+                async with session_factory() as db:
+                    await index.rebuild(db)
+    except Exception as e:
+        print(f"Background rebuild of {type(index).__name__} failed: {e}")
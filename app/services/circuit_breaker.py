@@ -0,0 +1,115 @@
+"""
+Circuit breaker for upstream providers.
+Stops calling a failing provider for a cool-down period so requests can be
+answered immediately from cached or local data instead of waiting on timeouts.
+"""
+
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the provider's circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Failure-rate circuit breaker with half-open probing.
+
+    States:
+    - closed: calls pass through; outcomes are tracked in a rolling window
+    - open: calls are rejected with CircuitOpenError until the cool-down ends
+    - half_open: a single probe call is allowed; success closes the circuit,
+      failure re-opens it
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate_threshold: float = 0.5,
+        window_size: int = 20,
+        min_calls: int = 5,
+        open_seconds: float = 30.0
+    ):
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.state = self.CLOSED
+        self._outcomes: Deque[bool] = deque(maxlen=window_size)  # True = failure
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    @property
+    def failure_rate(self) -> float:
+        """Fraction of failed calls in the rolling window."""
+        return sum(self._outcomes) / len(self._outcomes) if self._outcomes else 0.0
+
+    def allow_request(self) -> bool:
+        """Return True if a call may be made to the provider now."""
+        if self.state == self.OPEN:
+            if time.monotonic() - self._opened_at < self.open_seconds:
+                return False
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+
+        if self.state == self.HALF_OPEN:
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+
+        return True
+
+    def record_success(self) -> None:
+        """Record a successful call."""
+        if self.state == self.HALF_OPEN:
+            print(f"✅ {self.name} circuit closed")
+            self.state = self.CLOSED
+            self._outcomes.clear()
+            self._probe_in_flight = False
+            return
+        self._outcomes.append(False)
+
+    def record_failure(self) -> None:
+        """Record a failed call and open the circuit if the failure rate is too high."""
+        if self.state == self.HALF_OPEN:
+            self._open()
+            return
+        self._outcomes.append(True)
+        if len(self._outcomes) >= self.min_calls and self.failure_rate >= self.failure_rate_threshold:
+            self._open()
+
+    def _open(self) -> None:
+        print(f"⚠️  {self.name} circuit opened (failure rate {self.failure_rate:.0%})")
+        self.state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._probe_in_flight = False
+
+    async def call(self, func: Callable[..., Awaitable[Any]], *args: Any) -> Any:
+        """
+        Call an upstream coroutine function through the breaker.
+
+        Raises:
+            CircuitOpenError: If the circuit is open
+            Whatever func raises (recorded as a failure)
+        """
+        if not self.allow_request():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+
+        try:
+            result = await func(*args)
+        except Exception:
+            self.record_failure()
+            raise
+        except BaseException:
+            # Cancelled: no verdict on the provider, but free the probe slot
+            self._probe_in_flight = False
+            raise
+
+        self.record_success()
+        return result
@@ -0,0 +1,381 @@
+"""
+Hierarchical marker clustering index of active flood events.
+Answers /map/clusters with one marker per cluster, so the response size
+depends on the viewport rather than on the number of active incidents.
+"""
+
+import heapq
+import math
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from .. import models
+from ..config import settings
+from ..utils.mvt import MAX_MERCATOR_LATITUDE
+from .heatmap import TILE_PIXELS, unix_seconds
+from .subscription_index import SEVERITY_ORDER, severity_rank
+
+SEVERITY_NAMES = ("Low", "Medium", "High", "Critical")
+
+
+class ClusterPoint(NamedTuple):
+    """One active event in world (Web Mercator 0-1) coordinates."""
+    id: int
+    wx: float
+    wy: float
+    latitude: float
+    longitude: float
+    severity_rank: int
+    risk_score: float
+    timestamp: float  # Unix seconds
+
+
+class Cluster(NamedTuple):
+    """A cluster marker (count == 1 means a single event, see event_id)."""
+    id: str
+    zoom: int
+    latitude: float
+    longitude: float
+    count: int
+    max_severity: str
+    event_id: Optional[int]
+
+
+def _project(latitude: float, longitude: float) -> Tuple[float, float]:
+    """world_xy for one point, without numpy scalar overhead."""
+    lat = math.radians(max(-MAX_MERCATOR_LATITUDE, min(MAX_MERCATOR_LATITUDE, latitude)))
+    wx = (longitude + 180.0) / 360.0
+    wy = (1.0 - math.log(math.tan(lat) + 1.0 / math.cos(lat)) / math.pi) / 2.0
+    return wx, wy
+
+
+def _unproject(wx: float, wy: float) -> Tuple[float, float]:
+    """Inverse of world_xy for one point."""
+    longitude = wx * 360.0 - 180.0
+    latitude = math.degrees(math.atan(math.sinh(math.pi * (1.0 - 2.0 * wy))))
+    return latitude, longitude
+
+
+class _Cell:
+    """Running totals of the events in one grid cell."""
+
+    __slots__ = ("count", "sum_wx", "sum_wy", "id_sum", "severity_counts")
+
+    def __init__(self):
+        self.count = 0
+        self.sum_wx = 0.0
+        self.sum_wy = 0.0
+        self.id_sum = 0  # Equals the event id when count == 1
+        self.severity_counts = [0, 0, 0, 0]
+
+    @property
+    def max_severity_rank(self) -> int:
+        for rank in range(3, -1, -1):
+            if self.severity_counts[rank]:
+                return rank
+        return 0
+
+
+class ClusterIndex:
+    """
+    Grid-based hierarchical clusters, one level per zoom.
+
+    A cluster at zoom z is a square of `cell_pixels` screen pixels in Web
+    Mercator space. `cell_pixels` divides the 256 px tile, so cells nest:
+    every cell at zoom z is the parent of exactly four cells at zoom z + 1.
+    Adding or removing an event touches one cell per zoom level, so the
+    index is updated incrementally as events arrive and expire, and
+    expanding a cluster is a lookup of its child cells.
+
+    Cluster ids are "zoom-column-row". Above `max_zoom` events are returned
+    individually.
+
+    The write path updates the index after each commit; because other
+    workers write too, it is rebuilt whenever it is older than
+    `refresh_seconds`. Events older than `active_hours` expire lazily.
+    """
+
+    def __init__(
+        self,
+        cell_pixels: int,
+        max_zoom: int,
+        active_hours: float,
+        min_severity: str,
+        refresh_seconds: float
+    ):
+        if TILE_PIXELS % cell_pixels or cell_pixels & (cell_pixels - 1):
+            raise ValueError("cell_pixels must be a power of two that divides 256")
+        self.cell_pixels = cell_pixels
+        self.max_zoom = max_zoom
+        self.active_seconds = active_hours * 3600.0
+        self.min_severity_rank = SEVERITY_ORDER[min_severity]
+        self.refresh_seconds = refresh_seconds
+        self._points: Dict[int, ClusterPoint] = {}
+        self._levels: List[Dict[Tuple[int, int], _Cell]] = [{} for _ in range(max_zoom + 1)]
+        self._leaves: Dict[Tuple[int, int], Set[int]] = defaultdict(set)  # max_zoom cell -> event ids
+        self._expiry: List[Tuple[float, int]] = []  # (timestamp, id) min-heap
+        self._loaded_at: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    @property
+    def is_loaded(self) -> bool:
+        """True once the index has been loaded from the database."""
+        return self._loaded_at is not None
+
+    @property
+    def is_stale(self) -> bool:
+        """True if the index has never been loaded or is due for a rebuild."""
+        return self._loaded_at is None or time.monotonic() - self._loaded_at >= self.refresh_seconds
+
+    async def rebuild(self, db: AsyncSession) -> None:
+        """Reload every active event from the database."""
+        event = models.FloodEvent
+        levels = [level for level in models.SeverityLevel if SEVERITY_ORDER[level.value] >= self.min_severity_rank]
+        result = await db.execute(
+            select(event.id, event.latitude, event.longitude, event.severity, event.risk_score, event.timestamp)
+            .where(
+                event.timestamp >= datetime.utcnow() - timedelta(seconds=self.active_seconds),
+                event.severity.in_(levels)
+            )
+        )
+        self.load(result.all())
+
+    def load(self, rows: Iterable[Tuple[int, float, float, str, float, datetime]]) -> None:
+        """Replace the index contents with (id, latitude, longitude, severity, risk_score, timestamp) rows."""
+        self._points = {}
+        self._levels = [{} for _ in range(self.max_zoom + 1)]
+        self._leaves = defaultdict(set)
+        self._expiry = []
+        self._insert_rows(rows)
+        self._loaded_at = time.monotonic()
+
+    def add(self, flood_events: Iterable[models.FloodEvent]) -> None:
+        """Index committed flood events (events that are not active are ignored)."""
+        self._insert_rows(
+            (event.id, event.latitude, event.longitude, event.severity, event.risk_score, event.timestamp)
+            for event in flood_events
+        )
+
+    def remove(self, flood_ids: Iterable[int]) -> None:
+        """Drop deleted flood events (ids not in the index are ignored)."""
+        for flood_id in flood_ids:
+            point = self._points.pop(flood_id, None)
+            if point is not None:
+                self._update_cells(point, -1)
+
+    def expire(self, now: Optional[float] = None) -> None:
+        """Remove events that are older than the active window."""
+        cutoff = (time.time() if now is None else now) - self.active_seconds
+        while self._expiry and self._expiry[0][0] < cutoff:
+            _, flood_id = heapq.heappop(self._expiry)
+            self.remove([flood_id])
+
+    def clusters(self, zoom: int, bbox: Optional[Tuple[float, float, float, float]] = None) -> List[Cluster]:
+        """
+        Get the clusters at a zoom level whose cell overlaps a box.
+
+        Args:
+            zoom: Map zoom level
+            bbox: (south, west, north, east); west > east crosses the antimeridian
+
+        Returns:
+            Clusters, most events first
+        """
+        self.expire()
+        zoom = max(0, zoom)
+        level = min(zoom, self.max_zoom)
+        cells = self._levels[level] if zoom <= self.max_zoom else self._leaves
+        keys = self._keys_in(level, cells, bbox)
+
+        if zoom <= self.max_zoom:
+            found = [self._cell_cluster(zoom, key, cells[key]) for key in keys]
+        else:
+            found = [
+                self._point_cluster(self._points[flood_id], zoom)
+                for key in keys for flood_id in cells[key]
+            ]
+            if bbox is not None:
+                found = [cluster for cluster in found if _in_bbox(cluster.latitude, cluster.longitude, bbox)]
+
+        found.sort(key=lambda cluster: (-cluster.count, cluster.id))
+        return found
+
+    def expand(self, cluster_id: str) -> Optional[Tuple[Cluster, int, List[Cluster]]]:
+        """
+        Expand one cluster.
+
+        Returns:
+            (cluster, expansion_zoom, children) where expansion_zoom is the
+            first zoom at which the cluster splits into several markers and
+            children are those markers; None if the cluster does not exist
+        """
+        self.expire()
+        parsed = _parse_cluster_id(cluster_id)
+        if parsed is None:
+            return None
+        zoom, column, row = parsed
+        if zoom > self.max_zoom:
+            return None
+        cell = self._levels[zoom].get((column, row))
+        if cell is None:
+            return None
+
+        cluster = self._cell_cluster(zoom, (column, row), cell)
+        cells = [(column, row)]
+        while True:
+            zoom += 1
+            if zoom > self.max_zoom:
+                # Past max_zoom every event is its own marker
+                children = [
+                    self._point_cluster(self._points[flood_id], zoom)
+                    for key in cells for flood_id in self._leaves.get(key, ())
+                ]
+                break
+            cells = [
+                (2 * c + dc, 2 * r + dr)
+                for c, r in cells for dc in (0, 1) for dr in (0, 1)
+                if (2 * c + dc, 2 * r + dr) in self._levels[zoom]
+            ]
+            if len(cells) > 1 or cluster.count == 1:
+                children = [self._cell_cluster(zoom, key, self._levels[zoom][key]) for key in cells]
+                break
+
+        children.sort(key=lambda child: (-child.count, child.id))
+        return cluster, zoom, children
+
+    def _insert_rows(self, rows) -> None:
+        cutoff = time.time() - self.active_seconds
+        for flood_id, latitude, longitude, severity, risk_score, timestamp in rows:
+            rank = severity_rank(severity)
+            seconds = unix_seconds(timestamp)
+            if rank < self.min_severity_rank or seconds < cutoff:
+                continue
+            self.remove([flood_id])
+            wx, wy = _project(latitude, longitude)
+            point = ClusterPoint(flood_id, wx, wy, latitude, longitude, rank, risk_score, seconds)
+            self._points[flood_id] = point
+            self._update_cells(point, 1)
+            heapq.heappush(self._expiry, (seconds, flood_id))
+
+    def _keys_in(self, zoom: int, cells: Dict[Tuple[int, int], object], bbox) -> List[Tuple[int, int]]:
+        """Keys of non-empty cells overlapping a box, scanning whichever is smaller: the box or the level."""
+        if bbox is None:
+            return list(cells)
+        south, west, north, east = bbox
+        n = self._cells_per_axis(zoom)
+
+        def cell_of(latitude, longitude):
+            wx, wy = _project(latitude, longitude)
+            return min(int(wx * n), n - 1), min(int(wy * n), n - 1)
+
+        (_, row_min), (_, row_max) = cell_of(north, 0.0), cell_of(south, 0.0)
+        col_ranges = []
+        for lo, hi in ([(west, east)] if west <= east else [(west, 180.0), (-180.0, east)]):
+            col_ranges.append((cell_of(0.0, lo)[0], cell_of(0.0, hi)[0]))
+
+        area = sum(c_max - c_min + 1 for c_min, c_max in col_ranges) * (row_max - row_min + 1)
+        if area <= len(cells):
+            return [
+                (column, row)
+                for c_min, c_max in col_ranges
+                for column in range(c_min, c_max + 1)
+                for row in range(row_min, row_max + 1)
+                if (column, row) in cells
+            ]
+        return [
+            (column, row) for column, row in cells
+            if row_min <= row <= row_max and any(c_min <= column <= c_max for c_min, c_max in col_ranges)
+        ]
+
+    def _cells_per_axis(self, zoom: int) -> int:
+        return (2 ** zoom) * TILE_PIXELS // self.cell_pixels
+
+    def _leaf_key(self, point: ClusterPoint) -> Tuple[int, int]:
+        n = self._cells_per_axis(self.max_zoom)
+        return min(int(point.wx * n), n - 1), min(int(point.wy * n), n - 1)
+
+    def _update_cells(self, point: ClusterPoint, sign: int) -> None:
+        column, row = leaf = self._leaf_key(point)
+        wx, wy, flood_id, rank = sign * point.wx, sign * point.wy, sign * point.id, point.severity_rank
+        shift = self.max_zoom
+        # Cells nest, so a point's cell at zoom z is its max_zoom cell shifted right
+        for level in self._levels:
+            key = (column >> shift, row >> shift)
+            shift -= 1
+            cell = level.get(key)
+            if cell is None:
+                cell = level[key] = _Cell()
+            cell.count += sign
+            cell.sum_wx += wx
+            cell.sum_wy += wy
+            cell.id_sum += flood_id
+            cell.severity_counts[rank] += sign
+            if cell.count == 0:
+                del level[key]
+
+        if sign > 0:
+            self._leaves[leaf].add(point.id)
+        else:
+            self._leaves[leaf].discard(point.id)
+            if not self._leaves[leaf]:
+                del self._leaves[leaf]
+
+    def _cell_cluster(self, zoom: int, key: Tuple[int, int], cell: _Cell) -> Cluster:
+        if cell.count == 1:
+            return self._point_cluster(self._points[cell.id_sum], zoom)
+        latitude, longitude = _unproject(cell.sum_wx / cell.count, cell.sum_wy / cell.count)
+        return Cluster(
+            id=f"{zoom}-{key[0]}-{key[1]}",
+            zoom=zoom,
+            latitude=latitude,
+            longitude=longitude,
+            count=cell.count,
+            max_severity=SEVERITY_NAMES[cell.max_severity_rank],
+            event_id=None
+        )
+
+    def _point_cluster(self, point: ClusterPoint, zoom: int) -> Cluster:
+        level = min(zoom, self.max_zoom)
+        column, row = self._leaf_key(point)
+        shift = self.max_zoom - level
+        return Cluster(
+            id=f"{level}-{column >> shift}-{row >> shift}",
+            zoom=zoom,
+            latitude=point.latitude,
+            longitude=point.longitude,
+            count=1,
+            max_severity=SEVERITY_NAMES[point.severity_rank],
+            event_id=point.id
+        )
+
+
+def _parse_cluster_id(cluster_id: str) -> Optional[Tuple[int, int, int]]:
+    try:
+        zoom, column, row = (int(part) for part in cluster_id.split("-"))
+    except ValueError:
+        return None
+    return zoom, column, row
+
+
+def _in_bbox(latitude: float, longitude: float, bbox: Tuple[float, float, float, float]) -> bool:
+    south, west, north, east = bbox
+    if not south <= latitude <= north:
+        return False
+    if west <= east:
+        return west <= longitude <= east
+    return longitude >= west or longitude <= east
+
+
+# Global cluster index (shared by all requests in this worker)
+cluster_index = ClusterIndex(
+    cell_pixels=settings.CLUSTER_CELL_PIXELS,
+    max_zoom=settings.CLUSTER_MAX_ZOOM,
+    active_hours=settings.CLUSTER_ACTIVE_HOURS,
+    min_severity=settings.CLUSTER_MIN_SEVERITY,
+    refresh_seconds=settings.CLUSTER_INDEX_REFRESH_SECONDS
+)
@@ -0,0 +1,149 @@
+"""
+Offline digital elevation model (DEM) backend.
+Samples a memory-mapped elevation raster with bilinear interpolation, so
+elevation lookups need no network and are identical in every worker.
+
+Supported inputs (WGS84 / EPSG:4326 grids, north-up):
+- NumPy `.npy` array with a JSON sidecar (`<file>.npy.json`):
+  {"north": 28.9, "west": 76.8, "cell_size": 0.000833, "nodata": -32768}
+  `cell_size` may also be a [lat_step, lon_step] pair.
+- Uncompressed GeoTIFF, memory-mapped through the optional `tifffile` package.
+"""
+
+import json
+import numpy as np
+from pathlib import Path
+from typing import Optional, Sequence, Tuple
+
+try:
+    import tifffile
+    TIFFFILE_AVAILABLE = True
+except ImportError:
+    TIFFFILE_AVAILABLE = False
+
+
+class DemRaster:
+    """
+    Elevation grid sampled with vectorized bilinear interpolation.
+
+    Pixel (row, col) covers the area whose centre lies at
+    (north - (row + 0.5) * lat_step, west + (col + 0.5) * lon_step).
+    Points outside the grid or next to nodata pixels sample as NaN.
+    """
+
+    def __init__(
+        self,
+        data: np.ndarray,
+        north: float,
+        west: float,
+        lat_step: float,
+        lon_step: float,
+        nodata: Optional[float] = None
+    ):
+        self.data = data
+        self.north = north
+        self.west = west
+        self.lat_step = lat_step
+        self.lon_step = lon_step
+        self.nodata = nodata
+        self.height, self.width = data.shape
+
+    @classmethod
+    def load(cls, path: str) -> "DemRaster":
+        """
+        Memory-map a DEM file from disk.
+
+        Args:
+            path: Path to a `.npy` grid (with JSON sidecar) or a GeoTIFF
+
+        Returns:
+            DemRaster backed by the mapped file
+
+        Raises:
+            ValueError: If the file format is not supported
+        """
+        suffix = Path(path).suffix.lower()
+        if suffix == ".npy":
+            data = np.load(path, mmap_mode="r")
+            with open(f"{path}.json", encoding="utf-8") as f:
+                meta = json.load(f)
+            cell_size = meta["cell_size"]
+            lat_step, lon_step = (cell_size, cell_size) if np.isscalar(cell_size) else cell_size
+            return cls(data, meta["north"], meta["west"], lat_step, lon_step, meta.get("nodata"))
+
+        if suffix in (".tif", ".tiff"):
+            if not TIFFFILE_AVAILABLE:
+                raise ValueError("GeoTIFF DEMs require the 'tifffile' package")
+            return cls._load_geotiff(path)
+
+        raise ValueError(f"Unsupported DEM format: {path}")
+
+    @classmethod
+    def _load_geotiff(cls, path: str) -> "DemRaster":
+        """Memory-map an uncompressed GeoTIFF and read its georeferencing tags."""
+        data = tifffile.memmap(path, mode="r")
+        with tifffile.TiffFile(path) as tif:
+            tags = tif.pages[0].tags
+            scale_x, scale_y = tags["ModelPixelScaleTag"].value[:2]
+            i, j, _, x, y, _ = tags["ModelTiepointTag"].value[:6]
+            nodata_tag = tags.get("GDAL_NODATA")
+            nodata = float(nodata_tag.value) if nodata_tag is not None else None
+        return cls(data, y + j * scale_y, x - i * scale_x, scale_y, scale_x, nodata)
+
+    @property
+    def bounds(self) -> Tuple[float, float, float, float]:
+        """Return (south, west, north, east) covered by the grid."""
+        south = self.north - self.height * self.lat_step
+        east = self.west + self.width * self.lon_step
+        return south, self.west, self.north, east
+
+    def sample(self, latitudes: Sequence[float], longitudes: Sequence[float]) -> np.ndarray:
+        """
+        Bilinearly interpolate elevations for many points at once.
+
+        Args:
+            latitudes: Point latitudes
+            longitudes: Point longitudes
+
+        Returns:
+            Array of elevations in meters (NaN where no data is available)
+        """
+        lats = np.asarray(latitudes, dtype=np.float64)
+        lons = np.asarray(longitudes, dtype=np.float64)
+
+        # Fractional pixel coordinates relative to pixel centres
+        rows = (self.north - lats) / self.lat_step - 0.5
+        cols = (lons - self.west) / self.lon_step - 0.5
+
+        south, west, north, east = self.bounds
+        inside = (lats >= south) & (lats <= north) & (lons >= west) & (lons <= east)
+
+        # Clamp to the outermost pixel centres so edge cells still interpolate
+        rows = np.clip(rows, 0, self.height - 1)
+        cols = np.clip(cols, 0, self.width - 1)
+        r0 = np.minimum(np.floor(rows).astype(np.intp), max(self.height - 2, 0))
+        c0 = np.minimum(np.floor(cols).astype(np.intp), max(self.width - 2, 0))
+        r1 = np.minimum(r0 + 1, self.height - 1)
+        c1 = np.minimum(c0 + 1, self.width - 1)
+        fr = rows - r0
+        fc = cols - c0
+
+        # Fancy indexing only touches the mapped pages that are needed
+        z00 = self.data[r0, c0].astype(np.float64)
+        z01 = self.data[r0, c1].astype(np.float64)
+        z10 = self.data[r1, c0].astype(np.float64)
+        z11 = self.data[r1, c1].astype(np.float64)
+
+        elevation = (
+            z00 * (1 - fr) * (1 - fc)
+            + z01 * (1 - fr) * fc
+            + z10 * fr * (1 - fc)
+            + z11 * fr * fc
+        )
+
+        valid = inside
+        if self.nodata is not None:
+            valid &= (z00 != self.nodata) & (z01 != self.nodata)
+            valid &= (z10 != self.nodata) & (z11 != self.nodata)
+
+        return np.where(valid, elevation, np.nan)
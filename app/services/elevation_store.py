@@ -0,0 +1,129 @@
+"""
+Persistent elevation store.
+Caches terrain elevation per quantized grid cell in a local SQLite file that
+survives restarts and is shared by every worker process on the host.
+"""
+
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Tuple
+from ..utils.geo import cell_index
+
+
+class ElevationStore:
+    """
+    SQLite-backed elevation cache keyed by grid cell.
+
+    Elevation does not change, so entries never expire. The database runs in
+    WAL mode so concurrent uvicorn workers can read while one of them writes.
+    """
+
+    def __init__(self, path: str, cell_degrees: float):
+        self.path = path
+        self.cell_degrees = cell_degrees
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the database on first use and ensure the schema exists."""
+        if self._conn is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS elevation_cells (
+                    row INTEGER NOT NULL,
+                    col INTEGER NOT NULL,
+                    elevation_m REAL NOT NULL,
+                    source TEXT NOT NULL,
+                    PRIMARY KEY (row, col)
+                ) WITHOUT ROWID
+                """
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, latitude: float, longitude: float) -> Optional[float]:
+        """
+        Look up the stored elevation for the cell containing a coordinate.
+
+        Returns:
+            Elevation in meters, or None if the cell is unknown or the store
+            is unavailable
+        """
+        return self.get_many([(latitude, longitude)])[0]
+
+    def get_many(self, points: Sequence[Tuple[float, float]]) -> List[Optional[float]]:
+        """
+        Look up stored elevations for several coordinates under one lock.
+
+        Blocks on SQLite (up to the busy timeout); call it from a worker
+        thread (asyncio.to_thread) on the request path.
+
+        Returns:
+            Elevation in meters per point, None where the cell is unknown or
+            the store is unavailable
+        """
+        cells = [cell_index(lat, lon, self.cell_degrees) for lat, lon in points]
+        try:
+            with self._lock:
+                conn = self._connection()
+                results = [
+                    conn.execute(
+                        "SELECT elevation_m FROM elevation_cells WHERE row = ? AND col = ?",
+                        cell
+                    ).fetchone()
+                    for cell in cells
+                ]
+        except sqlite3.Error as e:
+            print(f"Elevation store read failed: {e}")
+            return [None] * len(cells)
+        return [result[0] if result else None for result in results]
+
+    def put(self, latitude: float, longitude: float, elevation_m: float, source: str) -> None:
+        """
+        Write back the elevation for the cell containing a coordinate.
+
+        Args:
+            latitude: Location latitude
+            longitude: Location longitude
+            elevation_m: Elevation in meters
+            source: Provider the value came from (e.g. "google")
+        """
+        self.put_many([(latitude, longitude, elevation_m, source)])
+
+    def put_many(self, entries: Iterable[Tuple[float, float, float, str]]) -> None:
+        """
+        Write back several (latitude, longitude, elevation_m, source) entries
+        in one transaction.
+
+        Blocks on SQLite like get_many; call it from a worker thread.
+        """
+        rows = [
+            (*cell_index(lat, lon, self.cell_degrees), elevation_m, source)
+            for lat, lon, elevation_m, source in entries
+        ]
+        if not rows:
+            return
+        try:
+            with self._lock:
+                conn = self._connection()
+                with conn:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO elevation_cells (row, col, elevation_m, source) "
+                        "VALUES (?, ?, ?, ?)",
+                        rows
+                    )
+        except sqlite3.Error as e:
+            print(f"Elevation store write failed: {e}")
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
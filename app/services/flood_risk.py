@@ -3,10 +3,47 @@ Flood risk calculation service.
 Integrates with OpenWeatherMap API and Google Elevation API to calculate flood risk scores.
 """
 
+import asyncio
+import bisect
 import httpx
-from typing import Tuple, Optional, Dict
+import json
+import time
+import zlib
+import numpy as np
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, NamedTuple, Tuple, Optional, Dict, List
 from ..config import settings
 from ..schemas import SeverityLevel
+from ..utils.geo import quantize
+from .batching import MicroBatcher
+from .cache import TTLCache
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
+from .dem import DemRaster
+from .elevation_store import ElevationStore
+from .weather_store import WeatherStore
+
+
+# Threshold tables shared by the scalar and vectorized scoring paths.
+# A value scores SCORES[i] where i is the number of thresholds it has reached.
+RAINFALL_THRESHOLDS_MM = (5, 15, 30, 50)
+RAINFALL_SCORES = (10, 20, 35, 50, 60)
+ELEVATION_THRESHOLDS_M = (10, 50, 100, 200)
+ELEVATION_SCORES = (40, 30, 20, 10, 5)
+
+# Inclusive upper bounds of the Low, Medium and High bands
+SEVERITY_UPPER_BOUNDS = (25, 50, 75)
+SEVERITY_LEVELS = (
+    SeverityLevel.LOW.value,
+    SeverityLevel.MEDIUM.value,
+    SeverityLevel.HIGH.value,
+    SeverityLevel.CRITICAL.value
+)
+
+
+class ForecastSeries(NamedTuple):
+    """OpenWeatherMap 3-hour forecast slots for one grid cell."""
+    times: np.ndarray  # Slot end times (unix seconds)
+    rain_3h: np.ndarray  # Rain volume over the 3 hours ending at each slot (mm)
 
 
 class FloodRiskService:
@@ -31,11 +68,121 @@ class FloodRiskService:
         self.openweather_api_key = settings.OPENWEATHERMAP_API_KEY
         self.openweather_base_url = "https://api.openweathermap.org/data/2.5"
         self.google_elevation_base_url = "https://maps.googleapis.com/maps/api/elevation/json"
+        
+        # Long-lived, keep-alive pooled clients keyed by provider.
+        # Opened in startup() and closed in shutdown() from the app lifespan.
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        
+        # Per-provider circuit breakers: fail fast while a provider is down
+        self._breakers: Dict[str, CircuitBreaker] = {
+            provider: CircuitBreaker(
+                provider,
+                failure_rate_threshold=settings.CIRCUIT_FAILURE_RATE_THRESHOLD,
+                window_size=settings.CIRCUIT_WINDOW_SIZE,
+                min_calls=settings.CIRCUIT_MIN_CALLS,
+                open_seconds=settings.CIRCUIT_OPEN_SECONDS
+            )
+            for provider in ("openweather", "google_elevation")
+        }
+        
+        # Rainfall (current and forecast) cached per quantized grid cell
+        self._weather_cache = TTLCache(
+            ttl_seconds=settings.WEATHER_CACHE_TTL_SECONDS,
+            max_entries=settings.WEATHER_CACHE_MAX_ENTRIES
+        )
+        
+        # Weather fetched by any worker on the host is shared through SQLite
+        self._weather_store = (
+            WeatherStore(settings.WEATHER_STORE_PATH, settings.WEATHER_GRID_DEGREES)
+            if settings.WEATHER_STORE_PATH else None
+        )
+        
+        # Offline DEM is the primary elevation source when configured
+        self._dem = self._load_dem(settings.DEM_PATH) if settings.DEM_PATH else None
+        
+        # Elevation never changes: persist provider results across restarts
+        self._elevation_store = (
+            ElevationStore(settings.ELEVATION_STORE_PATH, settings.ELEVATION_GRID_DEGREES)
+            if settings.ELEVATION_STORE_PATH else None
+        )
+        
+        # Elevation lookups arriving within a short window share one API call
+        self._elevation_batcher = MicroBatcher(
+            lambda locations: self._breakers["google_elevation"].call(self._fetch_elevations, locations),
+            window_seconds=settings.ELEVATION_BATCH_WINDOW_MS / 1000.0,
+            max_batch_size=settings.ELEVATION_BATCH_MAX_SIZE
+        )
+    
+    @staticmethod
+    def _load_dem(path: str) -> Optional[DemRaster]:
+        """Memory-map the configured DEM, or return None if it cannot be loaded."""
+        try:
+            return DemRaster.load(path)
+        except Exception as e:
+            print(f"⚠️  Could not load DEM from {path}: {e}")
+            return None
+    
+    def _provider_timeout(self, provider: str) -> httpx.Timeout:
+        """Build the request timeout for an upstream provider."""
+        read_timeout = {
+            "openweather": settings.OPENWEATHERMAP_TIMEOUT_SECONDS,
+            "google_elevation": settings.GOOGLE_ELEVATION_TIMEOUT_SECONDS,
+        }[provider]
+        return httpx.Timeout(read_timeout, connect=settings.HTTP_CONNECT_TIMEOUT_SECONDS)
+    
+    def _build_client(self, provider: str) -> httpx.AsyncClient:
+        """Create a pooled HTTP client configured for an upstream provider."""
+        limits = httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECONDS
+        )
+        return httpx.AsyncClient(limits=limits, timeout=self._provider_timeout(provider))
+    
+    async def startup(self) -> None:
+        """Open one shared HTTP client per upstream provider."""
+        for provider in ("openweather", "google_elevation"):
+            if provider not in self._clients:
+                self._clients[provider] = self._build_client(provider)
+    
+    async def shutdown(self) -> None:
+        """Close the shared HTTP clients and release pooled connections."""
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+        
+        if self._elevation_store is not None:
+            self._elevation_store.close()
+        if self._weather_store is not None:
+            self._weather_store.close()
+    
+    def provider_status(self) -> Dict[str, str]:
+        """Return the circuit state of each upstream provider."""
+        return {name: breaker.state for name, breaker in self._breakers.items()}
+    
+    @asynccontextmanager
+    async def _http_client(self, provider: str) -> AsyncIterator[httpx.AsyncClient]:
+        """
+        Yield the shared client for a provider.
+        
+        Falls back to a short-lived client when the service has not been
+        started (e.g. scripts or tests that bypass the app lifespan).
+        """
+        client = self._clients.get(provider)
+        if client is not None and not client.is_closed:
+            yield client
+            return
+        
+        async with self._build_client(provider) as client:
+            yield client
     
     async def get_rainfall_data(self, latitude: float, longitude: float) -> float:
         """
         Fetch current rainfall data from OpenWeatherMap API.
         
+        Results are cached per quantized grid cell, so nearby lookups within
+        the cache TTL share one upstream request.
+        
         Args:
             latitude: Location latitude
             longitude: Location longitude
@@ -43,41 +190,194 @@ class FloodRiskService:
         Returns:
             Rainfall amount in mm (last hour or current)
         """
+        rainfall, _ = await self._get_rainfall_reading(latitude, longitude)
+        return rainfall
+    
+    async def _get_rainfall_reading(self, latitude: float, longitude: float) -> Tuple[float, str]:
+        """
+        Fetch rainfall together with where the value came from.
+        
+        The forecast is only needed when there is no current rain. With
+        WEATHER_SPECULATIVE_FORECAST on, it starts alongside a current-weather
+        cache miss, so a dry cell does not pay for two sequential round trips
+        at the cost of a forecast request for every wet cell.
+        
+        Returns:
+            Tuple of (rainfall_mm, source) where source is "live" or, when the
+            upstream failed, one of the fallback sources of _fallback_rainfall
+        """
+        cell = quantize(latitude, longitude, settings.WEATHER_GRID_DEGREES)
+        
+        # Only speculate on the forecast when current weather needs a round trip
+        forecast_task = None
+        if settings.WEATHER_SPECULATIVE_FORECAST and self._weather_cache.get(("current", cell)) is None:
+            forecast_task = asyncio.ensure_future(self._get_forecast_rainfall(latitude, longitude))
+        
         try:
-            async with httpx.AsyncClient() as client:
-                # Get current weather data
-                url = f"{self.openweather_base_url}/weather"
-                params = {
-                    "lat": latitude,
-                    "lon": longitude,
-                    "appid": self.openweather_api_key,
-                    "units": "metric"
-                }
-                
-                response = await client.get(url, params=params, timeout=10.0)
-                response.raise_for_status()
-                data = response.json()
-                
-                # Extract rainfall data (rain in last 1 hour)
-                rainfall = 0.0
-                if "rain" in data:
-                    rainfall = data["rain"].get("1h", 0.0)  # mm in last hour
-                
-                # If no current rain, check forecast for precipitation
-                if rainfall == 0.0:
-                    rainfall = await self._get_forecast_rainfall(latitude, longitude)
-                
-                return rainfall
+            rainfall = await self._cached_weather("current", cell, self._fetch_current_rainfall)
+            
+            # If no current rain, check forecast for precipitation
+            if rainfall == 0.0:
+                if forecast_task is None:
+                    return await self._get_forecast_rainfall(latitude, longitude)
+                return await forecast_task
+            
+            return rainfall, "live"
         
+        except CircuitOpenError:
+            # Provider is known to be down: serve last known good value immediately
+            return self._fallback_rainfall(latitude, longitude)
         except httpx.HTTPError as e:
             print(f"Error fetching rainfall data: {e}")
-            # Return mock data for development/testing
-            return 5.0  # Default moderate rainfall
+            return self._fallback_rainfall(latitude, longitude)
         except Exception as e:
             print(f"Unexpected error in get_rainfall_data: {e}")
-            return 5.0
+            return self._fallback_rainfall(latitude, longitude)
+        finally:
+            if forecast_task is not None:
+                forecast_task.cancel()
+    
+    def _cached_rainfall(self, latitude: float, longitude: float) -> Optional[float]:
+        """
+        Rainfall from fresh cache entries alone, or None if answering would
+        need an upstream request.
+        """
+        cell = quantize(latitude, longitude, settings.WEATHER_GRID_DEGREES)
+        rainfall = self._weather_cache.get(("current", cell))
+        if rainfall is None or rainfall != 0.0:
+            return rainfall
+        series = self._weather_cache.get(("forecast", cell))
+        return self._upcoming_rainfall(series) if series is not None else None
     
-    async def _get_forecast_rainfall(self, latitude: float, longitude: float) -> float:
+    def _fallback_rainfall(self, latitude: float, longitude: float) -> Tuple[float, str]:
+        """
+        Rainfall to use when the upstream fails, misses the deadline, or has
+        an open circuit.
+        
+        Returns:
+            Tuple of (rainfall_mm, source): the last cached value for the cell
+            ("stale"), or the default moderate rainfall ("default")
+        """
+        cell = quantize(latitude, longitude, settings.WEATHER_GRID_DEGREES)
+        stale = self._weather_cache.get_stale(("current", cell))
+        if stale is not None:
+            if stale == 0.0:
+                series = self._weather_cache.get_stale(("forecast", cell))
+                stale = self._upcoming_rainfall(series) if series is not None else 0.0
+            return stale, "stale"
+        
+        # Return mock data for development/testing
+        return 5.0, "default"  # Default moderate rainfall
+    
+    def weather_ttl_remaining(self, latitude: float, longitude: float) -> float:
+        """Seconds until the cached weather for a location's cell expires."""
+        cell = quantize(latitude, longitude, settings.WEATHER_GRID_DEGREES)
+        return min(
+            self._weather_cache.ttl_remaining(("current", cell)),
+            self._weather_cache.ttl_remaining(("forecast", cell))
+        )
+    
+    async def refresh_weather(self, latitude: float, longitude: float) -> None:
+        """
+        Re-fetch current and forecast rainfall for a location's grid cell
+        ahead of demand, so the request path finds a fresh cache entry.
+        
+        Raises:
+            CircuitOpenError: If the weather provider's circuit is open
+            httpx.HTTPError: If an upstream request fails
+        """
+        cell = quantize(latitude, longitude, settings.WEATHER_GRID_DEGREES)
+        await self._weather_cache.refresh(
+            ("current", cell),
+            lambda: self._fetch_shared_weather("current", cell, self._fetch_current_rainfall)
+        )
+        await self._weather_cache.refresh(
+            ("forecast", cell),
+            lambda: self._fetch_shared_weather("forecast", cell, self._fetch_forecast_series)
+        )
+    
+    async def _cached_weather(
+        self,
+        kind: str,
+        cell: Tuple[float, float],
+        fetch: Callable[[float, float], Awaitable[Any]]
+    ) -> Any:
+        """
+        Weather for a grid cell from this worker's cache, then the shared
+        store (filled by whichever worker fetched or prefetched the cell),
+        then the upstream.
+        
+        Raises:
+            CircuitOpenError: If the weather provider's circuit is open
+            httpx.HTTPError: If an upstream request fails
+        """
+        key = (kind, cell)
+        if self._weather_store is not None and self._weather_cache.get(key) is None:
+            shared = await asyncio.to_thread(self._weather_store.get, kind, *cell)
+            if shared is not None:
+                payload, ttl = shared
+                self._weather_cache.set(key, self._decode_weather(kind, payload), ttl_seconds=ttl)
+        return await self._weather_cache.get_or_load(key, lambda: self._fetch_shared_weather(kind, cell, fetch))
+    
+    async def _fetch_shared_weather(
+        self,
+        kind: str,
+        cell: Tuple[float, float],
+        fetch: Callable[[float, float], Awaitable[Any]]
+    ) -> Any:
+        """Fetch weather for a grid cell upstream and share it with the other workers."""
+        value = await self._breakers["openweather"].call(fetch, *cell)
+        if self._weather_store is not None:
+            await asyncio.to_thread(
+                self._weather_store.put, kind, *cell,
+                self._encode_weather(kind, value), settings.WEATHER_CACHE_TTL_SECONDS
+            )
+        return value
+    
+    @staticmethod
+    def _encode_weather(kind: str, value: Any) -> str:
+        if kind == "forecast":
+            return json.dumps({"times": value.times.tolist(), "rain_3h": value.rain_3h.tolist()})
+        return json.dumps(value)
+    
+    @staticmethod
+    def _decode_weather(kind: str, payload: str) -> Any:
+        data = json.loads(payload)
+        if kind == "forecast":
+            return ForecastSeries(
+                times=np.array(data["times"], dtype=np.float64),
+                rain_3h=np.array(data["rain_3h"], dtype=np.float64)
+            )
+        return data
+    
+    async def _fetch_current_rainfall(self, latitude: float, longitude: float) -> float:
+        """
+        Request current rainfall from the OpenWeatherMap weather endpoint.
+        
+        Raises:
+            httpx.HTTPError: If the upstream request fails
+        """
+        async with self._http_client("openweather") as client:
+            url = f"{self.openweather_base_url}/weather"
+            params = {
+                "lat": latitude,
+                "lon": longitude,
+                "appid": self.openweather_api_key,
+                "units": "metric"
+            }
+            
+            response = await client.get(url, params=params)
+            response.raise_for_status()
+            data = response.json()
+            
+            # Extract rainfall data (rain in last 1 hour)
+            rainfall = 0.0
+            if "rain" in data:
+                rainfall = data["rain"].get("1h", 0.0)  # mm in last hour
+            
+            return rainfall
+    
+    async def _get_forecast_rainfall(self, latitude: float, longitude: float) -> Tuple[float, str]:
         """
         Get forecasted rainfall from OpenWeatherMap forecast API.
         
@@ -86,39 +386,137 @@ class FloodRiskService:
             longitude: Location longitude
         
         Returns:
-            Predicted rainfall in mm
+            Tuple of (rainfall_mm, source): predicted rainfall (average per 3
+            hours over the next 12 hours) from a "live" or "stale" series, or
+            the result of _fallback_rainfall when no series is available
+        """
+        series, source = await self.get_forecast_series(latitude, longitude)
+        if series is None:
+            return self._fallback_rainfall(latitude, longitude)
+        return self._upcoming_rainfall(series), source
+    
+    async def get_forecast_series(
+        self,
+        latitude: float,
+        longitude: float
+    ) -> Tuple[Optional[ForecastSeries], str]:
+        """
+        Get the full cached forecast series for a location's grid cell.
+        
+        Args:
+            latitude: Location latitude
+            longitude: Location longitude
+        
+        Returns:
+            Tuple of (series, source) where source is "live", "stale", or
+            "unavailable" (series is None)
         """
+        cell = quantize(latitude, longitude, settings.WEATHER_GRID_DEGREES)
         try:
-            async with httpx.AsyncClient() as client:
-                url = f"{self.openweather_base_url}/forecast"
-                params = {
-                    "lat": latitude,
-                    "lon": longitude,
-                    "appid": self.openweather_api_key,
-                    "units": "metric",
-                    "cnt": 8  # Next 24 hours (3-hour intervals)
-                }
-                
-                response = await client.get(url, params=params, timeout=10.0)
-                response.raise_for_status()
-                data = response.json()
-                
-                # Sum up rainfall from next few hours
-                total_rainfall = 0.0
-                if "list" in data:
-                    for forecast in data["list"][:4]:  # Next 12 hours
-                        if "rain" in forecast:
-                            total_rainfall += forecast["rain"].get("3h", 0.0)
-                
-                return total_rainfall / 4 if total_rainfall > 0 else 0.0  # Average per 3 hours
+            series = await self._cached_weather("forecast", cell, self._fetch_forecast_series)
+            return series, "live"
         
+        except CircuitOpenError:
+            pass
         except Exception as e:
             print(f"Error fetching forecast data: {e}")
-            return 0.0
+        
+        stale = self._weather_cache.get_stale(("forecast", cell))
+        return (stale, "stale") if stale is not None else (None, "unavailable")
+    
+    @staticmethod
+    def _upcoming_rainfall(series: ForecastSeries, slots: int = 4) -> float:
+        """Average 3-hour rainfall over the next few forecast slots (next 12 hours)."""
+        upcoming = series.rain_3h[series.times > time.time()][:slots]
+        total_rainfall = float(upcoming.sum())
+        return total_rainfall / slots if total_rainfall > 0 else 0.0  # Average per 3 hours
+    
+    async def _fetch_forecast_series(self, latitude: float, longitude: float) -> ForecastSeries:
+        """
+        Request the complete 5-day / 3-hour forecast from OpenWeatherMap.
+        
+        Raises:
+            httpx.HTTPError: If the upstream request fails
+        """
+        async with self._http_client("openweather") as client:
+            url = f"{self.openweather_base_url}/forecast"
+            params = {
+                "lat": latitude,
+                "lon": longitude,
+                "appid": self.openweather_api_key,
+                "units": "metric"
+            }
+            
+            response = await client.get(url, params=params)
+            response.raise_for_status()
+            data = response.json()
+            
+            slots = data.get("list", [])
+            return ForecastSeries(
+                times=np.array([slot["dt"] for slot in slots], dtype=np.float64),
+                rain_3h=np.array(
+                    [slot.get("rain", {}).get("3h", 0.0) for slot in slots],
+                    dtype=np.float64
+                )
+            )
+    
+    async def calculate_hourly_forecast(
+        self,
+        latitude: float,
+        longitude: float,
+        hours: int,
+        elevation_m: float,
+        fallback_rainfall_mm: float
+    ) -> Dict:
+        """
+        Hourly flood risk for the next `hours` hours in one vectorized pass.
+        
+        Each hour takes the rainfall of the forecast slot covering it and is
+        scored with calculate_risk_scores. If no forecast is available, the
+        current rainfall is used for every hour.
+        
+        Args:
+            latitude: Location latitude
+            longitude: Location longitude
+            hours: Number of hours to forecast
+            elevation_m: Elevation of the location in meters
+            fallback_rainfall_mm: Rainfall to assume if no forecast is available
+        
+        Returns:
+            Dictionary with arrays (timestamps, rainfall_mm, risk_score,
+            severity) and the forecast source
+        """
+        series, source = await self.get_forecast_series(latitude, longitude)
+        
+        now = time.time()
+        timestamps = now + 3600.0 * np.arange(1, hours + 1)
+        
+        if series is not None and len(series.times):
+            # Slot i covers (times[i] - 3h, times[i]]
+            slot_idx = np.searchsorted(series.times, timestamps, side="left")
+            slot_idx = np.minimum(slot_idx, len(series.times) - 1)
+            rainfall = series.rain_3h[slot_idx]
+        else:
+            rainfall = np.full(hours, fallback_rainfall_mm, dtype=np.float64)
+            source = "unavailable"
+        
+        risk_scores, severities = self.calculate_risk_scores(rainfall, np.full(hours, elevation_m))
+        
+        return {
+            "timestamps": timestamps,
+            "rainfall_mm": rainfall,
+            "risk_score": risk_scores,
+            "severity": severities,
+            "source": source
+        }
     
     async def get_elevation_data(self, latitude: float, longitude: float) -> float:
         """
-        Fetch elevation data from Google Elevation API or use mock data.
+        Fetch elevation data from the offline DEM, the Google Elevation API,
+        or mock data, in that order.
+        
+        Provider results are written to the persistent elevation store, so
+        each grid cell is fetched from the API at most once.
         
         Args:
             latitude: Location latitude
@@ -127,39 +525,141 @@ class FloodRiskService:
         Returns:
             Elevation in meters above sea level
         """
+        elevations = await self.get_elevation_many([(latitude, longitude)])
+        return elevations[0]
+    
+    async def get_elevation_many(self, points: List[Tuple[float, float]]) -> List[float]:
+        """
+        Fetch elevations for many coordinates at once.
+        
+        Points covered by the offline DEM are sampled in one vectorized pass.
+        Stored cells are answered locally; the remaining cells are requested
+        through the micro-batcher, which packs concurrent lookups into
+        multi-location Google Elevation calls.
+        
+        Args:
+            points: List of (latitude, longitude) tuples
+        
+        Returns:
+            Elevations in meters, in the same order as points
+        """
+        readings = await self._get_elevation_readings(points)
+        return [elevation for elevation, _ in readings]
+    
+    async def _get_elevation_readings(self, points: List[Tuple[float, float]]) -> List[Tuple[float, str]]:
+        """
+        Resolve elevations together with where each value came from.
+        
+        Returns:
+            List of (elevation_m, source) tuples; source is one of "dem",
+            "store", "google", "mock", or "fallback" (mock used because the
+            API failed)
+        """
+        readings: List[Optional[Tuple[float, str]]] = [None] * len(points)
+        if self._dem is not None and points:
+            lats, lons = zip(*points)
+            sampled = self._dem.sample(lats, lons)
+            readings = [None if np.isnan(z) else (float(z), "dem") for z in sampled]
+        
         # If Google API key is not configured, use mock elevation
         if not self.google_elevation_api_key or self.google_elevation_api_key == "your_google_elevation_api_key_here":
-            return self._mock_elevation(latitude, longitude)
+            return [
+                reading if reading is not None else (self._mock_elevation(lat, lon), "mock")
+                for reading, (lat, lon) in zip(readings, points)
+            ]
         
-        try:
-            async with httpx.AsyncClient() as client:
-                params = {
-                    "locations": f"{latitude},{longitude}",
-                    "key": self.google_elevation_api_key
-                }
-                
-                response = await client.get(
-                    self.google_elevation_base_url,
-                    params=params,
-                    timeout=10.0
-                )
-                response.raise_for_status()
-                data = response.json()
-                
-                if data.get("status") == "OK" and data.get("results"):
-                    elevation = data["results"][0]["elevation"]
-                    return elevation
+        unresolved = [i for i in range(len(points)) if readings[i] is None]
+        stored = [None] * len(unresolved)
+        if unresolved and self._elevation_store is not None:
+            # SQLite blocks (busy timeout, disk I/O): keep it off the event loop
+            stored = await asyncio.to_thread(self._elevation_store.get_many, [points[i] for i in unresolved])
+        
+        missing: Dict[Tuple[float, float], List[int]] = {}
+        for i, value in zip(unresolved, stored):
+            if value is not None:
+                readings[i] = (value, "store")
+            else:
+                # Sample the cell centre so the stored value is the same for every caller
+                lat, lon = points[i]
+                cell = quantize(lat, lon, settings.ELEVATION_GRID_DEGREES)
+                missing.setdefault(cell, []).append(i)
+        
+        if missing:
+            cells = list(missing)
+            results = await asyncio.gather(
+                *[self._elevation_batcher.submit(cell) for cell in cells],
+                return_exceptions=True
+            )
+            fetched = []
+            for cell, result in zip(cells, results):
+                if isinstance(result, Exception):
+                    if not isinstance(result, CircuitOpenError):
+                        print(f"Error fetching elevation data: {result}")
                 else:
-                    return self._mock_elevation(latitude, longitude)
+                    fetched.append((cell[0], cell[1], result, "google"))
+                
+                for i in missing[cell]:
+                    lat, lon = points[i]
+                    readings[i] = (
+                        (self._mock_elevation(lat, lon), "fallback")
+                        if isinstance(result, Exception) else (result, "google")
+                    )
+            
+            if fetched and self._elevation_store is not None:
+                await asyncio.to_thread(self._elevation_store.put_many, fetched)
         
-        except Exception as e:
-            print(f"Error fetching elevation data: {e}")
-            return self._mock_elevation(latitude, longitude)
+        return readings
+    
+    async def _local_elevation(self, latitude: float, longitude: float) -> float:
+        """
+        Elevation from local sources only (DEM, store, then mock).
+        Used when the Elevation API cannot answer before the request deadline.
+        """
+        if self._dem is not None:
+            sampled = self._dem.sample([latitude], [longitude])[0]
+            if not np.isnan(sampled):
+                return float(sampled)
+        
+        if self._elevation_store is not None:
+            stored = await asyncio.to_thread(self._elevation_store.get, latitude, longitude)
+            if stored is not None:
+                return stored
+        
+        return self._mock_elevation(latitude, longitude)
+    
+    async def _fetch_elevations(self, locations: List[Tuple[float, float]]) -> List[float]:
+        """
+        Request elevations for several locations in one Google Elevation call.
+        
+        Raises:
+            httpx.HTTPError: If the upstream request fails
+            ValueError: If the API does not return one result per location
+        """
+        async with self._http_client("google_elevation") as client:
+            params = {
+                "locations": "|".join(f"{lat},{lon}" for lat, lon in locations),
+                "key": self.google_elevation_api_key
+            }
+            
+            response = await client.get(
+                self.google_elevation_base_url,
+                params=params
+            )
+            response.raise_for_status()
+            data = response.json()
+            
+            results = data.get("results") or []
+            if data.get("status") != "OK" or len(results) != len(locations):
+                raise ValueError(f"Elevation API returned status {data.get('status')}")
+            
+            return [result["elevation"] for result in results]
     
     def _mock_elevation(self, latitude: float, longitude: float) -> float:
         """
         Generate mock elevation data based on coordinates.
-        For MVP/development use when Google API is not configured.
+        For MVP/development use when neither a DEM nor the Google API is
+        configured. Uses a stable checksum (not the per-process salted
+        hash()) so every worker returns the same value for a point.
         
         Args:
             latitude: Location latitude
@@ -171,7 +671,7 @@ class FloodRiskService:
         # Simple heuristic: use latitude to vary elevation
         # Coastal areas (near equator) tend to be lower
         base_elevation = abs(latitude) * 10  # 0-900m range
-        variation = (hash(f"{latitude},{longitude}") % 100) - 50  # -50 to +50m
+        variation = (zlib.crc32(f"{latitude},{longitude}".encode()) % 100) - 50  # -50 to +50m
         return max(0, base_elevation + variation)
     
     def calculate_risk_score(
@@ -205,44 +705,53 @@ class FloodRiskService:
             Tuple of (risk_score, severity_level)
         """
         # Calculate rainfall contribution (0-60 points)
-        if rainfall_mm < 5:
-            rainfall_score = 10
-        elif rainfall_mm < 15:
-            rainfall_score = 20
-        elif rainfall_mm < 30:
-            rainfall_score = 35
-        elif rainfall_mm < 50:
-            rainfall_score = 50
-        else:
-            rainfall_score = 60
+        rainfall_score = RAINFALL_SCORES[bisect.bisect_right(RAINFALL_THRESHOLDS_MM, rainfall_mm)]
         
         # Calculate elevation contribution (0-40 points)
         # Lower elevation = higher risk
-        if elevation_m < 10:
-            elevation_score = 40
-        elif elevation_m < 50:
-            elevation_score = 30
-        elif elevation_m < 100:
-            elevation_score = 20
-        elif elevation_m < 200:
-            elevation_score = 10
-        else:
-            elevation_score = 5
+        elevation_score = ELEVATION_SCORES[bisect.bisect_right(ELEVATION_THRESHOLDS_M, elevation_m)]
         
         # Total risk score (0-100)
         total_score = rainfall_score + elevation_score
         
-        # Determine severity level
-        if total_score <= 25:
-            severity = SeverityLevel.LOW
-        elif total_score <= 50:
-            severity = SeverityLevel.MEDIUM
-        elif total_score <= 75:
-            severity = SeverityLevel.HIGH
-        else:
-            severity = SeverityLevel.CRITICAL
+        return total_score, self.calculate_severity(total_score)
+    
+    def calculate_severity(self, risk_score: float) -> str:
+        """
+        Classify a risk score into a severity level.
+        
+        Args:
+            risk_score: Risk score (0-100)
+        
+        Returns:
+            Severity level (Low, Medium, High, Critical)
+        """
+        return SEVERITY_LEVELS[bisect.bisect_left(SEVERITY_UPPER_BOUNDS, risk_score)]
+    
+    def calculate_risk_scores(
+        self,
+        rainfall_mm: np.ndarray,
+        elevation_m: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorized calculate_risk_score for arrays of points.
+        
+        Uses the same threshold tables as the scalar path, so results match
+        calculate_risk_score element for element.
+        
+        Args:
+            rainfall_mm: Array of rainfall amounts in millimeters
+            elevation_m: Array of elevations in meters
+        
+        Returns:
+            Tuple of (risk_scores, severity_levels) arrays
+        """
+        rainfall_idx = np.searchsorted(RAINFALL_THRESHOLDS_MM, rainfall_mm, side="right")
+        elevation_idx = np.searchsorted(ELEVATION_THRESHOLDS_M, elevation_m, side="right")
+        total_scores = np.take(RAINFALL_SCORES, rainfall_idx) + np.take(ELEVATION_SCORES, elevation_idx)
         
-        return total_score, severity.value
+        severity_idx = np.searchsorted(SEVERITY_UPPER_BOUNDS, total_scores, side="left")
+        return total_scores, np.take(np.array(SEVERITY_LEVELS, dtype=object), severity_idx)
     
     async def calculate_flood_risk(
         self,
@@ -254,6 +763,11 @@ class FloodRiskService:
         """
         Complete flood risk calculation for a location.
         
+        Rainfall and elevation are fetched concurrently under a single
+        deadline (RISK_REQUEST_DEADLINE_SECONDS). Sources that miss the
+        deadline or fail fall back to cached, local or default values and
+        are listed in "degraded_sources".
+        
         Args:
             latitude: Location latitude
             longitude: Location longitude
@@ -263,9 +777,39 @@ class FloodRiskService:
         Returns:
             Dictionary with risk calculation results
         """
-        # Fetch data from APIs or use overrides
-        rainfall = rainfall_override if rainfall_override is not None else await self.get_rainfall_data(latitude, longitude)
-        elevation = elevation_override if elevation_override is not None else await self.get_elevation_data(latitude, longitude)
+        # Fetch data from APIs concurrently, unless overridden
+        rainfall_task = None
+        elevation_task = None
+        if rainfall_override is None:
+            rainfall_task = asyncio.ensure_future(self._get_rainfall_reading(latitude, longitude))
+        if elevation_override is None:
+            elevation_task = asyncio.ensure_future(self._get_elevation_readings([(latitude, longitude)]))
+        
+        pending_tasks = [task for task in (rainfall_task, elevation_task) if task is not None]
+        if pending_tasks:
+            _, pending = await asyncio.wait(pending_tasks, timeout=settings.RISK_REQUEST_DEADLINE_SECONDS)
+            for task in pending:
+                task.cancel()
+        
+        if rainfall_task is None:
+            rainfall, rainfall_source = rainfall_override, "override"
+        elif rainfall_task.done() and not rainfall_task.cancelled() and rainfall_task.exception() is None:
+            rainfall, rainfall_source = rainfall_task.result()
+        else:
+            rainfall, rainfall_source = self._fallback_rainfall(latitude, longitude)
+        
+        if elevation_task is None:
+            elevation, elevation_source = elevation_override, "override"
+        elif elevation_task.done() and not elevation_task.cancelled() and elevation_task.exception() is None:
+            elevation, elevation_source = elevation_task.result()[0]
+        else:
+            elevation, elevation_source = await self._local_elevation(latitude, longitude), "fallback"
+        
+        degraded_sources = []
+        if rainfall_source in ("stale", "default"):
+            degraded_sources.append("rainfall")
+        if elevation_source == "fallback":
+            degraded_sources.append("elevation")
         
         # Calculate risk score
         risk_score, severity = self.calculate_risk_score(rainfall, elevation)
@@ -281,9 +825,93 @@ class FloodRiskService:
                 "explanation": f"Risk is {'elevated' if risk_score > 50 else 'moderate' if risk_score > 25 else 'low'} due to "
                               f"{'heavy' if rainfall > 30 else 'moderate' if rainfall > 15 else 'light'} rainfall "
                               f"and {'low' if elevation < 50 else 'moderate' if elevation < 100 else 'high'} elevation."
-            }
+            },
+            "data_sources": {
+                "rainfall": rainfall_source,
+                "elevation": elevation_source
+            },
+            "degraded_sources": degraded_sources
+        }
+    
+    async def calculate_flood_risk_batch(
+        self,
+        points: List[Tuple[float, float]],
+        rainfall_overrides: Optional[List[Optional[float]]] = None,
+        elevation_overrides: Optional[List[Optional[float]]] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Score many locations in one pass.
+        
+        Missing rainfall is looked up once per weather grid cell and missing
+        elevation through get_elevation_many; scoring is fully vectorized.
+        Cells with fresh cached weather cost nothing. Of the rest, the
+        RISK_BATCH_MAX_WEATHER_FETCHES cells holding the most points are
+        fetched, at most RISK_BATCH_MAX_CONCURRENCY at a time; points in
+        the remaining cells get fallback rainfall and are flagged degraded.
+        
+        Args:
+            points: List of (latitude, longitude) tuples
+            rainfall_overrides: Optional per-point rainfall values (None = fetch)
+            elevation_overrides: Optional per-point elevation values (None = fetch)
+        
+        Returns:
+            Dictionary of arrays: rainfall_mm, elevation_m, risk_score,
+            severity, and rainfall_degraded (True where rainfall is a fallback)
+        """
+        count = len(points)
+        rainfall = list(rainfall_overrides) if rainfall_overrides else [None] * count
+        elevation = list(elevation_overrides) if elevation_overrides else [None] * count
+        degraded = np.zeros(count, dtype=bool)
+        
+        # One rainfall lookup per weather cell shared by all its points
+        cells: Dict[Tuple[float, float], List[int]] = {}
+        for i, (lat, lon) in enumerate(points):
+            if rainfall[i] is None:
+                cells.setdefault(quantize(lat, lon, settings.WEATHER_GRID_DEGREES), []).append(i)
+        
+        uncached = []
+        for cell, indices in cells.items():
+            value = self._cached_rainfall(*cell)
+            if value is None:
+                uncached.append(cell)
+            else:
+                for i in indices:
+                    rainfall[i] = value
+        
+        uncached.sort(key=lambda cell: len(cells[cell]), reverse=True)
+        budget = max(settings.RISK_BATCH_MAX_WEATHER_FETCHES, 0)
+        fetch, skipped = uncached[:budget], uncached[budget:]
+        
+        semaphore = asyncio.Semaphore(max(settings.RISK_BATCH_MAX_CONCURRENCY, 1))
+        
+        async def fetch_cell(lat: float, lon: float) -> Tuple[float, str]:
+            async with semaphore:
+                return await self._get_rainfall_reading(lat, lon)
+        
+        readings = await asyncio.gather(*[fetch_cell(lat, lon) for lat, lon in fetch])
+        readings += [self._fallback_rainfall(lat, lon) for lat, lon in skipped]
+        for cell, (value, source) in zip(fetch + skipped, readings):
+            for i in cells[cell]:
+                rainfall[i] = value
+                degraded[i] = source in ("stale", "default")
+        
+        missing_elevation = [i for i in range(count) if elevation[i] is None]
+        if missing_elevation:
+            fetched = await self.get_elevation_many([points[i] for i in missing_elevation])
+            for i, value in zip(missing_elevation, fetched):
+                elevation[i] = value
+        
+        rainfall_arr = np.asarray(rainfall, dtype=np.float64)
+        elevation_arr = np.asarray(elevation, dtype=np.float64)
+        risk_scores, severities = self.calculate_risk_scores(rainfall_arr, elevation_arr)
+        
+        return {
+            "rainfall_mm": rainfall_arr,
+            "elevation_m": elevation_arr,
+            "risk_score": risk_scores,
+            "severity": severities,
+            "rainfall_degraded": degraded
         }
-
 
 # Global service instance
 flood_risk_service = FloodRiskService()
@@ -0,0 +1,381 @@
+"""
+In-memory columnar store of flood event points for heatmap binning.
+Aggregates events into zoom-dependent grid cells with numpy so the map
+payload depends on the viewport size, not on the number of events.
+"""
+
+import time
+from datetime import datetime, timezone
+from typing import Iterable, List, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from .. import models
+from ..config import settings
+from .cache import TTLCache
+from .subscription_index import severity_rank
+
+# Web map tiles are 256 px wide at every zoom level
+TILE_PIXELS = 256
+
+# Rows fetched per query when loading the store
+LOAD_BATCH_SIZE = 50000
+
+
+class HeatmapBins(NamedTuple):
+    """Aggregated grid cells (parallel arrays, one entry per non-empty cell)."""
+    latitude: np.ndarray  # Cell centre
+    longitude: np.ndarray
+    count: np.ndarray
+    max_intensity: np.ndarray  # 0-1 (risk score / 100)
+    mean_intensity: np.ndarray
+
+
+def cell_degrees_for_zoom(zoom: int, cell_pixels: int) -> float:
+    """Width in degrees of a grid cell that covers cell_pixels on screen at a zoom level."""
+    return 360.0 / (2 ** zoom) * cell_pixels / TILE_PIXELS
+
+
+def unix_seconds(timestamp: datetime) -> float:
+    """Unix seconds of a stored timestamp (naive timestamps are UTC)."""
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.timestamp()
+
+
+def bin_points(
+    latitude: np.ndarray,
+    longitude: np.ndarray,
+    intensity: np.ndarray,
+    cell_degrees: float
+) -> HeatmapBins:
+    """
+    Aggregate points into a fixed-degree grid in one vectorized pass.
+
+    Returns:
+        HeatmapBins sorted by (row, column) cell index
+    """
+    if len(latitude) == 0:
+        empty = np.empty(0)
+        return HeatmapBins(empty, empty, np.empty(0, dtype=np.int64), empty, empty)
+
+    rows = np.floor(latitude / cell_degrees).astype(np.int64)
+    cols = np.floor(longitude / cell_degrees).astype(np.int64)
+    # Up to zoom 22 a row or column span fits in 32 bits, so the pair packs into one int64
+    keys = (rows << 32) + (cols - cols.min())
+    cells, inverse = np.unique(keys, return_inverse=True)
+
+    count = np.bincount(inverse)
+    total = np.bincount(inverse, weights=intensity)
+    peak = np.zeros(len(cells))
+    np.maximum.at(peak, inverse, intensity)
+
+    cell_rows = cells >> 32
+    cell_cols = (cells & 0xFFFFFFFF) + cols.min()
+    return HeatmapBins(
+        latitude=(cell_rows + 0.5) * cell_degrees,
+        longitude=(cell_cols + 0.5) * cell_degrees,
+        count=count,
+        max_intensity=peak,
+        mean_intensity=total / count
+    )
+
+
+def merge_bins(first: HeatmapBins, second: HeatmapBins, cell_degrees: float) -> HeatmapBins:
+    """
+    Combine two binnings of disjoint point sets on the same grid.
+
+    Costs O(cells), so appended points can be folded into cached bins
+    without re-binning every point.
+    """
+    if len(second.count) == 0:
+        return first
+    if len(first.count) == 0:
+        return second
+
+    latitude = np.concatenate((first.latitude, second.latitude))
+    longitude = np.concatenate((first.longitude, second.longitude))
+    count = np.concatenate((first.count, second.count))
+    total = np.concatenate((first.mean_intensity * first.count, second.mean_intensity * second.count))
+    peak_in = np.concatenate((first.max_intensity, second.max_intensity))
+
+    # Cell centres sit half a cell inside their cell, so floor recovers the index exactly
+    rows = np.floor(latitude / cell_degrees).astype(np.int64)
+    cols = np.floor(longitude / cell_degrees).astype(np.int64)
+    keys = (rows << 32) + (cols - cols.min())
+    cells, first_index, inverse = np.unique(keys, return_index=True, return_inverse=True)
+
+    merged_count = np.bincount(inverse, weights=count).astype(np.int64)
+    peak = np.zeros(len(cells))
+    np.maximum.at(peak, inverse, peak_in)
+    return HeatmapBins(
+        latitude=latitude[first_index],
+        longitude=longitude[first_index],
+        count=merged_count,
+        max_intensity=peak,
+        mean_intensity=np.bincount(inverse, weights=total) / merged_count
+    )
+
+
+class _CachedBins:
+    """Bins for one (zoom, time window) and how much of the store they cover."""
+    __slots__ = ("bins", "rows", "cutoff")
+
+    def __init__(self, bins: HeatmapBins, rows: int, cutoff: float):
+        self.bins = bins
+        self.rows = rows  # Store rows [0, rows) are folded in
+        self.cutoff = cutoff  # Oldest timestamp included (-inf = all)
+
+
+class HeatmapStore:
+    """
+    Flood event coordinates, intensities and timestamps held as numpy arrays.
+
+    Binned results are cached per (zoom, time window), so polling clients at
+    the same zoom share one aggregation. Writes never clear the cache:
+    appended events are buffered and folded into the arrays and into each
+    cached binning on the next read (bins for the new rows only, merged
+    cell by cell), and a removal drops only the binnings whose time window
+    held a removed event. Viewport clipping runs on the cached cells.
+
+    The write path updates the store after each commit. Because other
+    workers write too, it is refreshed whenever it is older than
+    `refresh_seconds` (see rebuild_if_stale): after the first full load,
+    a refresh reads only the events and delete tombstones stamped with a
+    data version newer than the last one seen.
+    """
+
+    def __init__(self, refresh_seconds: float, cell_pixels: int, cache_ttl_seconds: float, cache_max_entries: int):
+        self.refresh_seconds = refresh_seconds
+        self.cell_pixels = cell_pixels
+        self.version = 0
+        self._ids = np.empty(0, dtype=np.int64)
+        self._latitude = np.empty(0)
+        self._longitude = np.empty(0)
+        self._intensity = np.empty(0)
+        self._timestamps = np.empty(0)
+        self._severity = np.empty(0, dtype=np.int8)  # Rank: Low=0 .. Critical=3
+        self._pending: List[Tuple[np.ndarray, ...]] = []  # Appended columns not yet merged
+        self._synced_version = 0  # Flood event data version the store has caught up with
+        self._loaded_at: Optional[float] = None
+        self._bins = TTLCache(ttl_seconds=cache_ttl_seconds, max_entries=cache_max_entries)
+
+    def __len__(self) -> int:
+        return len(self._ids) + sum(len(columns[0]) for columns in self._pending)
+
+    @property
+    def is_loaded(self) -> bool:
+        """True once the store has been loaded from the database."""
+        return self._loaded_at is not None
+
+    @property
+    def is_stale(self) -> bool:
+        """True if the store has never been loaded or is due for a refresh."""
+        return self._loaded_at is None or time.monotonic() - self._loaded_at >= self.refresh_seconds
+
+    async def rebuild(self, db: AsyncSession) -> None:
+        """
+        Catch up with the database: every event on the first load, then only
+        events and deletes after the last data version seen.
+        """
+        # Writers commit versions in increasing order, so everything up to the
+        # version read here is visible to the queries below
+        version = (await db.execute(
+            select(models.DataVersion.version)
+            .where(models.DataVersion.name == models.FLOOD_EVENTS_DATA_SET)
+        )).scalar() or 0
+
+        event = models.FloodEvent
+        if not self.is_loaded:
+            self.load(await self._fetch_rows(db), version)
+            return
+
+        tombstone = models.FloodEventTombstone
+        deleted = (await db.execute(
+            select(tombstone.flood_event_id)
+            .where(tombstone.version > self._synced_version, tombstone.version <= version)
+        )).scalars().all()
+        rows = await self._fetch_rows(db, event.version > self._synced_version, event.version <= version)
+
+        self.remove(deleted)
+        self._merge()
+        # Events written by this worker were added by the write path already
+        deleted_ids = set(deleted)
+        row_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        known = np.isin(row_ids, self._ids)
+        self._append([row for row, seen in zip(rows, known.tolist()) if not seen and row[0] not in deleted_ids])
+        self._synced_version = max(self._synced_version, version)
+        self._loaded_at = time.monotonic()
+
+    @staticmethod
+    async def _fetch_rows(db: AsyncSession, *criteria) -> List[Tuple]:
+        """Point data of the events matching criteria, paged in id order."""
+        event = models.FloodEvent
+        rows = []
+        last_id = 0
+        while True:
+            batch = (await db.execute(
+                select(event.id, event.latitude, event.longitude, event.risk_score, event.timestamp, event.severity)
+                .where(event.id > last_id, *criteria)
+                .order_by(event.id)
+                .limit(LOAD_BATCH_SIZE)
+            )).all()
+            if not batch:
+                break
+            rows.extend(batch)
+            last_id = batch[-1].id
+        return rows
+
+    def load(self, rows: Sequence[Tuple[int, float, float, float, datetime, str]], data_version: int = 0) -> None:
+        """
+        Replace the store contents with (id, latitude, longitude, risk_score,
+        timestamp, severity) rows, current as of a flood event data version.
+        """
+        self._pending = []
+        self._set_columns(self._columns(rows))
+        self._synced_version = data_version
+        self._loaded_at = time.monotonic()
+        self._bins.clear()
+        self.version += 1
+
+    def add(self, flood_events: Iterable[models.FloodEvent]) -> None:
+        """Append committed flood events (merged into the arrays on the next read)."""
+        self._append([
+            (event.id, event.latitude, event.longitude, event.risk_score, event.timestamp, event.severity)
+            for event in flood_events
+        ])
+
+    def _append(self, rows: Sequence[Tuple]) -> None:
+        columns = self._columns(rows)
+        if len(columns[0]) == 0:
+            return
+        self._pending.append(columns)
+        self.version += 1
+
+    def remove(self, flood_ids: Iterable[int]) -> None:
+        """Drop deleted flood events (ids not in the store are ignored)."""
+        self._merge()
+        removed = np.flatnonzero(np.isin(self._ids, np.fromiter(flood_ids, dtype=np.int64)))
+        if len(removed) == 0:
+            return
+
+        # Keep binnings that never counted a removed event; shift their row offsets
+        for key in self._bins.keys():
+            entry = self._bins.get_stale(key)
+            covered = removed[removed < entry.rows]
+            if np.any(self._timestamps[covered] >= entry.cutoff):
+                self._bins.pop(key)
+            else:
+                entry.rows -= len(covered)
+
+        keep = np.ones(len(self._ids), dtype=bool)
+        keep[removed] = False
+        self._set_columns([column[keep] for column in self._get_columns()])
+        self.version += 1
+
+    def points_in(self, south: float, west: float, north: float, east: float) -> Tuple[np.ndarray, ...]:
+        """
+        Events inside a latitude/longitude box.
+
+        Returns:
+            Tuple of (ids, latitude, longitude, intensity, severity rank) arrays
+        """
+        self._merge()
+        inside = (
+            (self._latitude >= south) & (self._latitude <= north)
+            & (self._longitude >= west) & (self._longitude <= east)
+        )
+        return (
+            self._ids[inside],
+            self._latitude[inside],
+            self._longitude[inside],
+            self._intensity[inside],
+            self._severity[inside]
+        )
+
+    def bins(self, zoom: int, hours: Optional[int] = None) -> HeatmapBins:
+        """
+        Aggregate events into grid cells sized for a zoom level.
+
+        Args:
+            zoom: Web map zoom level
+            hours: Only include events from the last N hours (None = all)
+
+        Returns:
+            Cached HeatmapBins covering the whole map
+        """
+        self._merge()
+        key = (zoom, hours)
+        cell_degrees = cell_degrees_for_zoom(zoom, self.cell_pixels)
+        entry = self._bins.get(key)
+        if entry is None:
+            cutoff = -np.inf if hours is None else time.time() - hours * 3600.0
+            entry = _CachedBins(self._bin_rows(0, cutoff, cell_degrees), len(self._ids), cutoff)
+            self._bins.set(key, entry)
+        elif entry.rows < len(self._ids):
+            # Fold in only the rows appended since this binning was built
+            entry.bins = merge_bins(entry.bins, self._bin_rows(entry.rows, entry.cutoff, cell_degrees), cell_degrees)
+            entry.rows = len(self._ids)
+        return entry.bins
+
+    def _bin_rows(self, start: int, cutoff: float, cell_degrees: float) -> HeatmapBins:
+        """Bin store rows [start:] with a timestamp at or after cutoff."""
+        recent = self._timestamps[start:] >= cutoff
+        return bin_points(
+            self._latitude[start:][recent],
+            self._longitude[start:][recent],
+            self._intensity[start:][recent],
+            cell_degrees
+        )
+
+    def _merge(self) -> None:
+        """Concatenate buffered appends into the columns (once per burst of writes)."""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        self._set_columns([
+            np.concatenate((current, *new)) for current, *new in zip(self._get_columns(), *pending)
+        ])
+
+    @staticmethod
+    def _columns(rows) -> Tuple[np.ndarray, ...]:
+        return (
+            np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows)),
+            np.fromiter((row[1] for row in rows), dtype=np.float64, count=len(rows)),
+            np.fromiter((row[2] for row in rows), dtype=np.float64, count=len(rows)),
+            np.fromiter((row[3] / 100.0 for row in rows), dtype=np.float64, count=len(rows)),
+            np.fromiter((unix_seconds(row[4]) for row in rows), dtype=np.float64, count=len(rows)),
+            np.fromiter((severity_rank(row[5]) for row in rows), dtype=np.int8, count=len(rows))
+        )
+
+    def _get_columns(self) -> Tuple[np.ndarray, ...]:
+        return self._ids, self._latitude, self._longitude, self._intensity, self._timestamps, self._severity
+
+    def _set_columns(self, columns: Sequence[np.ndarray]) -> None:
+        self._ids, self._latitude, self._longitude, self._intensity, self._timestamps, self._severity = columns
+
+
+def clip_bins(bins: HeatmapBins, bbox: Optional[Tuple[float, float, float, float]]) -> HeatmapBins:
+    """
+    Keep the cells whose centre lies inside a (south, west, north, east) box.
+
+    A box with west > east crosses the antimeridian.
+    """
+    if bbox is None:
+        return bins
+    south, west, north, east = bbox
+    inside = (bins.latitude >= south) & (bins.latitude <= north)
+    if west <= east:
+        inside &= (bins.longitude >= west) & (bins.longitude <= east)
+    else:
+        inside &= (bins.longitude >= west) | (bins.longitude <= east)
+    return HeatmapBins(*(column[inside] for column in bins))
+
+
+# Global heatmap store (shared by all requests in this worker)
+heatmap_store = HeatmapStore(
+    refresh_seconds=settings.HEATMAP_STORE_REFRESH_SECONDS,
+    cell_pixels=settings.HEATMAP_CELL_PIXELS,
+    cache_ttl_seconds=settings.HEATMAP_CACHE_TTL_SECONDS,
+    cache_max_entries=settings.HEATMAP_CACHE_MAX_ENTRIES
+)
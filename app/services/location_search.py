@@ -0,0 +1,208 @@
+"""
+In-memory text index of flood event location names.
+Serves ranked trigram search where pg_trgm is unavailable (SQLite) and
+prefix completion for the map search box on every backend.
+"""
+
+import bisect
+import re
+import time
+from collections import defaultdict
+from typing import Dict, List, Mapping, Optional, Set, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from .. import models
+from ..config import settings
+
+# Same default as pg_trgm's similarity_threshold
+SIMILARITY_THRESHOLD = 0.3
+
+# Upper bound on prefix entries scanned by one completion
+MAX_PREFIX_SCAN = 1000
+
+_WORD = re.compile(r"[^\W_]+")
+
+
+def normalize(text: str) -> str:
+    """Lowercase and collapse whitespace."""
+    return " ".join(text.lower().split())
+
+
+def trigrams(text: str) -> Set[str]:
+    """
+    Trigrams of a string, computed like pg_trgm: each word is lowercased
+    and padded with two spaces in front and one behind.
+    """
+    grams = set()
+    for word in _WORD.findall(text.lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def _word_starts(name: str) -> List[str]:
+    """Keys a name is completed from: the full name and the text from each later word on."""
+    key = normalize(name)
+    starts = [key]
+    for match in _WORD.finditer(key):
+        if match.start() > 0:
+            starts.append(key[match.start():])
+    return starts
+
+
+class LocationSearchIndex:
+    """
+    Trigram and prefix index over distinct location names.
+
+    Names come from the per-location rollup, so each location appears once
+    with its event count. Search ranks prefix matches first, then other
+    substring matches, then fuzzy matches by trigram similarity, breaking
+    ties by event count. Completion is a binary search over the sorted
+    word starts of every name.
+
+    The write path updates counts in place after each commit; because other
+    workers write too, the index is rebuilt whenever it is older than
+    `refresh_seconds`.
+    """
+
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self._counts: Dict[str, int] = {}
+        self._postings: Dict[str, Set[str]] = defaultdict(set)
+        self._prefixes: List[Tuple[str, str]] = []  # (word start, name), sorted
+        self._loaded_at: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    @property
+    def is_loaded(self) -> bool:
+        """True once the index has been loaded from the database."""
+        return self._loaded_at is not None
+
+    @property
+    def is_stale(self) -> bool:
+        """True if the index has never been loaded or is due for a rebuild."""
+        return self._loaded_at is None or time.monotonic() - self._loaded_at >= self.refresh_seconds
+
+    async def rebuild(self, db: AsyncSession) -> None:
+        """Reload every location with at least one event from the rollup table."""
+        rollup = models.FloodLocationRollup
+        result = await db.execute(
+            select(rollup.location_name, rollup.event_count).where(rollup.event_count > 0)
+        )
+        self.load({row.location_name: row.event_count for row in result.all()})
+
+    def load(self, counts: Mapping[str, int]) -> None:
+        """Replace the index contents with the given name -> event count mapping."""
+        self._counts = {}
+        self._postings = defaultdict(set)
+        prefixes = []
+        for name, count in counts.items():
+            if count > 0:
+                self._counts[name] = count
+                for gram in trigrams(name):
+                    self._postings[gram].add(name)
+                prefixes.extend((start, name) for start in _word_starts(name))
+        prefixes.sort()
+        self._prefixes = prefixes
+        self._loaded_at = time.monotonic()
+
+    def apply_counts(self, deltas: Mapping[str, int]) -> None:
+        """Add per-location event count changes from a committed write."""
+        for name, delta in deltas.items():
+            count = self._counts.get(name, 0) + delta
+            if count > 0 and name not in self._counts:
+                self._counts[name] = count
+                for gram in trigrams(name):
+                    self._postings[gram].add(name)
+                for start in _word_starts(name):
+                    bisect.insort(self._prefixes, (start, name))
+            elif count > 0:
+                self._counts[name] = count
+            elif name in self._counts:
+                self._remove(name)
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[str, int]]:
+        """
+        Find locations matching a free-text query.
+
+        Args:
+            query: Search text
+            limit: Maximum number of locations to return
+
+        Returns:
+            List of (location_name, event_count), best match first
+        """
+        needle = normalize(query)
+        if not needle:
+            return []
+
+        query_grams = trigrams(needle)
+        shared: Dict[str, int] = defaultdict(int)
+        for gram in query_grams:
+            for name in self._postings.get(gram, ()):
+                shared[name] += 1
+        candidates = set(shared) | set(self._complete_names(needle))
+
+        ranked = []
+        for name in candidates:
+            key = normalize(name)
+            overlap = shared.get(name, 0)
+            similarity = overlap / (len(query_grams) + len(trigrams(name)) - overlap) if overlap else 0.0
+            if key.startswith(needle):
+                tier = 0
+            elif needle in key:
+                tier = 1
+            elif similarity >= SIMILARITY_THRESHOLD:
+                tier = 2
+            else:
+                continue
+            ranked.append((tier, -similarity, -self._counts[name], name))
+
+        ranked.sort()
+        return [(name, self._counts[name]) for *_, name in ranked[:limit]]
+
+    def complete(self, prefix: str, limit: int = 8) -> List[Tuple[str, int]]:
+        """
+        Complete a partially typed location name.
+
+        Matches names where the full name or any later word starts with the
+        prefix.
+
+        Returns:
+            List of (location_name, event_count), most events first
+        """
+        names = self._complete_names(normalize(prefix))
+        ranked = sorted(names, key=lambda name: (-self._counts[name], name))
+        return [(name, self._counts[name]) for name in ranked[:limit]]
+
+    def _complete_names(self, prefix: str) -> Set[str]:
+        if not prefix:
+            return set()
+        names = set()
+        position = bisect.bisect_left(self._prefixes, (prefix, ""))
+        end = min(len(self._prefixes), position + MAX_PREFIX_SCAN)
+        while position < end and self._prefixes[position][0].startswith(prefix):
+            names.add(self._prefixes[position][1])
+            position += 1
+        return names
+
+    def _remove(self, name: str) -> None:
+        del self._counts[name]
+        for gram in trigrams(name):
+            members = self._postings.get(gram)
+            if members is not None:
+                members.discard(name)
+                if not members:
+                    del self._postings[gram]
+        for start in _word_starts(name):
+            position = bisect.bisect_left(self._prefixes, (start, name))
+            if position < len(self._prefixes) and self._prefixes[position] == (start, name):
+                del self._prefixes[position]
+
+
+# Global location index (shared by all requests in this worker)
+location_search_index = LocationSearchIndex(
+    refresh_seconds=settings.LOCATION_INDEX_REFRESH_SECONDS
+)
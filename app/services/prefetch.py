@@ -0,0 +1,180 @@
+"""
+Background weather prefetch scheduler.
+Keeps rainfall fresh in the cache for grid cells we know are hot: locations
+of active alert subscriptions and recent flood events.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import IO, Callable, List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from .. import models
+from ..config import settings
+from ..database import AsyncSessionLocal
+from ..utils.geo import quantize
+from .circuit_breaker import CircuitOpenError
+from .flood_risk import FloodRiskService, flood_risk_service
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+
+class WeatherPrefetcher:
+    """
+    Periodically refreshes weather for hot grid cells within a request budget.
+
+    Each cycle collects the hot cells, skips those whose cached weather will
+    still be fresh at the next cycle, and refreshes the rest, spacing
+    upstream requests so the rate never exceeds max_requests_per_minute.
+
+    The budget is per host, not per worker: every worker starts the loop,
+    but only the one holding an exclusive lock on `leader_lock_path` runs
+    cycles. The others retry the lock each interval, so a new leader takes
+    over when the old one exits. Refreshed weather is written to the shared
+    weather store (WEATHER_STORE_PATH), which every worker reads before
+    going upstream, so the leader's prefetch serves all of them. Without a
+    lock path (or on platforms without fcntl) every worker prefetches, and
+    the budget applies to each. A budget of 0 disables prefetching.
+    """
+
+    # Each cell refresh costs two upstream calls (current weather + forecast)
+    REQUESTS_PER_CELL = 2
+
+    def __init__(
+        self,
+        risk_service: FloodRiskService,
+        session_factory: Callable[[], AsyncSession],
+        interval_seconds: float,
+        max_requests_per_minute: int,
+        event_lookback_hours: int,
+        leader_lock_path: Optional[str] = None
+    ):
+        self.risk_service = risk_service
+        self.session_factory = session_factory
+        self.interval_seconds = interval_seconds
+        self.max_requests_per_minute = max_requests_per_minute
+        self.event_lookback_hours = event_lookback_hours
+        self.leader_lock_path = leader_lock_path
+        self._lock_file: Optional[IO] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def is_leader(self) -> bool:
+        """True if this worker runs the prefetch cycles."""
+        return self._lock_file is not None or not (self.leader_lock_path and FCNTL_AVAILABLE)
+
+    def start(self) -> None:
+        """Start the background refresh loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background refresh loop and give up leadership."""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        lock_file, self._lock_file = self._lock_file, None
+        if lock_file is not None:
+            lock_file.close()  # Closing the descriptor releases the lock
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                if self._acquire_leadership():
+                    refreshed = await self.refresh_once()
+                    if refreshed:
+                        print(f"🌧️  Prefetched weather for {refreshed} grid cells")
+            except Exception as e:
+                print(f"Weather prefetch cycle failed: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def _acquire_leadership(self) -> bool:
+        """Try (without blocking) to become the prefetching worker on this host."""
+        if self.is_leader:
+            return True
+        Path(self.leader_lock_path).parent.mkdir(parents=True, exist_ok=True)
+        lock_file = open(self.leader_lock_path, "a")
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    async def _hot_cells(self) -> List[Tuple[float, float]]:
+        """Collect distinct weather cells for active subscriptions and recent events."""
+        cutoff = datetime.utcnow() - timedelta(hours=self.event_lookback_hours)
+        async with self.session_factory() as db:
+            subscription_points = (await db.execute(
+                select(models.AlertSubscription.latitude, models.AlertSubscription.longitude)
+                .where(models.AlertSubscription.is_active == 1)
+                .distinct()
+            )).all()
+            event_points = (await db.execute(
+                select(models.FloodEvent.latitude, models.FloodEvent.longitude)
+                .where(models.FloodEvent.timestamp >= cutoff)
+                .distinct()
+            )).all()
+
+        cells = (
+            quantize(lat, lon, settings.WEATHER_GRID_DEGREES)
+            for lat, lon in list(subscription_points) + list(event_points)
+        )
+        return list(dict.fromkeys(cells))
+
+    async def refresh_once(self) -> int:
+        """
+        Run one prefetch cycle.
+
+        Returns:
+            Number of grid cells refreshed
+        """
+        if self.max_requests_per_minute <= 0:
+            return 0
+
+        cells = await self._hot_cells()
+
+        # Only refresh cells that would go stale before the next cycle
+        stale_cells = [
+            cell for cell in cells
+            if self.risk_service.weather_ttl_remaining(*cell) <= self.interval_seconds
+        ]
+
+        budget = int(self.max_requests_per_minute * self.interval_seconds / 60) // self.REQUESTS_PER_CELL
+        spacing = 60.0 * self.REQUESTS_PER_CELL / self.max_requests_per_minute
+
+        refreshed = 0
+        for cell in stale_cells[:budget]:
+            try:
+                await self.risk_service.refresh_weather(*cell)
+                refreshed += 1
+            except CircuitOpenError:
+                # Provider is down; retry next cycle
+                break
+            except Exception as e:
+                print(f"Error prefetching weather for {cell}: {e}")
+            await asyncio.sleep(spacing)
+
+        return refreshed
+
+
+# Global prefetcher instance (started from the app lifespan)
+weather_prefetcher = WeatherPrefetcher(
+    risk_service=flood_risk_service,
+    session_factory=AsyncSessionLocal,
+    interval_seconds=settings.PREFETCH_INTERVAL_SECONDS,
+    max_requests_per_minute=settings.PREFETCH_MAX_REQUESTS_PER_MINUTE,
+    event_lookback_hours=settings.PREFETCH_EVENT_LOOKBACK_HOURS,
+    # Leader-only prefetch helps the other workers only through the shared store
+    leader_lock_path=settings.PREFETCH_LEADER_LOCK_PATH if settings.WEATHER_STORE_PATH else None
+)
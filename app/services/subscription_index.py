@@ -0,0 +1,181 @@
+"""
+In-memory spatial index of active alert subscriptions.
+Finds the subscribers to notify for an event without loading every
+subscription from the database.
+"""
+
+import math
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from .. import models
+from ..config import settings
+from ..utils.geo import bounding_box, cell_index, haversine_km
+
+# Severity order: Low < Medium < High < Critical
+SEVERITY_ORDER = {"Low": 0, "Medium": 1, "High": 2, "Critical": 3}
+
+
+def severity_rank(severity) -> int:
+    """Return the order of a severity name or SeverityLevel (unknown = Low)."""
+    return SEVERITY_ORDER.get(getattr(severity, "value", severity), 0)
+
+
+class IndexedSubscription(NamedTuple):
+    """Contact and match data of one active subscription."""
+    id: int
+    email: Optional[str]
+    phone: Optional[str]
+    latitude: float
+    longitude: float
+    radius_km: float
+    min_severity_rank: int
+
+
+class SubscriptionIndex:
+    """
+    Grid index of subscriptions keyed by the area each one watches.
+
+    Every subscription is registered in all grid cells overlapped by the
+    bounding box of its alert circle, so an event only has to look at the
+    subscriptions in its own cell and check the exact haversine distance.
+
+    The index is updated in place by the CRUD write path. Because other
+    workers may change subscriptions too, it is rebuilt from the database
+    whenever it is older than `refresh_seconds`.
+    """
+
+    def __init__(self, cell_degrees: float, refresh_seconds: float):
+        self.cell_degrees = cell_degrees
+        self.refresh_seconds = refresh_seconds
+        self._subscriptions: Dict[int, IndexedSubscription] = {}
+        self._cells: Dict[Tuple[int, int], Set[int]] = defaultdict(set)
+        self._loaded_at: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._subscriptions)
+
+    @property
+    def is_loaded(self) -> bool:
+        """True once the index has been loaded from the database."""
+        return self._loaded_at is not None
+
+    @property
+    def is_stale(self) -> bool:
+        """True if the index has never been loaded or is due for a rebuild."""
+        return self._loaded_at is None or time.monotonic() - self._loaded_at >= self.refresh_seconds
+
+    async def rebuild(self, db: AsyncSession) -> None:
+        """Reload every active subscription from the database."""
+        result = await db.execute(select(
+            models.AlertSubscription.id,
+            models.AlertSubscription.email,
+            models.AlertSubscription.phone,
+            models.AlertSubscription.latitude,
+            models.AlertSubscription.longitude,
+            models.AlertSubscription.radius_km,
+            models.AlertSubscription.min_severity
+        ).where(models.AlertSubscription.is_active == 1))
+        rows = result.all()
+
+        self.load(IndexedSubscription(
+            id=row.id,
+            email=row.email,
+            phone=row.phone,
+            latitude=row.latitude,
+            longitude=row.longitude,
+            radius_km=row.radius_km if row.radius_km is not None else 5.0,
+            min_severity_rank=severity_rank(row.min_severity)
+        ) for row in rows)
+
+    def load(self, subscriptions: Iterable[IndexedSubscription]) -> None:
+        """Replace the index contents with the given subscriptions."""
+        self._subscriptions = {}
+        self._cells = defaultdict(set)
+        for subscription in subscriptions:
+            self._insert(subscription)
+        self._loaded_at = time.monotonic()
+
+    def upsert(self, subscription: models.AlertSubscription) -> None:
+        """Add or re-index a subscription after it was created or updated."""
+        self.remove(subscription.id)
+        if not subscription.is_active:
+            return
+        self._insert(IndexedSubscription(
+            id=subscription.id,
+            email=subscription.email,
+            phone=subscription.phone,
+            latitude=subscription.latitude,
+            longitude=subscription.longitude,
+            radius_km=subscription.radius_km if subscription.radius_km is not None else 5.0,
+            min_severity_rank=severity_rank(subscription.min_severity)
+        ))
+
+    def remove(self, subscription_id: int) -> None:
+        """Drop a subscription from the index (no-op if absent)."""
+        subscription = self._subscriptions.pop(subscription_id, None)
+        if subscription is None:
+            return
+        for cell in self._covered_cells(subscription):
+            members = self._cells.get(cell)
+            if members is not None:
+                members.discard(subscription_id)
+                if not members:
+                    del self._cells[cell]
+
+    def match(self, latitude: float, longitude: float, severity) -> List[IndexedSubscription]:
+        """
+        Find subscriptions that should be notified for an event.
+
+        Args:
+            latitude: Event latitude
+            longitude: Event longitude
+            severity: Event severity level
+
+        Returns:
+            Subscriptions whose radius contains the event and whose minimum
+            severity is at or below the event severity, nearest first
+        """
+        event_rank = severity_rank(severity)
+        cell = cell_index(latitude, longitude, self.cell_degrees)
+
+        matches = []
+        for subscription_id in self._cells.get(cell, ()):
+            subscription = self._subscriptions[subscription_id]
+            if event_rank < subscription.min_severity_rank:
+                continue
+            distance = haversine_km(latitude, longitude, subscription.latitude, subscription.longitude)
+            if distance <= subscription.radius_km:
+                matches.append((distance, subscription))
+
+        matches.sort(key=lambda item: item[0])
+        return [subscription for _, subscription in matches]
+
+    def _insert(self, subscription: IndexedSubscription) -> None:
+        self._subscriptions[subscription.id] = subscription
+        for cell in self._covered_cells(subscription):
+            self._cells[cell].add(subscription.id)
+
+    def _covered_cells(self, subscription: IndexedSubscription) -> Iterable[Tuple[int, int]]:
+        """Grid cells overlapped by the bounding box of a subscription's circle."""
+        south, west, north, east = bounding_box(
+            subscription.latitude, subscription.longitude, subscription.radius_km
+        )
+        row_min, col_min = cell_index(south, west, self.cell_degrees)
+        row_max, col_max = cell_index(north, east, self.cell_degrees)
+
+        # Wrap columns across the antimeridian
+        columns_per_turn = math.ceil(360.0 / self.cell_degrees)
+        col_offset = math.floor(-180.0 / self.cell_degrees)
+        for row in range(row_min, row_max + 1):
+            for col in range(col_min, col_max + 1):
+                yield row, (col - col_offset) % columns_per_turn + col_offset
+
+
+# Global subscription index (shared by all requests in this worker)
+subscription_index = SubscriptionIndex(
+    cell_degrees=settings.SUBSCRIPTION_GRID_DEGREES,
+    refresh_seconds=settings.SUBSCRIPTION_INDEX_REFRESH_SECONDS
+)
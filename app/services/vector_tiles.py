@@ -0,0 +1,158 @@
+"""
+Mapbox Vector Tiles of flood events and the binned risk grid.
+Tiles are rendered from the in-memory heatmap store and cached per
+(z, x, y, data version), so repeated views never touch the database.
+"""
+
+from typing import Hashable
+import numpy as np
+from ..config import settings
+from ..utils.mvt import Layer, encode_tile, tile_bounds, world_xy
+from .cache import TTLCache
+from .heatmap import HeatmapStore, cell_degrees_for_zoom, clip_bins, heatmap_store
+
+SEVERITY_NAMES = ("Low", "Medium", "High", "Critical")
+
+
+class VectorTileRenderer:
+    """
+    Renders XYZ tiles with two layers:
+
+    - flood_events: one point per event from `event_min_zoom` on; below it,
+      or when a tile holds more than `max_events` events, events are merged
+      per `cluster_units` square of tile space into one point with a count,
+      the max risk score and the max severity.
+    - risk_grid: the heatmap bins for the tile's zoom as square polygons
+      with count and max/mean intensity.
+
+    Features are clipped to the tile plus `buffer` units on each side so
+    symbols and cell edges do not get cut at tile seams.
+    """
+
+    def __init__(
+        self,
+        store: HeatmapStore,
+        extent: int,
+        buffer: int,
+        event_min_zoom: int,
+        cluster_units: int,
+        max_events: int,
+        cache_ttl_seconds: float,
+        cache_max_entries: int
+    ):
+        self.store = store
+        self.extent = extent
+        self.buffer = buffer
+        self.event_min_zoom = event_min_zoom
+        self.cluster_units = cluster_units
+        self.max_events = max_events
+        self._tiles = TTLCache(ttl_seconds=cache_ttl_seconds, max_entries=cache_max_entries)
+
+    def render(self, z: int, x: int, y: int) -> bytes:
+        """
+        Encode one tile (cached until the store's data version changes).
+
+        Returns:
+            MVT protobuf bytes (empty when the tile has no features)
+        """
+        key: Hashable = (z, x, y, self.store.version)
+        tile = self._tiles.get(key)
+        if tile is None:
+            tile = encode_tile([self._event_layer(z, x, y), self._grid_layer(z, x, y)])
+            self._tiles.set(key, tile)
+        return tile
+
+    def _tile_units(self, z: int, x: int, y: int, latitude, longitude):
+        """Project coordinates to this tile's integer coordinate space."""
+        wx, wy = world_xy(latitude, longitude)
+        n = 2 ** z
+        return (
+            np.rint((wx * n - x) * self.extent).astype(np.int64),
+            np.rint((wy * n - y) * self.extent).astype(np.int64)
+        )
+
+    def _buffered_bounds(self, z: int, x: int, y: int):
+        south, west, north, east = tile_bounds(z, x, y)
+        pad = self.buffer / self.extent
+        lat_pad = (north - south) * pad
+        lon_pad = (east - west) * pad
+        return south - lat_pad, west - lon_pad, north + lat_pad, east + lon_pad
+
+    def _event_layer(self, z: int, x: int, y: int) -> Layer:
+        layer = Layer("flood_events", self.extent)
+        ids, latitude, longitude, intensity, severity = self.store.points_in(*self._buffered_bounds(z, x, y))
+        if len(ids) == 0:
+            return layer
+        px, py = self._tile_units(z, x, y, latitude, longitude)
+
+        if z >= self.event_min_zoom and len(ids) <= self.max_events:
+            for event_id, ex, ey, value, rank in zip(
+                ids.tolist(), px.tolist(), py.tolist(), intensity.tolist(), severity.tolist()
+            ):
+                layer.add_point(ex, ey, {
+                    "risk_score": round(value * 100, 1),
+                    "severity": SEVERITY_NAMES[rank]
+                }, feature_id=event_id)
+            return layer
+
+        # Simplify: merge events sharing a cluster square, placed at their mean position.
+        # Buffered tile coordinates are small, so (column, row) packs into one int64 key.
+        span = self.cluster_units
+        keys = (np.floor_divide(px, span) << 32) + (np.floor_divide(py, span) + (1 << 31))
+        cells, inverse = np.unique(keys, return_inverse=True)
+        count = np.bincount(inverse)
+        mean_x = np.rint(np.bincount(inverse, weights=px) / count).astype(np.int64)
+        mean_y = np.rint(np.bincount(inverse, weights=py) / count).astype(np.int64)
+        peak = np.zeros(len(cells))
+        np.maximum.at(peak, inverse, intensity)
+        top_rank = np.zeros(len(cells), dtype=np.int8)
+        np.maximum.at(top_rank, inverse, severity)
+
+        for cx, cy, events, value, rank in zip(
+            mean_x.tolist(), mean_y.tolist(), count.tolist(), peak.tolist(), top_rank.tolist()
+        ):
+            layer.add_point(cx, cy, {
+                "count": events,
+                "risk_score": round(value * 100, 1),
+                "severity": SEVERITY_NAMES[rank]
+            })
+        return layer
+
+    def _grid_layer(self, z: int, x: int, y: int) -> Layer:
+        layer = Layer("risk_grid", self.extent)
+        # Keep cells whose square overlaps the buffered tile, not only those centred in it
+        half = cell_degrees_for_zoom(z, self.store.cell_pixels) / 2
+        south, west, north, east = self._buffered_bounds(z, x, y)
+        bins = clip_bins(self.store.bins(z), (south - half, west - half, north + half, east + half))
+        if len(bins.count) == 0:
+            return layer
+
+        x0, y0 = self._tile_units(z, x, y, bins.latitude + half, bins.longitude - half)
+        x1, y1 = self._tile_units(z, x, y, bins.latitude - half, bins.longitude + half)
+        low, high = -self.buffer, self.extent + self.buffer
+        x0, y0, x1, y1 = (np.clip(edge, low, high) for edge in (x0, y0, x1, y1))
+
+        for bx0, by0, bx1, by1, events, value, mean in zip(
+            x0.tolist(), y0.tolist(), x1.tolist(), y1.tolist(),
+            bins.count.tolist(), bins.max_intensity.tolist(), bins.mean_intensity.tolist()
+        ):
+            if bx1 > bx0 and by1 > by0:
+                layer.add_box(bx0, by0, bx1, by1, {
+                    "count": events,
+                    "intensity": round(value, 4),
+                    "mean_intensity": round(mean, 4)
+                })
+        return layer
+
+
+# Global tile renderer (shared by all requests in this worker)
+vector_tile_renderer = VectorTileRenderer(
+    store=heatmap_store,
+    extent=settings.MVT_EXTENT,
+    buffer=settings.MVT_BUFFER,
+    event_min_zoom=settings.MVT_EVENT_MIN_ZOOM,
+    cluster_units=settings.MVT_CLUSTER_UNITS,
+    max_events=settings.MVT_MAX_TILE_EVENTS,
+    cache_ttl_seconds=settings.MVT_CACHE_TTL_SECONDS,
+    cache_max_entries=settings.MVT_CACHE_MAX_TILES
+)
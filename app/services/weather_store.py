@@ -0,0 +1,110 @@
+"""
+Shared weather store.
+Holds the latest rainfall readings per quantized grid cell in a local SQLite
+file, so weather fetched or prefetched by one worker process is a cache hit
+in every other worker on the host.
+"""
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+from ..utils.geo import cell_index
+
+
+class WeatherStore:
+    """
+    SQLite-backed weather cache keyed by (kind, grid cell).
+
+    Entries carry an absolute expiry, so a reader knows how long a value
+    written by another worker stays fresh. Each cell keeps only its latest
+    value per kind, which bounds the file to the cells ever requested. The
+    database runs in WAL mode so workers can read while one of them writes.
+
+    Calls block on SQLite; run them in a worker thread (asyncio.to_thread)
+    on the request path.
+    """
+
+    def __init__(self, path: str, cell_degrees: float):
+        self.path = path
+        self.cell_degrees = cell_degrees
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the database on first use and ensure the schema exists."""
+        if self._conn is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS weather_cells (
+                    kind TEXT NOT NULL,
+                    row INTEGER NOT NULL,
+                    col INTEGER NOT NULL,
+                    payload TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    PRIMARY KEY (kind, row, col)
+                ) WITHOUT ROWID
+                """
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, kind: str, latitude: float, longitude: float) -> Optional[Tuple[str, float]]:
+        """
+        Look up a fresh value for the cell containing a coordinate.
+
+        Returns:
+            Tuple of (payload, seconds until it expires), or None if the cell
+            has no fresh value or the store is unavailable
+        """
+        row, col = cell_index(latitude, longitude, self.cell_degrees)
+        try:
+            with self._lock:
+                result = self._connection().execute(
+                    "SELECT payload, expires_at FROM weather_cells WHERE kind = ? AND row = ? AND col = ?",
+                    (kind, row, col)
+                ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Weather store read failed: {e}")
+            return None
+        if result is None:
+            return None
+        remaining = result[1] - time.time()
+        return (result[0], remaining) if remaining > 0 else None
+
+    def put(self, kind: str, latitude: float, longitude: float, payload: str, ttl_seconds: float) -> None:
+        """
+        Share a freshly fetched value for the cell containing a coordinate.
+
+        Args:
+            kind: Reading kind (e.g. "current", "forecast")
+            latitude: Location latitude
+            longitude: Location longitude
+            payload: Serialized value
+            ttl_seconds: How long the value stays fresh
+        """
+        row, col = cell_index(latitude, longitude, self.cell_degrees)
+        try:
+            with self._lock:
+                conn = self._connection()
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO weather_cells (kind, row, col, payload, expires_at) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (kind, row, col, payload, time.time() + ttl_seconds)
+                    )
+        except sqlite3.Error as e:
+            print(f"Weather store write failed: {e}")
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -5,10 +5,19 @@ from .auth import (
     create_access_token,
     decode_access_token
 )
+from .geo import cell_index, quantize, haversine_km, geohash_encode, geohash_cover
+from .pagination import encode_cursor, decode_cursor
 
 __all__ = [
     "verify_password",
     "get_password_hash",
     "create_access_token",
-    "decode_access_token"
+    "decode_access_token",
+    "cell_index",
+    "quantize",
+    "haversine_km",
+    "geohash_encode",
+    "geohash_cover",
+    "encode_cursor",
+    "decode_cursor"
 ]
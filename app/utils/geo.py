@@ -0,0 +1,209 @@
+"""
+Geographic helper functions.
+Grid quantization used to share cached data between nearby coordinates,
+geohash encoding for spatial indexing, and great-circle distances.
+"""
+
+import math
+from typing import List, Optional, Set, Tuple
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE_LAT = 111.32
+
+# Precision stored on rows (~4.8 m x 4.8 m cells)
+GEOHASH_PRECISION = 9
+
+# Most geohash cells (index range scans) used to cover a radius query
+MAX_COVER_CELLS = 24
+_GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def cell_index(latitude: float, longitude: float, cell_degrees: float) -> Tuple[int, int]:
+    """
+    Return the integer (row, column) of the grid cell containing a coordinate.
+
+    Args:
+        latitude: Location latitude
+        longitude: Location longitude
+        cell_degrees: Cell edge length in degrees
+
+    Returns:
+        Tuple of (row, column) cell indices
+    """
+    return math.floor(latitude / cell_degrees), math.floor(longitude / cell_degrees)
+
+
+def quantize(latitude: float, longitude: float, cell_degrees: float) -> Tuple[float, float]:
+    """
+    Snap a coordinate to the centre of its fixed-degree grid cell.
+
+    All points inside the same cell map to the same key, so upstream
+    lookups for nearby users can share one cached result.
+
+    Args:
+        latitude: Location latitude
+        longitude: Location longitude
+        cell_degrees: Cell edge length in degrees
+
+    Returns:
+        Tuple of (cell_latitude, cell_longitude) at the cell centre
+    """
+    row, col = cell_index(latitude, longitude, cell_degrees)
+    cell_lat = (row + 0.5) * cell_degrees
+    cell_lon = (col + 0.5) * cell_degrees
+    return round(cell_lat, 6), round(cell_lon, 6)
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    Great-circle distance between two coordinates.
+
+    Returns:
+        Distance in kilometers
+    """
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(latitude: float, longitude: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """
+    Latitude/longitude box that contains every point within radius_km.
+
+    Longitude degrees shrink with cos(latitude); the box is clamped at the
+    poles and may extend past +/-180 degrees near the antimeridian.
+
+    Returns:
+        Tuple of (south, west, north, east) in degrees
+    """
+    lat_delta = radius_km / KM_PER_DEGREE_LAT
+    cos_lat = max(math.cos(math.radians(latitude)), 1e-6)
+    lon_delta = min(180.0, radius_km / (KM_PER_DEGREE_LAT * cos_lat))
+    return (
+        max(-90.0, latitude - lat_delta),
+        longitude - lon_delta,
+        min(90.0, latitude + lat_delta),
+        longitude + lon_delta
+    )
+
+
+def parse_bbox(bbox: str) -> Tuple[float, float, float, float]:
+    """
+    Parse a "south,west,north,east" bounding box string.
+
+    West may be greater than east for a box that crosses the antimeridian.
+
+    Raises:
+        ValueError: If the string is malformed or out of range
+    """
+    parts = bbox.split(",")
+    if len(parts) != 4:
+        raise ValueError("bbox must be south,west,north,east")
+    south, west, north, east = (float(part) for part in parts)
+    if not (-90.0 <= south <= north <= 90.0 and -180.0 <= west <= 180.0 and -180.0 <= east <= 180.0):
+        raise ValueError("bbox is out of range")
+    return south, west, north, east
+
+
+def geohash_encode(latitude: float, longitude: float, precision: int = GEOHASH_PRECISION) -> str:
+    """
+    Encode a coordinate as a geohash string.
+
+    Points sharing a geohash prefix lie in the same cell, so a B-tree index
+    on the geohash column can answer cell (prefix) lookups with range scans.
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True  # Even bits encode longitude
+
+    while len(chars) < precision:
+        rng, value = (lon_range, longitude) if even else (lat_range, latitude)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits <<= 1
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_GEOHASH_BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return "".join(chars)
+
+
+def geohash_cell_size(precision: int) -> Tuple[float, float]:
+    """Return (lat_degrees, lon_degrees) spanned by a geohash cell."""
+    lon_bits = (5 * precision + 1) // 2
+    lat_bits = (5 * precision) // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+
+def geohash_cover(latitude: float, longitude: float, radius_km: float, max_precision: int = GEOHASH_PRECISION) -> List[str]:
+    """
+    Geohash prefixes whose cells together cover a circle.
+
+    Uses the finest precision whose cover needs at most MAX_COVER_CELLS
+    cells, keeping only cells that intersect the circle (not its whole
+    bounding box). Geohash cells alternate between square and 2:1, so
+    allowing a few more than 3 x 3 cells lets the cover track the circle
+    instead of falling back to one cell many times its area.
+
+    Returns:
+        Sorted list of geohash prefixes
+    """
+    for precision in range(max_precision, 0, -1):
+        prefixes = _circle_cells(latitude, longitude, radius_km, precision)
+        if prefixes is not None:
+            return sorted(prefixes)
+    return sorted(_circle_cells(latitude, longitude, radius_km, 1, max_cells=None))
+
+
+def _circle_cells(
+    latitude: float,
+    longitude: float,
+    radius_km: float,
+    precision: int,
+    max_cells: Optional[int] = MAX_COVER_CELLS
+) -> Optional[List[str]]:
+    """
+    Geohash cells at one precision that intersect a circle.
+
+    Returns:
+        List of geohash prefixes, or None if more than max_cells are needed
+    """
+    cell_lat, cell_lon = geohash_cell_size(precision)
+    columns = 1 << ((5 * precision + 1) // 2)
+    south, west, north, east = bounding_box(latitude, longitude, radius_km)
+    first_row = int((south + 90.0) // cell_lat)
+    last_row = min(int((north + 90.0) // cell_lat), (1 << ((5 * precision) // 2)) - 1)
+    first_col = int(math.floor((west + 180.0) / cell_lon))
+    last_col = int(math.floor((east + 180.0) / cell_lon))
+    if max_cells is not None and (last_row - first_row + 1) * (last_col - first_col + 1) > 4 * max_cells:
+        return None  # Far too fine; skip the per-cell distance checks
+
+    prefixes: Set[str] = set()
+    for row in range(first_row, last_row + 1):
+        cell_south = row * cell_lat - 90.0
+        nearest_lat = min(max(latitude, cell_south), cell_south + cell_lat)
+        for col in range(first_col, last_col + 1):
+            cell_west = col * cell_lon - 180.0
+            nearest_lon = min(max(longitude, cell_west), cell_west + cell_lon)
+            # Clamping is not the exact spherical nearest point; the margin covers the difference
+            if haversine_km(latitude, longitude, nearest_lat, nearest_lon) > radius_km * 1.01:
+                continue
+            wrapped = col % columns
+            prefixes.add(geohash_encode(
+                cell_south + cell_lat / 2, wrapped * cell_lon - 180.0 + cell_lon / 2, precision
+            ))
+            if max_cells is not None and len(prefixes) > max_cells:
+                return None
+    return list(prefixes)
@@ -0,0 +1,166 @@
+"""
+Mapbox Vector Tile (MVT 2.1) encoding and Web Mercator tile math.
+Writes the tile protobuf by hand, since flood tiles only need point and
+axis-aligned polygon features with scalar properties.
+"""
+
+import math
+import struct
+import numpy as np
+from typing import Any, Dict, List, Sequence, Tuple
+
+# Default tile coordinate resolution (units per tile edge)
+DEFAULT_EXTENT = 4096
+
+# Web Mercator stops at about +/-85.05 degrees
+MAX_MERCATOR_LATITUDE = 85.0511287798
+
+POINT = 1
+POLYGON = 3
+
+_MOVE_TO = 1
+_LINE_TO = 2
+_CLOSE_PATH = 7
+
+
+def tile_bounds(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """
+    Geographic bounds of a Web Mercator (XYZ) tile.
+
+    Returns:
+        Tuple of (south, west, north, east) in degrees
+    """
+    n = 2 ** z
+    west = x / n * 360.0 - 180.0
+    east = (x + 1) / n * 360.0 - 180.0
+    north = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / n))))
+    south = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * (y + 1) / n))))
+    return south, west, north, east
+
+
+def world_xy(latitude, longitude):
+    """
+    Project coordinates to Web Mercator world units (0-1 on each axis, y down).
+
+    Works on floats and numpy arrays alike.
+    """
+    lat = np.radians(np.clip(latitude, -MAX_MERCATOR_LATITUDE, MAX_MERCATOR_LATITUDE))
+    wx = (np.asarray(longitude) + 180.0) / 360.0
+    wy = (1.0 - np.log(np.tan(lat) + 1.0 / np.cos(lat)) / math.pi) / 2.0
+    return wx, wy
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _zigzag(value: int) -> int:
+    return (value << 1) ^ (value >> 31)
+
+
+def _key(field: int, wire_type: int) -> bytes:
+    return _varint((field << 3) | wire_type)
+
+
+def _length_delimited(field: int, payload: bytes) -> bytes:
+    return _key(field, 2) + _varint(len(payload)) + payload
+
+
+def _packed(field: int, values: Sequence[int]) -> bytes:
+    return _length_delimited(field, b"".join(_varint(v) for v in values))
+
+
+def _command(command: int, count: int) -> int:
+    return (command & 0x7) | (count << 3)
+
+
+def _encode_value(value: Any) -> bytes:
+    """Encode a property value as an MVT Value message."""
+    if isinstance(value, bool):
+        return _key(7, 0) + _varint(int(value))
+    if isinstance(value, int):
+        if value >= 0:
+            return _key(5, 0) + _varint(value)
+        return _key(6, 0) + _varint((value << 1) ^ (value >> 63))
+    if isinstance(value, float):
+        return _key(3, 1) + struct.pack("<d", value)
+    return _length_delimited(1, str(value).encode("utf-8"))
+
+
+class Layer:
+    """
+    One named MVT layer.
+
+    Geometry is given in integer tile coordinates (0..extent, y down);
+    property keys and values are de-duplicated into the layer tables.
+    """
+
+    def __init__(self, name: str, extent: int = DEFAULT_EXTENT):
+        self.name = name
+        self.extent = extent
+        self._features: List[bytes] = []
+        self._keys: Dict[str, int] = {}
+        self._values: Dict[Tuple[type, Any], int] = {}
+
+    def __len__(self) -> int:
+        return len(self._features)
+
+    def add_point(self, px: int, py: int, properties: Dict[str, Any], feature_id: int = None) -> None:
+        """Add a point feature."""
+        geometry = [_command(_MOVE_TO, 1), _zigzag(px), _zigzag(py)]
+        self._add(POINT, geometry, properties, feature_id)
+
+    def add_box(self, x0: int, y0: int, x1: int, y1: int, properties: Dict[str, Any], feature_id: int = None) -> None:
+        """Add an axis-aligned rectangle polygon with corners (x0, y0) and (x1, y1), x0 < x1, y0 < y1."""
+        # Clockwise in tile coordinates (y down), as MVT requires for exterior rings
+        geometry = [
+            _command(_MOVE_TO, 1), _zigzag(x0), _zigzag(y0),
+            _command(_LINE_TO, 3),
+            _zigzag(x1 - x0), _zigzag(0),
+            _zigzag(0), _zigzag(y1 - y0),
+            _zigzag(x0 - x1), _zigzag(0),
+            _command(_CLOSE_PATH, 1)
+        ]
+        self._add(POLYGON, geometry, properties, feature_id)
+
+    def encode(self) -> bytes:
+        """Serialize the layer as a Tile.Layer message."""
+        parts = [
+            _key(15, 0) + _varint(2),  # version
+            _length_delimited(1, self.name.encode("utf-8")),
+        ]
+        parts.extend(_length_delimited(2, feature) for feature in self._features)
+        parts.extend(_length_delimited(3, key.encode("utf-8")) for key in self._keys)
+        parts.extend(_length_delimited(4, _encode_value(value)) for _, value in self._values)
+        parts.append(_key(5, 0) + _varint(self.extent))
+        return b"".join(parts)
+
+    def _add(self, geom_type: int, geometry: List[int], properties: Dict[str, Any], feature_id) -> None:
+        tags = []
+        for key, value in properties.items():
+            if value is None:
+                continue
+            tags.append(self._keys.setdefault(key, len(self._keys)))
+            tags.append(self._values.setdefault((type(value), value), len(self._values)))
+
+        feature = b""
+        if feature_id is not None:
+            feature += _key(1, 0) + _varint(feature_id)
+        if tags:
+            feature += _packed(2, tags)
+        feature += _key(3, 0) + _varint(geom_type)
+        feature += _packed(4, geometry)
+        self._features.append(feature)
+
+
+def encode_tile(layers: Sequence[Layer]) -> bytes:
+    """Serialize non-empty layers as an MVT Tile message."""
+    return b"".join(_length_delimited(3, layer.encode()) for layer in layers if len(layer))
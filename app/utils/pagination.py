@@ -0,0 +1,44 @@
+"""
+Keyset (cursor) pagination helpers.
+Cursors are opaque URL-safe tokens holding the sort key of the last row of
+a page, so the next page can seek straight to it through an index instead
+of skipping rows with OFFSET.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Tuple
+
+
+def encode_cursor(timestamp: datetime, row_id: int) -> str:
+    """
+    Build an opaque cursor from a row's (timestamp, id) sort key.
+
+    Args:
+        timestamp: Timestamp of the last row on the page
+        row_id: ID of the last row on the page
+
+    Returns:
+        URL-safe cursor string
+    """
+    payload = json.dumps([timestamp.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Returns:
+        Tuple of (timestamp, id)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
@@ -0,0 +1,106 @@
+"""
+Delta sync helpers.
+Full payloads carry the flood event data version in an ETag, so unchanged
+polls get 304; clients holding a version can ask for only the changes.
+"""
+
+import hashlib
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+from fastapi import HTTPException, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+# Response header with the data version of a full payload
+DATA_VERSION_HEADER = "X-Data-Version"
+
+
+def data_etag(version: int, *parts: Any) -> str:
+    """
+    Build a weak ETag from a data version and whatever else shapes the payload.
+
+    Weak, because payloads also hold presentation fields (e.g. "2 hours ago")
+    that change without the data changing.
+    """
+    digest = hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()[:16]
+    return f'W/"{version}-{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True if an If-None-Match header matches an ETag (weak comparison)."""
+    if not if_none_match:
+        return False
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or (candidate[2:] if candidate.startswith("W/") else candidate) == opaque:
+            return True
+    return False
+
+
+def versioned_response(request: Request, content: Any, version: int, *etag_parts: Any) -> Response:
+    """
+    Return a full payload with its ETag and data version, or 304 if the client has it.
+    """
+    etag = data_etag(version, *etag_parts)
+    headers = {"ETag": etag, DATA_VERSION_HEADER: str(version)}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(content=jsonable_encoder(content), headers=headers)
+
+
+def check_since(since: int, version: int, from_replica: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    Handle a client version ahead of the version the database answered with.
+
+    Read replicas lag by different amounts, so a client that got version V
+    from a fresher replica can land on one still behind V. Its state is
+    valid; the replica just has nothing newer to report yet.
+
+    Returns:
+        None if `since` can be served; an empty delta at `since` ("no
+        changes yet") if the read came from a lagging replica
+
+    Raises:
+        HTTPException: 410 if `since` is ahead of the primary's version
+            (e.g. the database was restored); the client must reload
+    """
+    if since <= version:
+        return None
+    if from_replica:
+        return delta_payload(since, since, [], [], truncated=False)
+    raise HTTPException(
+        status_code=410,
+        detail=f"Version {since} is ahead of the current data version {version}; reload the full payload"
+    )
+
+
+def delta_payload(
+    version: int,
+    since: int,
+    added: List[Dict[str, Any]],
+    removed: Iterable[int],
+    truncated: bool,
+    expired_before: Optional[datetime] = None
+) -> Dict[str, Any]:
+    """
+    Build a delta sync response.
+
+    Args:
+        version: Current data version (the client's next `since`)
+        since: Version the client already holds
+        added: Events written after `since`
+        removed: IDs of events deleted after `since`
+        truncated: More events were added than fit; reload the full payload
+        expired_before: Drop held events older than this (time-windowed payloads)
+    """
+    payload = {
+        "version": version,
+        "since": since,
+        "added": added,
+        "removed": list(removed),
+        "truncated": truncated
+    }
+    if expired_before is not None:
+        payload["expired_before"] = expired_before.isoformat()
+    return payload
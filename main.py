@@ -7,7 +7,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
-from app.database import init_db
+from app.database import async_engine, init_db, read_replicas
 from app.config import settings
 from app.routers import floods
 from app.routers import auth
@@ -16,6 +16,9 @@ from app.routers import map
 from app.routers import alerts
 from app.routers import route_verdict
 from app.routers import chat
+from app.services.alert_stream import alert_hub
+from app.services.flood_risk import flood_risk_service
+from app.services.prefetch import weather_prefetcher
 
 
 @asynccontextmanager
@@ -35,10 +38,25 @@ async def lifespan(app: FastAPI):
         print("⚠️  API will run with mock data fallback")
         print("⚠️  To fix: Update DATABASE_URL in .env with valid credentials")
     
+    # Open pooled upstream HTTP clients (weather, elevation)
+    await flood_risk_service.startup()
+    
+    # Keep weather for hot grid cells warm in the cache
+    if settings.PREFETCH_ENABLED:
+        weather_prefetcher.start()
+    
+    # Expire and reconcile alerts pushed over /map/stream
+    alert_hub.start()
+    
     yield
     
     # Shutdown
     print("🛑 Shutting down API...")
+    await alert_hub.stop()
+    await weather_prefetcher.stop()
+    await flood_risk_service.shutdown()
+    await async_engine.dispose()
+    await read_replicas.dispose()
 
 
 # Create FastAPI application
@@ -82,6 +100,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allow all HTTP methods
     allow_headers=["*"],  # Allow all headers
+    expose_headers=["X-Next-Cursor", "ETag", "X-Data-Version"],  # Keyset cursor for GET /floods/; cache validators
 )
 
 # Include routers
@@ -120,7 +139,10 @@ async def health_check():
     return {
         "status": "healthy",
         "service": "flood-forecaster-api",
-        "database": "connected"
+        "database": "connected",
+        "database_replicas": read_replicas.status(),
+        "stream_subscribers": alert_hub.subscriber_count,
+        "upstreams": flood_risk_service.provider_status()
     }
 
 
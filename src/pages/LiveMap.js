@@ -12,8 +12,10 @@ const LiveMap = () => {
   const [apiConnected, setApiConnected] = useState(false);
   const [userLocation, setUserLocation] = useState(null);
   const [searchLocation, setSearchLocation] = useState(null);
+  const [suggestions, setSuggestions] = useState([]);
   const [weatherRiskData, setWeatherRiskData] = useState([]);
   const mapRef = useRef(null);
+  const streamingRef = useRef(false);
 
   // Fetch active alerts from backend
   const fetchActiveAlerts = useCallback(async () => {
@@ -69,19 +71,87 @@ const LiveMap = () => {
     }
   }, []);
 
-  // Initial data load
+  // Apply alert changes pushed by the server
+  const applyStreamedAlerts = useCallback((update) => {
+    streamingRef.current = true;
+    setActiveAlerts(update);
+    setApiConnected(true);
+    setLastUpdated(new Date().toLocaleTimeString('en-US', { hour: 'numeric', minute: '2-digit', hour12: true }));
+  }, []);
+
+  // Streamed alerts carry real coordinates; plot them directly
   useEffect(() => {
-    fetchActiveAlerts();
-    fetchLastUpdated();
-    
-    // Poll for updates every 30 seconds
-    const interval = setInterval(() => {
+    if (!streamingRef.current) return;
+    setWeatherRiskData(activeAlerts.map((alert) => ({
+      id: alert.id,
+      lat: alert.latitude,
+      lng: alert.longitude,
+      location_name: alert.location,
+      risk_level: alert.risk,
+      risk_score: alert.risk_score || 50,
+      rainfall_mm: alert.rainfall_mm || 0,
+      description: `Reported ${alert.time}`
+    })));
+  }, [activeAlerts]);
+
+  // Initial data load, then live updates over the alert stream
+  useEffect(() => {
+    let interval = null;
+
+    // Poll every 30 seconds when the stream is unavailable
+    const startPolling = () => {
+      if (interval) return;
+      streamingRef.current = false;
       fetchActiveAlerts();
       fetchLastUpdated();
-    }, 30000);
+      interval = setInterval(() => {
+        fetchActiveAlerts();
+        fetchLastUpdated();
+      }, 30000);
+    };
+
+    const source = apiService.openAlertStream({
+      snapshot: (alerts) => applyStreamedAlerts(() => alerts),
+      new: (alert) => applyStreamedAlerts((current) => [alert, ...current.filter((item) => item.id !== alert.id)]),
+      expired: (alert) => applyStreamedAlerts((current) => current.filter((item) => item.id !== alert.id)),
+      // EventSource reconnects on its own and receives a fresh snapshot;
+      // fall back to polling only once it gives up
+      error: () => {
+        if (source && source.readyState === EventSource.CLOSED) {
+          startPolling();
+        }
+      }
+    });
+
+    if (!source) {
+      startPolling();
+    }
+
+    return () => {
+      if (source) source.close();
+      if (interval) clearInterval(interval);
+    };
+  }, [fetchActiveAlerts, fetchLastUpdated, applyStreamedAlerts]);
+
+  // Location name completion while typing (debounced)
+  useEffect(() => {
+    const prefix = searchQuery.trim();
+    if (!prefix) {
+      setSuggestions([]);
+      return;
+    }
+
+    const timer = setTimeout(async () => {
+      try {
+        const data = await apiService.suggestLocations(prefix);
+        setSuggestions(data.map((item) => item.location_name));
+      } catch (error) {
+        setSuggestions([]);
+      }
+    }, 150);
 
-    return () => clearInterval(interval);
-  }, [fetchActiveAlerts, fetchLastUpdated]);
+    return () => clearTimeout(timer);
+  }, [searchQuery]);
 
   // Handle location search
   const handleSearch = async (e) => {
@@ -225,8 +295,15 @@ const LiveMap = () => {
                 placeholder="Search location..."
                 value={searchQuery}
                 onChange={(e) => setSearchQuery(e.target.value)}
+                list="location-suggestions"
+                autoComplete="off"
                 className="w-full bg-flood-navy/40 border border-gray-800 rounded-lg pl-12 pr-4 py-3 text-white placeholder-gray-500 focus:outline-none focus:border-flood-cyan transition-colors"
               />
+              <datalist id="location-suggestions">
+                {suggestions.map((name) => (
+                  <option key={name} value={name} />
+                ))}
+              </datalist>
             </form>
             
             <button
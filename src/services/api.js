@@ -101,6 +101,32 @@ class ApiService {
     return this.fetchWithErrorHandling(`${API_BASE_URL}/map/last-update`);
   }
 
+  /**
+   * Open the live alert stream (server-sent events).
+   * Returns null when the browser has no EventSource support.
+   */
+  openAlertStream(handlers, bbox = null) {
+    if (typeof EventSource === 'undefined') {
+      return null;
+    }
+
+    const params = new URLSearchParams();
+    if (bbox) {
+      params.append('bbox', bbox.join(','));
+    }
+
+    const source = new EventSource(`${API_BASE_URL}/map/stream?${params}`);
+    ['snapshot', 'new', 'expired', 'resync'].forEach((kind) => {
+      if (handlers[kind]) {
+        source.addEventListener(kind, (event) => handlers[kind](JSON.parse(event.data)));
+      }
+    });
+    if (handlers.error) {
+      source.onerror = handlers.error;
+    }
+    return source;
+  }
+
   /**
    * Search for a location
    */
@@ -109,6 +135,14 @@ class ApiService {
     return this.fetchWithErrorHandling(`${API_BASE_URL}/map/search?${params}`);
   }
 
+  /**
+   * Complete a partially typed location name
+   */
+  async suggestLocations(prefix, limit = 8) {
+    const params = new URLSearchParams({ q: prefix, limit });
+    return this.fetchWithErrorHandling(`${API_BASE_URL}/map/search/suggest?${params}`);
+  }
+
   /**
    * Send user's current location
    */
@@ -3,9 +3,11 @@ Example test file for the Flood Forecaster API.
 Run with: pytest tests/
 """
 
+import json
 import pytest
 from fastapi.testclient import TestClient
 from main import app
+from app.services.flood_risk import flood_risk_service
 
 client = TestClient(app)
 
@@ -51,6 +53,282 @@ def test_get_flood_events():
     assert isinstance(data, list)
 
 
+def test_nearby_flood_events_nearest_first():
+    """Test that nearby events are within the radius, nearest first, and capped."""
+    client.post("/api/v1/floods/bulk", params={"notify": False}, json=[
+        {"location_name": f"Near Nook {i}", "latitude": 12.97 + i * 0.005, "longitude": 77.59, "rainfall_mm": 10.0, "elevation_m": 50.0}
+        for i in range(6)
+    ] + [{"location_name": "Far Field", "latitude": 13.5, "longitude": 77.59, "rainfall_mm": 10.0, "elevation_m": 50.0}])
+    
+    params = {"latitude": 12.97, "longitude": 77.59, "radius_km": 5}
+    events = client.get("/api/v1/floods/nearby/", params=params).json()
+    assert [e["location_name"] for e in events] == [f"Near Nook {i}" for i in range(6)]
+    
+    capped = client.get("/api/v1/floods/nearby/", params={**params, "limit": 2}).json()
+    assert [e["location_name"] for e in capped] == ["Near Nook 0", "Near Nook 1"]
+
+
+def test_get_flood_events_cursor_pagination():
+    """Test that cursor pages walk all events without gaps or repeats."""
+    for i in range(5):
+        client.post("/api/v1/floods/", json={
+            "location_name": f"Page Street {i}",
+            "latitude": 40.7128,
+            "longitude": -74.0060,
+            "rainfall_mm": 10.0,
+            "elevation_m": 20.0
+        })
+    
+    expected = [e["id"] for e in client.get("/api/v1/floods/", params={"limit": 500}).json()]
+    
+    seen = []
+    params = {"limit": 2}
+    while True:
+        response = client.get("/api/v1/floods/", params=params)
+        assert response.status_code == 200
+        seen.extend(e["id"] for e in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+        params = {"limit": 2, "after": cursor}
+    
+    assert seen == expected
+    assert client.get("/api/v1/floods/", params={"after": "not-a-cursor"}).status_code == 400
+
+
+def test_bulk_create_flood_events():
+    """Test bulk ingestion from a JSON array and from NDJSON."""
+    events = [
+        {"location_name": "Gauge 1", "latitude": 19.07, "longitude": 72.87, "rainfall_mm": 80.0, "elevation_m": 3.0},
+        {"location_name": "Gauge 2", "latitude": 19.08, "longitude": 72.88, "rainfall_mm": 1.0, "elevation_m": 300.0}
+    ]
+    response = client.post("/api/v1/floods/bulk", params={"notify": False}, json=events)
+    assert response.status_code == 201
+    data = response.json()
+    assert data["count"] == 2
+    assert [client.get(f"/api/v1/floods/{i}").json()["severity"] for i in data["ids"]] == ["Critical", "Low"]
+    
+    ndjson = "\n".join(json.dumps(e) for e in events) + "\n"
+    response = client.post(
+        "/api/v1/floods/bulk",
+        params={"notify": False},
+        content=ndjson,
+        headers={"Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 201
+    assert response.json()["count"] == 2
+    
+    response = client.post(
+        "/api/v1/floods/bulk",
+        content=json.dumps(events[0]) + "\n{\"latitude\": 500}\n",
+        headers={"Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 422
+    assert response.json()["detail"]["line"] == 2
+
+
+def test_bulk_rejects_oversized_requests_before_validating(monkeypatch):
+    """Test that too many events or too many bytes get 413 without per-event validation."""
+    from app.config import settings
+    monkeypatch.setattr(settings, "BULK_INGEST_MAX_EVENTS", 2)
+    monkeypatch.setattr(settings, "BULK_INGEST_MAX_EVENT_BYTES", 100)
+    
+    # Invalid events would be a 422 if they were validated before counting
+    response = client.post("/api/v1/floods/bulk", json=[{"latitude": 500}] * 3)
+    assert response.status_code == 413
+    
+    oversized = json.dumps([{"location_name": "x" * 300, "latitude": 1.0, "longitude": 2.0}])
+    assert client.post("/api/v1/floods/bulk", content=oversized).status_code == 413
+    response = client.post(
+        "/api/v1/floods/bulk",
+        content=oversized.encode() + b"\n",
+        headers={"Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 413
+
+
+def test_subscription_update_bounds_radius():
+    """Test that updates reject the radii the create schema rejects."""
+    for radius_km in (-5.0, 0.0, 1e6):
+        response = client.put("/api/v1/notifications/subscriptions/1", json={"radius_km": radius_km})
+        assert response.status_code == 422
+
+
+def test_alert_statistics_aggregate_all_events():
+    """Test that statistics and history count every stored event."""
+    events = [
+        {"location_name": "Stats Lane", "latitude": 19.07, "longitude": 72.87, "rainfall_mm": 80.0, "elevation_m": 3.0}
+        for _ in range(3)
+    ]
+    client.post("/api/v1/floods/bulk", params={"notify": False}, json=events)
+    total = len(client.get("/api/v1/floods/", params={"limit": 500}).json())
+    
+    stats = client.get("/api/v1/alerts/statistics").json()
+    assert stats["total_events"] == total
+    assert stats["events_last_24h"] == total
+    assert sum(stats["severity_distribution"].values()) == total
+    assert {"location": "Stats Lane", "count": 3} in stats["most_affected_locations"]
+    
+    history = client.get("/api/v1/alerts/history", params={"days": 1}).json()
+    assert history["total_alerts"] == total
+    assert history["severity_breakdown"] == stats["severity_distribution"]
+    
+    event_id = client.get("/api/v1/floods/", params={"limit": 1}).json()[0]["id"]
+    client.delete(f"/api/v1/floods/{event_id}")
+    assert client.get("/api/v1/alerts/statistics").json()["total_events"] == total - 1
+
+
+def test_active_alert_listings_use_projected_rows():
+    """Test that alert and map listings return recent high-risk events."""
+    client.post("/api/v1/floods/bulk", params={"notify": False}, json=[
+        {"location_name": "Alert Ave", "latitude": 19.07, "longitude": 72.87, "rainfall_mm": 80.0, "elevation_m": 3.0},
+        {"location_name": "Calm Court", "latitude": 19.07, "longitude": 72.87, "rainfall_mm": 1.0, "elevation_m": 300.0}
+    ])
+    
+    alerts = client.get("/api/v1/alerts/active", params={"severity": "Critical"}).json()
+    assert alerts and all(a["risk"] == "Critical" for a in alerts)
+    assert alerts == sorted(alerts, key=lambda a: a["risk_score"], reverse=True)
+    
+    map_alerts = client.get("/api/v1/map/active-alerts").json()
+    assert "Alert Ave" in {a["location"] for a in map_alerts}
+    assert "Calm Court" not in {a["location"] for a in map_alerts}
+    
+    heatmap = client.get("/api/v1/map/heatmap-data").json()
+    assert heatmap["total_points"] == len(heatmap["points"]) > 0
+    assert all(0 <= p["intensity"] <= 1 for p in heatmap["points"])
+
+
+def test_location_search_and_suggest():
+    """Test that search ranks deduplicated locations and suggest completes prefixes."""
+    client.post("/api/v1/floods/bulk", params={"notify": False}, json=[
+        {"location_name": name, "latitude": 19.07, "longitude": 72.87, "rainfall_mm": 10.0, "elevation_m": 20.0}
+        for name in ["Quillon Bay Road", "Quillon Bay Road", "Upper Quillon Lane"]
+    ])
+    
+    data = client.get("/api/v1/map/search", params={"location": "quillon"}).json()
+    assert data["found"] is True
+    assert data["location_name"] == "Quillon Bay Road"
+    assert data["matching_events"] == 2
+    assert [m["location_name"] for m in data["matches"]] == ["Quillon Bay Road", "Upper Quillon Lane"]
+    
+    suggestions = client.get("/api/v1/map/search/suggest", params={"q": "Quil"}).json()
+    assert [s["location_name"] for s in suggestions] == ["Quillon Bay Road", "Upper Quillon Lane"]
+    
+    assert client.get("/api/v1/map/search", params={"location": "zzzz"}).json()["found"] is False
+
+def test_heatmap_binned_by_zoom_and_bbox():
+    """Test that zoomed heatmap requests return aggregated cells inside the bbox."""
+    client.post("/api/v1/floods/bulk", params={"notify": False}, json=[
+        {"location_name": "Bin Lane", "latitude": -33.865 + i * 1e-5, "longitude": 151.2, "rainfall_mm": 10.0, "elevation_m": 20.0}
+        for i in range(5)
+    ])
+    
+    data = client.get("/api/v1/map/heatmap-data", params={"zoom": 10, "bbox": "-34,151,-33,152"}).json()
+    assert data["total_cells"] == len(data["cells"]) == 1
+    assert data["cells"][0]["count"] == data["total_events"] == 5
+    assert 0 <= data["cells"][0]["mean_intensity"] <= data["cells"][0]["intensity"] <= 1
+    
+    assert client.get("/api/v1/map/heatmap-data", params={"zoom": 3, "bbox": "1,2"}).status_code == 400
+
+def test_vector_tile_caching_headers():
+    """Test that tiles are served as MVT with an ETag that yields 304 when unchanged."""
+    client.post("/api/v1/floods/bulk", params={"notify": False}, json=[
+        {"location_name": "Tile Row", "latitude": 19.07, "longitude": 72.87, "rainfall_mm": 80.0, "elevation_m": 3.0}
+    ])
+    
+    # Zoom 5 tile containing Mumbai
+    response = client.get("/api/v1/map/tiles/5/22/14.mvt")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/vnd.mapbox-vector-tile"
+    assert b"flood_events" in response.content and b"risk_grid" in response.content
+    
+    cached = client.get("/api/v1/map/tiles/5/22/14.mvt", headers={"If-None-Match": response.headers["etag"]})
+    assert cached.status_code == 304
+    
+    # Caches may send a list of validators or a weakened copy of the ETag
+    listed = client.get("/api/v1/map/tiles/5/22/14.mvt", headers={"If-None-Match": f'"stale", W/{response.headers["etag"]}'})
+    assert listed.status_code == 304
+    
+    assert client.get("/api/v1/map/tiles/5/32/14.mvt").status_code == 404
+
+def test_alert_clusters_and_expansion():
+    """Test that active alerts are clustered per zoom and clusters expand into children."""
+    client.post("/api/v1/floods/bulk", params={"notify": False}, json=[
+        {"location_name": f"Cluster Cove {i}", "latitude": -8.65 + i * 0.01, "longitude": 115.2, "rainfall_mm": 80.0, "elevation_m": 3.0}
+        for i in range(3)
+    ])
+    bbox = "-9,115,-8,116"
+    
+    coarse = client.get("/api/v1/map/clusters", params={"zoom": 5, "bbox": bbox}).json()
+    assert coarse["total_events"] == 3 and coarse["total_clusters"] == 1
+    cluster = coarse["clusters"][0]
+    assert cluster["max_severity"] == "Critical" and cluster["event_id"] is None
+    
+    expanded = client.get(f"/api/v1/map/clusters/{cluster['id']}").json()
+    assert expanded["expansion_zoom"] > 5
+    assert sum(child["count"] for child in expanded["children"]) == 3
+    
+    fine = client.get("/api/v1/map/clusters", params={"zoom": 17, "bbox": bbox}).json()
+    assert fine["total_clusters"] == 3 and all(c["event_id"] for c in fine["clusters"])
+    
+    assert client.get("/api/v1/map/clusters/0-99-99").status_code == 404
+
+def test_delta_sync_by_data_version():
+    """Test that writes advance the data version, unchanged payloads 304, and since returns only changes."""
+    version = client.get("/api/v1/map/last-update").json()["version"]
+    
+    full = client.get("/api/v1/map/active-alerts")
+    assert full.headers["x-data-version"] == str(version)
+    assert client.get("/api/v1/map/active-alerts", headers={"If-None-Match": full.headers["etag"]}).status_code == 304
+    
+    created = client.post("/api/v1/floods/bulk", params={"notify": False}, json=[
+        {"location_name": "Delta Dock", "latitude": 19.07, "longitude": 72.87, "rainfall_mm": 80.0, "elevation_m": 3.0}
+    ]).json()
+    new_id = created["ids"][0]
+    assert client.get("/api/v1/map/last-update").json()["version"] == version + 1
+    assert client.get("/api/v1/map/active-alerts", headers={"If-None-Match": full.headers["etag"]}).status_code == 200
+    
+    for path in ("/api/v1/map/active-alerts", "/api/v1/alerts/active", "/api/v1/map/heatmap-data"):
+        delta = client.get(path, params={"since": version}).json()
+        assert delta["version"] == version + 1 and not delta["truncated"]
+        assert [item["id"] for item in delta["added"]] == [new_id] and delta["removed"] == []
+    
+    assert client.delete(f"/api/v1/floods/{new_id}").status_code == 200
+    delta = client.get("/api/v1/alerts/active", params={"since": version + 1}).json()
+    assert (delta["version"], delta["added"], delta["removed"]) == (version + 2, [], [new_id])
+    
+    assert client.get("/api/v1/map/active-alerts", params={"since": version + 99}).status_code == 410
+    assert client.get("/api/v1/map/heatmap-data", params={"zoom": 5, "since": version}).status_code == 400
+
+
+def test_heatmap_store_refresh_reads_only_changes():
+    """Test that a loaded heatmap store catches up on other workers' writes and deletes incrementally."""
+    import asyncio
+    from app.database import AsyncSessionLocal
+    from app.services.heatmap import HeatmapStore
+    
+    # A store standing in for another worker, which does not see this worker's write path
+    store = HeatmapStore(refresh_seconds=0, cell_pixels=16, cache_ttl_seconds=60, cache_max_entries=16)
+    
+    async def refresh():
+        async with AsyncSessionLocal() as db:
+            await store.rebuild(db)
+    
+    asyncio.run(refresh())
+    before = len(store)
+    loaded_version = store._synced_version
+    
+    ids = client.post("/api/v1/floods/bulk", params={"notify": False}, json=[
+        {"location_name": "Catch Up", "latitude": 19.07 + i / 100, "longitude": 72.87, "rainfall_mm": 20.0, "elevation_m": 9.0}
+        for i in range(3)
+    ]).json()["ids"]
+    assert client.delete(f"/api/v1/floods/{ids[0]}").status_code == 200
+    
+    asyncio.run(refresh())
+    assert len(store) == before + 2 and store._synced_version == loaded_version + 2
+    assert sorted(store.points_in(-90, -180, 90, 180)[0].tolist()[-2:]) == ids[1:]
+
+
 def test_calculate_risk():
     """Test risk calculation without saving."""
     risk_data = {
@@ -67,6 +345,29 @@ def test_calculate_risk():
     assert data["risk_score"] <= 100
 
 
+def test_calculate_risk_batch():
+    """Test batch risk calculation matches single-point scoring."""
+    points = [
+        {"latitude": 19.0760, "longitude": 72.8777, "rainfall_mm": 42.0, "elevation_m": 8.0},
+        {"latitude": 19.0820, "longitude": 72.8810, "rainfall_mm": 2.0, "elevation_m": 250.0}
+    ]
+    response = client.post("/api/v1/floods/calculate-risk/batch", json={"points": points})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["count"] == 2
+    assert [r["risk_score"] for r in data["results"]] == [90, 15]
+    assert [r["severity"] for r in data["results"]] == ["Critical", "Low"]
+
+
+def test_location_forecast():
+    """Test hourly forecast endpoint returns one entry per requested hour."""
+    response = client.get("/api/v1/map/forecast/19.0760/72.8777", params={"hours": 6})
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["forecast"]) == 6
+    assert all(0 <= hour["risk_score"] <= 100 for hour in data["forecast"])
+
+
 def test_invalid_coordinates():
     """Test validation for invalid coordinates."""
     invalid_data = {
@@ -78,4 +379,20 @@ def test_invalid_coordinates():
     assert response.status_code == 422  # Validation error
 
 
+def test_lifespan_manages_shared_http_clients():
+    """Test that pooled upstream clients are opened and closed with the app."""
+    with TestClient(app) as lifespan_client:
+        clients = dict(flood_risk_service._clients)
+        assert set(clients) == {"openweather", "google_elevation"}
+        response = lifespan_client.post(
+            "/api/v1/floods/calculate-risk",
+            json={"latitude": 40.7128, "longitude": -74.0060}
+        )
+        assert response.status_code == 200
+        assert flood_risk_service._clients == clients
+    
+    assert flood_risk_service._clients == {}
+    assert all(c.is_closed for c in clients.values())
+
+
 # Add more tests as needed
@@ -0,0 +1,688 @@
+"""
+Unit tests for service-layer helpers (caching, geo utilities, risk scoring).
+Run with: pytest tests/
+"""
+
+import asyncio
+import json
+import math
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import httpx
+import numpy as np
+import pytest
+from app.services.batching import MicroBatcher
+from app.services.cache import TTLCache, rebuild_if_stale
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.dem import DemRaster
+from app.config import settings
+import app.database as database
+from app.database import ReadReplicaPool, get_async_database_url, get_read_db
+from app.services.flood_risk import FloodRiskService, ForecastSeries, flood_risk_service
+from app.services.prefetch import WeatherPrefetcher
+from app.services.elevation_store import ElevationStore
+from app.services.alert_stream import AlertHub
+from app.services.cluster_index import ClusterIndex
+from app.services.heatmap import HeatmapStore, bin_points, clip_bins
+from app.services.location_search import LocationSearchIndex
+from app.utils.mvt import Layer, encode_tile, tile_bounds
+from app.services.subscription_index import IndexedSubscription, SubscriptionIndex
+import random
+from app.utils.geo import geohash_cell_size, geohash_cover, geohash_encode, haversine_km, quantize
+
+
+@pytest.fixture(autouse=True)
+def isolated_weather_store(monkeypatch, tmp_path):
+    """Give services built by each test their own shared weather store."""
+    monkeypatch.setattr(settings, "WEATHER_STORE_PATH", str(tmp_path / "weather.sqlite3"))
+
+
+def test_quantize_groups_nearby_points():
+    """Test that points in the same grid cell share a key."""
+    assert quantize(40.71281, -74.00601, 0.005) == quantize(40.71449, -74.00549, 0.005)
+    assert quantize(40.71281, -74.00601, 0.005) != quantize(40.71781, -74.00601, 0.005)
+
+
+def test_geohash_cover_contains_every_point_in_radius():
+    """Test that points within the radius always fall inside a covering cell."""
+    rng = random.Random(7)
+    for center_lat, center_lon, radius_km in [
+        (19.076, 72.8777, 5.0), (19.076, 72.8777, 1.0), (60.17, 24.94, 12.0), (-33.86, 151.2, 0.3), (19.07, 179.99, 5.0)
+    ]:
+        prefixes = geohash_cover(center_lat, center_lon, radius_km)
+        assert len(prefixes) <= 24
+        
+        # Over-read stays a small multiple of the circle, not a city-wide cell
+        cell_lat, cell_lon = geohash_cell_size(len(prefixes[0]))
+        cover_km2 = len(prefixes) * cell_lat * cell_lon * 111.32 ** 2 * math.cos(math.radians(center_lat))
+        assert cover_km2 < 6 * math.pi * radius_km ** 2
+        
+        for _ in range(500):
+            lat = center_lat + rng.uniform(-1, 1) * radius_km / 111.32
+            lon = center_lon + rng.uniform(-1, 1) * radius_km / 50.0
+            if haversine_km(center_lat, center_lon, lat, lon) <= radius_km:
+                assert geohash_encode(lat, lon).startswith(tuple(prefixes))
+
+
+def test_ttl_cache_coalesces_concurrent_misses():
+    """Test that concurrent misses for one key trigger a single load."""
+    cache = TTLCache(ttl_seconds=60, max_entries=10)
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return 7.5
+
+    async def run():
+        return await asyncio.gather(*[cache.get_or_load("cell", loader) for _ in range(20)])
+
+    assert asyncio.run(run()) == [7.5] * 20
+    assert len(calls) == 1
+    assert cache.get("cell") == 7.5
+
+
+def test_ttl_cache_expiry_and_lru_eviction():
+    """Test that expired entries are not fresh and capacity is bounded."""
+    cache = TTLCache(ttl_seconds=0, max_entries=2)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+    assert cache.get_stale("a") == 1
+
+    cache.set("b", 2)
+    cache.set("c", 3)
+    assert len(cache) == 2
+    assert cache.get_stale("a") is None
+
+
+def test_elevation_store_persists_across_instances(tmp_path):
+    """Test that stored elevations survive reopening the store."""
+    path = str(tmp_path / "elevation.sqlite3")
+    store = ElevationStore(path, cell_degrees=0.0005)
+    assert store.get(19.0760, 72.8777) is None
+    store.put(19.0760, 72.8777, 14.2, source="google")
+    store.close()
+
+    reopened = ElevationStore(path, cell_degrees=0.0005)
+    assert reopened.get(19.07601, 72.87771) == 14.2
+    reopened.put_many([(19.1, 72.9, 8.0, "google"), (19.2, 72.9, 11.5, "google")])
+    assert reopened.get_many([(19.1, 72.9), (19.3, 72.9), (19.2, 72.9)]) == [8.0, None, 11.5]
+    reopened.close()
+
+
+def test_micro_batcher_fans_out_one_call():
+    """Test that lookups within the window share one deduplicated handler call."""
+    batches = []
+
+    async def handler(items):
+        batches.append(items)
+        return [lat + lon for lat, lon in items]
+
+    batcher = MicroBatcher(handler, window_seconds=0.01, max_batch_size=100)
+    points = [(1.0, 2.0), (3.0, 4.0), (1.0, 2.0)]
+
+    async def run():
+        return await asyncio.gather(*[batcher.submit(p) for p in points])
+
+    assert asyncio.run(run()) == [3.0, 7.0, 3.0]
+    assert batches == [[(1.0, 2.0), (3.0, 4.0)]]
+
+
+def test_dem_raster_bilinear_sampling(tmp_path):
+    """Test memory-mapped DEM sampling, interpolation and out-of-bounds handling."""
+    path = str(tmp_path / "dem.npy")
+    np.save(path, np.array([[0.0, 10.0], [20.0, 30.0]], dtype=np.float32))
+    with open(f"{path}.json", "w") as f:
+        json.dump({"north": 1.0, "west": 0.0, "cell_size": 0.5}, f)
+
+    dem = DemRaster.load(path)
+    assert isinstance(dem.data, np.memmap)
+
+    # Pixel centres, the midpoint between all four, and a point outside the grid
+    elevations = dem.sample([0.75, 0.25, 0.5, 5.0], [0.25, 0.75, 0.5, 5.0])
+    assert elevations[:3].tolist() == [0.0, 30.0, 15.0]
+    assert np.isnan(elevations[3])
+
+
+def test_vectorized_risk_scores_match_scalar():
+    """Test that batch scoring matches the scalar path, including band edges."""
+    rainfall = np.array([0, 4.99, 5, 14.9, 15, 29.9, 30, 49.9, 50, 120, float("nan")])
+    elevation = np.array([-5, 0, 9.99, 10, 49.9, 50, 99.9, 100, 199.9, 200, 2500.0])
+    grid_r, grid_e = (a.ravel() for a in np.meshgrid(rainfall, elevation))
+
+    scores, severities = flood_risk_service.calculate_risk_scores(grid_r, grid_e)
+    expected = [flood_risk_service.calculate_risk_score(r, e) for r, e in zip(grid_r, grid_e)]
+
+    assert list(zip(scores.tolist(), severities.tolist())) == expected
+
+
+def test_calculate_flood_risk_degrades_at_deadline(monkeypatch):
+    """Test that a slow upstream falls back to stale data before the deadline."""
+    service = FloodRiskService()
+    monkeypatch.setattr(settings, "RISK_REQUEST_DEADLINE_SECONDS", 0.05)
+
+    async def slow_fetch(latitude, longitude):
+        await asyncio.sleep(5)
+        return 0.0
+
+    monkeypatch.setattr(service, "_fetch_current_rainfall", slow_fetch)
+    monkeypatch.setattr(service, "_fetch_forecast_series", slow_fetch)
+
+    # An expired entry for the cell is served as stale data
+    service._weather_cache.ttl_seconds = 0
+    service._weather_cache.set(("current", quantize(19.0760, 72.8777, settings.WEATHER_GRID_DEGREES)), 33.0)
+
+    result = asyncio.run(service.calculate_flood_risk(19.0760, 72.8777))
+    assert result["rainfall_mm"] == 33.0
+    assert result["data_sources"]["rainfall"] == "stale"
+    assert result["degraded_sources"] == ["rainfall"]
+
+
+def test_forecast_fetched_only_for_dry_cells(monkeypatch):
+    """Test that the forecast is requested only when there is no current rain."""
+    service = FloodRiskService()
+    forecast_calls = []
+    current = {19.0: 8.0, 20.0: 0.0}
+
+    async def fetch_current(latitude, longitude):
+        return current[round(latitude)]
+
+    async def fetch_forecast(latitude, longitude):
+        forecast_calls.append(latitude)
+        raise httpx.ConnectError("forecast down")
+
+    monkeypatch.setattr(service, "_fetch_current_rainfall", fetch_current)
+    monkeypatch.setattr(service, "_fetch_forecast_series", fetch_forecast)
+
+    assert asyncio.run(service.get_rainfall_data(19.0, 72.8)) == 8.0
+    assert forecast_calls == []
+    # A failed forecast is a degraded reading, not a live "no rain"
+    assert asyncio.run(service._get_rainfall_reading(20.0, 72.8)) == (0.0, "stale")
+    assert len(forecast_calls) == 1
+    result = asyncio.run(service.calculate_flood_risk(20.0, 72.8, elevation_override=20.0))
+    assert result["degraded_sources"] == ["rainfall"]
+
+
+def test_batch_risk_bounds_weather_fetches(monkeypatch):
+    """Test that batch scoring caps concurrent and total weather lookups."""
+    service = FloodRiskService()
+    monkeypatch.setattr(settings, "RISK_BATCH_MAX_CONCURRENCY", 2)
+    monkeypatch.setattr(settings, "RISK_BATCH_MAX_WEATHER_FETCHES", 3)
+    in_flight = []
+    peak = []
+
+    async def fetch(latitude, longitude):
+        in_flight.append(1)
+        peak.append(len(in_flight))
+        await asyncio.sleep(0.01)
+        in_flight.pop()
+        return 12.0
+
+    monkeypatch.setattr(service, "_fetch_current_rainfall", fetch)
+
+    # Five distinct weather cells; the first holds two points, so it is fetched first
+    points = [(19.0 + 0.1 * i, 72.8) for i in range(5)] + [(19.0, 72.8)]
+    scored = asyncio.run(service.calculate_flood_risk_batch(points, elevation_overrides=[20.0] * len(points)))
+
+    assert len(peak) == 3 and max(peak) == 2
+    assert scored["rainfall_degraded"].tolist() == [False, False, False, True, True, False]
+    assert scored["rainfall_mm"].tolist()[3:5] == [5.0, 5.0]
+
+
+def test_circuit_breaker_opens_and_probes():
+    """Test that the breaker opens on failures and closes after a good probe."""
+    breaker = CircuitBreaker("test", failure_rate_threshold=0.5, window_size=4, min_calls=2, open_seconds=0)
+
+    async def fail():
+        raise RuntimeError("upstream down")
+
+    async def succeed():
+        return "ok"
+
+    async def run():
+        for _ in range(2):
+            try:
+                await breaker.call(fail)
+            except RuntimeError:
+                pass
+        assert breaker.state == CircuitBreaker.OPEN
+
+        # Cool-down elapsed: one probe is allowed and closes the circuit
+        assert await breaker.call(succeed) == "ok"
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    asyncio.run(run())
+
+
+def test_open_circuit_serves_stale_rainfall(monkeypatch):
+    """Test that an open weather circuit serves the last known value without calling upstream."""
+    service = FloodRiskService()
+    calls = []
+
+    async def fetch(latitude, longitude):
+        calls.append(1)
+        return 12.0
+
+    monkeypatch.setattr(service, "_fetch_current_rainfall", fetch)
+    cell = quantize(19.0760, 72.8777, settings.WEATHER_GRID_DEGREES)
+    service._weather_cache.ttl_seconds = 0
+    service._weather_cache.set(("current", cell), 21.0)
+    service._breakers["openweather"]._open()
+
+    assert asyncio.run(service._get_rainfall_reading(19.0760, 72.8777)) == (21.0, "stale")
+    assert calls == []
+
+
+def test_prefetcher_refreshes_only_expiring_cells_within_budget(monkeypatch):
+    """Test that a prefetch cycle skips fresh cells and respects the request budget."""
+    service = FloodRiskService()
+    refreshed = []
+
+    async def refresh_weather(latitude, longitude):
+        refreshed.append((latitude, longitude))
+
+    monkeypatch.setattr(service, "refresh_weather", refresh_weather)
+    prefetcher = WeatherPrefetcher(
+        service, session_factory=None, interval_seconds=0.06,
+        max_requests_per_minute=6000, event_lookback_hours=48
+    )
+    cells = [(19.0025, 72.8025), (19.0075, 72.8025), (19.0125, 72.8025), (19.0175, 72.8025)]
+
+    async def hot_cells():
+        return cells
+
+    monkeypatch.setattr(prefetcher, "_hot_cells", hot_cells)
+
+    # First cell is already fresh beyond the next cycle
+    service._weather_cache.set(("current", cells[0]), 1.0)
+    service._weather_cache.set(("forecast", cells[0]), 1.0)
+
+    assert asyncio.run(prefetcher.refresh_once()) == 3
+    assert refreshed == cells[1:]
+
+
+def test_prefetcher_runs_on_one_worker(tmp_path):
+    """Test that only the worker holding the leader lock prefetches."""
+    lock_path = str(tmp_path / "prefetch.lock")
+    first, second = (
+        WeatherPrefetcher(
+            flood_risk_service, session_factory=None, interval_seconds=60,
+            max_requests_per_minute=30, event_lookback_hours=48, leader_lock_path=lock_path
+        )
+        for _ in range(2)
+    )
+
+    assert first._acquire_leadership() and first.is_leader
+    assert not second._acquire_leadership() and not second.is_leader
+
+    # Leadership passes on once the leader stops
+    asyncio.run(first.stop())
+    assert second._acquire_leadership()
+    asyncio.run(second.stop())
+
+
+def test_weather_is_shared_between_workers(monkeypatch):
+    """Test that weather fetched by one service instance is a cache hit in another."""
+    leader, follower = FloodRiskService(), FloodRiskService()
+    calls = []
+
+    async def fetch_current(latitude, longitude):
+        calls.append((latitude, longitude))
+        return 7.5
+
+    async def fetch_forecast(latitude, longitude):
+        calls.append((latitude, longitude))
+        return ForecastSeries(times=np.array([time.time() + 3600.0]), rain_3h=np.array([6.0]))
+
+    for service in (leader, follower):
+        monkeypatch.setattr(service, "_fetch_current_rainfall", fetch_current)
+        monkeypatch.setattr(service, "_fetch_forecast_series", fetch_forecast)
+
+    asyncio.run(leader.refresh_weather(19.0760, 72.8777))
+    assert len(calls) == 2
+
+    assert asyncio.run(follower.get_rainfall_data(19.0761, 72.8778)) == 7.5
+    series, source = asyncio.run(follower.get_forecast_series(19.0760, 72.8777))
+    assert source == "live" and series.rain_3h.tolist() == [6.0]
+    assert len(calls) == 2
+    assert 0 < follower.weather_ttl_remaining(19.0760, 72.8777) <= settings.WEATHER_CACHE_TTL_SECONDS
+
+
+def test_prefetcher_with_zero_budget_is_idle():
+    """Test that a zero request budget disables prefetching instead of failing."""
+    prefetcher = WeatherPrefetcher(
+        flood_risk_service, session_factory=None, interval_seconds=60,
+        max_requests_per_minute=0, event_lookback_hours=48
+    )
+    assert asyncio.run(prefetcher.refresh_once()) == 0
+
+
+def test_check_since_tolerates_lagging_replicas():
+    """Test that a client ahead of a replica gets an empty delta, but 410 from the primary."""
+    from fastapi import HTTPException
+    from app.utils.sync import check_since
+
+    assert check_since(7, 7) is None and check_since(3, 7, from_replica=True) is None
+    assert check_since(9, 7, from_replica=True) == {
+        "version": 9, "since": 9, "added": [], "removed": [], "truncated": False
+    }
+    with pytest.raises(HTTPException) as raised:
+        check_since(9, 7)
+    assert raised.value.status_code == 410
+
+
+def test_hourly_forecast_uses_cached_series():
+    """Test that hourly risk is scored from the cached forecast slots."""
+    service = FloodRiskService()
+    now = time.time()
+    cell = quantize(19.0760, 72.8777, settings.WEATHER_GRID_DEGREES)
+    service._weather_cache.set(("forecast", cell), ForecastSeries(
+        times=np.array([now + 3.5 * 3600, now + 6.5 * 3600]),
+        rain_3h=np.array([40.0, 2.0])
+    ))
+
+    hourly = asyncio.run(service.calculate_hourly_forecast(
+        19.0760, 72.8777, hours=6, elevation_m=5.0, fallback_rainfall_mm=0.0
+    ))
+    assert hourly["source"] == "live"
+    assert hourly["rainfall_mm"].tolist() == [40.0, 40.0, 40.0, 2.0, 2.0, 2.0]
+    assert hourly["risk_score"].tolist() == [90, 90, 90, 50, 50, 50]
+    assert hourly["severity"].tolist() == ["Critical"] * 3 + ["Medium"] * 3
+
+
+def test_subscription_index_matches_brute_force():
+    """Test that indexed matching agrees with a haversine scan of every subscription."""
+    rng = random.Random(3)
+    index = SubscriptionIndex(cell_degrees=0.25, refresh_seconds=60)
+    subscriptions = [
+        IndexedSubscription(
+            id=i,
+            email=f"user{i}@example.com",
+            phone=None,
+            latitude=19.0 + rng.uniform(-1, 1),
+            longitude=72.8 + rng.uniform(-1, 1),
+            radius_km=rng.uniform(0.1, 50),
+            min_severity_rank=rng.randrange(4)
+        )
+        for i in range(2000)
+    ]
+    index.load(subscriptions)
+    index.remove(0)
+
+    for _ in range(50):
+        lat, lon = 19.0 + rng.uniform(-1, 1), 72.8 + rng.uniform(-1, 1)
+        expected = {
+            sub.id for sub in subscriptions[1:]
+            if sub.min_severity_rank <= 2
+            and haversine_km(lat, lon, sub.latitude, sub.longitude) <= sub.radius_km
+        }
+        assert {sub.id for sub in index.match(lat, lon, "High")} == expected
+
+
+def test_location_search_index_ranks_and_completes():
+    """Test ranking (prefix, substring, fuzzy) and prefix completion of location names."""
+    index = LocationSearchIndex(refresh_seconds=60)
+    index.load({"Marine Drive": 4, "Drive-in Road": 1, "Andheri East": 9, "Andheri West": 2, "Old Drive": 0})
+
+    assert index.search("drive") == [("Drive-in Road", 1), ("Marine Drive", 4)]
+    assert index.search("andheri wets")[0] == ("Andheri West", 2)
+    assert index.complete("and") == [("Andheri East", 9), ("Andheri West", 2)]
+    assert index.complete("dr") == [("Marine Drive", 4), ("Drive-in Road", 1)]
+
+    index.apply_counts({"Marine Drive": -4, "Dadar": 3})
+    assert index.complete("d") == [("Dadar", 3), ("Drive-in Road", 1)]
+    assert index.search("marine") == []
+
+def test_heatmap_binning_matches_per_point_grouping():
+    """Test that vectorized binning matches a per-point reference and clips to a bbox."""
+    rng = np.random.default_rng(7)
+    lat = rng.uniform(-30, 30, 5000)
+    lon = rng.uniform(170, 190, 5000)
+    lon = (lon + 180) % 360 - 180  # straddle the antimeridian
+    intensity = rng.uniform(0, 1, 5000)
+    bins = bin_points(lat, lon, intensity, 2.5)
+
+    expected = {}
+    for la, lo, value in zip(lat, lon, intensity):
+        cell = quantize(la, lo, 2.5)
+        count, peak, total = expected.get(cell, (0, 0.0, 0.0))
+        expected[cell] = (count + 1, max(peak, value), total + value)
+
+    assert bins.count.sum() == 5000 and len(bins.count) == len(expected)
+    for la, lo, count, peak, mean in zip(*bins):
+        e_count, e_peak, e_total = expected[(round(la, 6), round(lo, 6))]
+        assert count == e_count and peak == e_peak and np.isclose(mean, e_total / e_count)
+
+    # A box crossing the antimeridian keeps cells on both sides
+    clipped = clip_bins(bins, (0.0, 175.0, 10.0, -175.0))
+    assert clipped.count.sum() == np.sum((lat >= 0) & (lat < 10) & ((lon >= 175) | (lon < -175)))
+
+def test_heatmap_store_folds_writes_into_cached_bins():
+    """Test that appends and removals keep cached bins equal to a fresh binning."""
+    now = datetime.utcnow()
+    rng = random.Random(3)
+
+    def event(event_id, hours_ago):
+        return SimpleNamespace(
+            id=event_id, latitude=rng.uniform(18.9, 19.3), longitude=rng.uniform(72.7, 73.1),
+            risk_score=rng.uniform(0, 100), timestamp=now - timedelta(hours=hours_ago), severity="High"
+        )
+
+    def rows(events):
+        return [(e.id, e.latitude, e.longitude, e.risk_score, e.timestamp, e.severity) for e in events]
+
+    events = [event(i, rng.uniform(0, 72)) for i in range(1, 301)]
+    store = HeatmapStore(refresh_seconds=3600, cell_pixels=16, cache_ttl_seconds=60, cache_max_entries=16)
+    store.load(rows(events))
+    store.bins(10), store.bins(10, hours=24)
+
+    # An old backfill leaves the 24-hour binning cached; deleting a recent event drops only the affected ones
+    added = [event(i, rng.uniform(0, 72)) for i in range(301, 321)]
+    store.add(added[:10])
+    store.add(added[10:])
+    old = event(400, 100)
+    store.add([old])
+    store.bins(10), store.bins(10, hours=24)
+    store.remove([old.id])
+    assert (10, 24) in store._bins.keys() and (10, None) not in store._bins.keys()
+
+    current = events + added
+    fresh = HeatmapStore(refresh_seconds=3600, cell_pixels=16, cache_ttl_seconds=60, cache_max_entries=16)
+    fresh.load(rows(current))
+    assert len(store) == len(fresh) == 320
+    for hours in (None, 24):
+        cached, expected = store.bins(10, hours), fresh.bins(10, hours)
+        assert cached.count.tolist() == expected.count.tolist()
+        assert np.allclose(cached.latitude, expected.latitude) and np.allclose(cached.longitude, expected.longitude)
+        assert np.allclose(cached.max_intensity, expected.max_intensity)
+        assert np.allclose(cached.mean_intensity, expected.mean_intensity)
+
+
+def test_rebuild_if_stale_runs_one_rebuild():
+    """Test that concurrent requests for a stale index share one rebuild."""
+    class Index:
+        is_stale = True
+        rebuilds = 0
+
+        async def rebuild(self, db):
+            self.rebuilds += 1
+            await asyncio.sleep(0.01)
+            self.is_stale = False
+
+    index = Index()
+
+    async def run():
+        await asyncio.gather(*[rebuild_if_stale(index, None) for _ in range(10)])
+
+    asyncio.run(run())
+    assert index.rebuilds == 1
+
+    # Once loaded, a stale index is refreshed in the background with its own session
+    class Session:
+        async def __aenter__(self):
+            return "background"
+
+        async def __aexit__(self, *exc):
+            return False
+
+    sessions = []
+    index.is_loaded = True
+
+    async def rebuild(db):
+        sessions.append(db)
+        await asyncio.sleep(0.01)
+        index.is_stale = False
+
+    index.rebuild = rebuild
+
+    async def run_background():
+        index.is_stale = True
+        await asyncio.gather(*[rebuild_if_stale(index, "request", Session) for _ in range(10)])
+        assert index.is_stale  # callers did not wait for the reload
+        await asyncio.sleep(0.05)
+
+    asyncio.run(run_background())
+    assert sessions == ["background"] and not index.is_stale
+
+
+def test_mvt_encoding_matches_reference_bytes():
+    """Test the hand-written MVT encoder against bytes verified with a reference decoder."""
+    layer = Layer("t", extent=4096)
+    layer.add_point(10, -5, {"severity": "High", "count": 3}, feature_id=7)
+    layer.add_box(0, 0, 100, 50, {"count": 3})
+
+    assert encode_tile([layer]).hex() == (
+        "1a4d78020a0174120f0807120400000101180122030914091215120201011803220d0900001ac801"
+        "000064c701000f1a0873657665726974791a05636f756e7422060a044869676822022803288020"
+    )
+    assert encode_tile([Layer("empty")]) == b""
+
+    south, west, north, east = tile_bounds(1, 1, 0)
+    assert (west, east) == (0.0, 180.0)
+    assert south == 0.0 and np.isclose(north, 85.0511287798)
+
+def test_cluster_index_hierarchy_updates_incrementally():
+    """Test that clusters nest across zooms, expand into children, and track adds/removes/expiry."""
+    from datetime import datetime, timedelta
+
+    index = ClusterIndex(cell_pixels=64, max_zoom=16, active_hours=24, min_severity="High", refresh_seconds=60)
+    now = datetime.utcnow()
+    rng = random.Random(3)
+    rows = [
+        (i, 19.0 + rng.random() * 0.3, 72.8 + rng.random() * 0.3, rng.choice(["High", "Critical"]), 80.0, now)
+        for i in range(1, 301)
+    ]
+    rows.append((999, 19.1, 72.9, "Low", 10.0, now))  # not active
+    rows.append((998, 19.1, 72.9, "High", 80.0, now - timedelta(hours=30)))  # expired
+    index.load(rows)
+
+    for zoom in (0, 8, 12, 17):
+        assert sum(cluster.count for cluster in index.clusters(zoom)) == 300
+    assert len(index.clusters(0)) == 1 and len(index.clusters(17)) == 300
+
+    top = index.clusters(10)[0]
+    cluster, expansion_zoom, children = index.expand(top.id)
+    assert expansion_zoom > 10 and len(children) > 1
+    assert sum(child.count for child in children) == cluster.count == top.count
+    assert {child.max_severity for child in children} <= {"High", "Critical"}
+
+    # Viewport clipping keeps only overlapping clusters
+    assert sum(c.count for c in index.clusters(12, (19.0, 72.8, 19.15, 72.95))) < 300
+
+    index.remove([1, 2])
+    index.expire(now=time.time() + 25 * 3600)
+    assert len(index) == 0 and index.clusters(5) == []
+    assert index.expand("bogus") is None
+
+def test_alert_hub_fans_out_changes_to_viewports():
+    """Test that one published change reaches every matching viewport, and slow viewers resync."""
+    from datetime import datetime, timedelta
+    from types import SimpleNamespace
+
+    def event(flood_id, latitude, longitude, severity="High", age_hours=0):
+        return SimpleNamespace(
+            id=flood_id, location_name=f"Spot {flood_id}", latitude=latitude, longitude=longitude,
+            severity=severity, risk_score=80.0, timestamp=datetime.utcnow() - timedelta(hours=age_hours),
+            rainfall_mm=40.0, elevation_m=5.0
+        )
+
+    async def run():
+        hub = AlertHub(
+            active_hours=24, min_severity="High", queue_size=3, tick_seconds=1,
+            reconcile_seconds=60, session_factory=None
+        )
+        mumbai = hub.subscribe((18.9, 72.7, 19.3, 73.0))
+        everywhere = hub.subscribe()
+        slow = hub.subscribe()
+
+        hub.publish_created([event(1, 19.0, 72.8), event(2, 28.6, 77.2), event(3, 19.1, 72.9, "Low")])
+        assert mumbai.queue.get_nowait().alert.id == 1 and mumbai.queue.empty()
+        assert [everywhere.queue.get_nowait().alert.id for _ in range(2)] == [1, 2]
+
+        # Already tracked (e.g. also picked up by a reconcile) is not sent twice
+        hub.publish_created([event(1, 19.0, 72.8)])
+        hub.publish_deleted([1])
+        change = mumbai.queue.get_nowait()
+        assert (change.kind, change.alert.id) == ("expired", 1)
+
+        hub.track([event(4, 19.2, 72.9, age_hours=23.9)])
+        hub.expire(now=time.time() + 3600)
+        assert mumbai.queue.get_nowait().alert.id == 4
+
+        # slow never read: 4 changes overflow its queue of 3
+        assert slow.queue.qsize() == 1 and slow.queue.get_nowait().kind == "resync"
+        hub.unsubscribe(mumbai)
+        assert hub.subscriber_count == 2 and len(hub) == 1  # alert 2 is still active
+
+    asyncio.run(run())
+
+
+def test_alert_stream_releases_db_connection_while_open():
+    """Test that an open stream does not hold a pooled database connection."""
+    from types import SimpleNamespace
+    from app.routers.map import stream_active_alerts
+
+    async def run():
+        request = SimpleNamespace(is_disconnected=lambda: asyncio.sleep(0, result=False))
+        response = await stream_active_alerts(request, bbox=None)
+        body = response.body_iterator
+        assert (await body.__anext__()).startswith("retry:")
+        assert (await body.__anext__()).startswith("event: snapshot")
+        assert database.async_engine.pool.checkedout() == 0
+        await body.aclose()
+
+    asyncio.run(run())
+
+
+def test_async_database_url_uses_async_drivers():
+    """Test that sync database URLs map to asyncpg/aiosqlite URLs."""
+    assert get_async_database_url("sqlite:///./flood.db") == "sqlite+aiosqlite:///./flood.db"
+    assert get_async_database_url(
+        "postgresql://user:pw@db.example.com/floods?sslmode=require"
+    ) == "postgresql+asyncpg://user:pw@db.example.com/floods?ssl=require"
+
+
+def test_read_db_falls_back_when_replicas_are_down(monkeypatch, tmp_path):
+    """Test that an unreachable replica is skipped and reads go to the primary."""
+    pool = ReadReplicaPool([f"sqlite:///{tmp_path}/missing/replica.db", f"sqlite:///{tmp_path}/replica.db"])
+    monkeypatch.setattr(database, "read_replicas", pool)
+
+    async def bind_url():
+        sessions = get_read_db()
+        db = await sessions.__anext__()
+        url = str(db.bind.url)
+        await sessions.aclose()
+        return url
+
+    async def run():
+        # Rotation starts at the broken replica; it opens its circuit and the next one serves
+        assert await bind_url() == f"sqlite+aiosqlite:///{tmp_path}/replica.db"
+        assert pool.status()["replica-0"] == "open"
+        assert await bind_url() == f"sqlite+aiosqlite:///{tmp_path}/replica.db"
+
+        pool.replicas[1].breaker._open()
+        assert await bind_url() == str(database.async_engine.url)
+        await pool.dispose()
+
+    asyncio.run(run())